@@ -0,0 +1,320 @@
+"""
+Semantic answer cache for repeated FAQ-style questions.
+
+Thousands of farmers ask faq_support_agent the same app-navigation questions
+with slightly different wording, and each one costs a full model call. This
+cache stores final answers keyed by the normalized query text (lowercased,
+filler words dropped, plurals folded) and matches new queries either exactly
+on that key or by cosine similarity of a hashed embedding
+(tools.embeddings) above a threshold. Entries expire after a TTL and are
+evicted least-recently-used.
+
+Answers are only shared across users when the query does not depend on
+session state (weather, location, "my farm", ...) and the answering agent is a
+knowledge-base agent. Everything else is cached per (user_id, session_id) only,
+so one farmer's weather-based advice is never served to another. Agent
+instructions also template in session state ({weather}, {location}, ...), so
+every entry is tagged with the values of those keys (shared_state_keys) and
+only served to a session whose state matches. Short or contextual follow-ups
+("yes please", "tell me more") depend on the conversation so far and are
+never cached.
+"""
+
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from router import route_tokens
+from tools.embeddings import EMBEDDING_DIM, embed_text
+
+# Agents whose answers do not depend on the asking user's session
+SHAREABLE_AGENTS = frozenset({"faq_support_agent"})
+
+# Query words that make an answer depend on the user's session state
+_STATE_DEPENDENT_RE = re.compile(
+    r"\b(weather|rain\w*|temperature|humid\w*|wind\w*|forecast|climate|"
+    r"location|near|nearby|here|local|area|district|village|today|tomorrow|"
+    r"tonight|week|(my|our) (farm|field|crop|soil|land|plot)\w*)\b"
+)
+
+
+# Words that make a query refer back to the conversation so far
+_FOLLOW_UP_RE = re.compile(
+    r"\b(yes|yeah|no|nope|ok|okay|sure|please|thanks|thank|it|its|this|that|these|those|"
+    r"them|they|more|again|same|also|else|instead|above|previous|earlier|other|another)\b"
+)
+
+# Queries with fewer normalized words than this are too short to stand on their own
+_MIN_QUERY_WORDS = 2
+
+# {key} and optional {key?} session state placeholders in an agent instruction
+_PLACEHOLDER_RE = re.compile(r"\{(\w+)\??\}")
+
+
+def normalize_query(query):
+    """Canonical cache key text: lowercase, filler words dropped, plurals folded."""
+    return " ".join(route_tokens(query))
+
+
+def is_state_dependent(query):
+    """True when the answer to a query may depend on the user's session state."""
+    return bool(_STATE_DEPENDENT_RE.search((query or "").lower()))
+
+
+def is_follow_up(query):
+    """True for short or contextual queries whose answer depends on the conversation."""
+    return len(route_tokens(query)) < _MIN_QUERY_WORDS or bool(
+        _FOLLOW_UP_RE.search((query or "").lower())
+    )
+
+
+def instruction_state_keys(root_agent, agent_names=SHAREABLE_AGENTS):
+    """Session state keys templated into the root agent's and the named agents' instructions.
+
+    Args:
+        root_agent: Root of the agent tree
+        agent_names (frozenset): Names of the agents below the root to include
+
+    Returns:
+        tuple: Sorted state keys
+    """
+    keys, pending = set(), [root_agent]
+    while pending:
+        agent = pending.pop()
+        instruction = getattr(agent, "instruction", None)
+        if isinstance(instruction, str) and (agent is root_agent or agent.name in agent_names):
+            keys.update(_PLACEHOLDER_RE.findall(instruction))
+        pending.extend(getattr(agent, "sub_agents", None) or [])
+    return tuple(sorted(keys))
+
+
+class _Scope:
+    """Answers for one sharing scope, with a fixed-size matrix of query vectors."""
+
+    def __init__(self, maxsize, dim):
+        self.maxsize = maxsize
+        # (state tag, normalized query) -> (slot, expires_at, agent_name, answer), in LRU order
+        self.entries = OrderedDict()
+        self.vectors = np.zeros((maxsize, dim), dtype=np.float32)
+        self.slot_keys = [None] * maxsize
+        self.free_slots = list(range(maxsize - 1, -1, -1))
+
+    def _drop(self, key):
+        slot = self.entries.pop(key)[0]
+        self.vectors[slot] = 0.0
+        self.slot_keys[slot] = None
+        self.free_slots.append(slot)
+
+    def get(self, key, vector, threshold, now):
+        """Return (agent_name, answer, similarity) for the best live match, or None.
+
+        key is (state tag, normalized query); semantic matches only come from
+        entries with the same state tag. similarity is None for an exact match
+        on the normalized query.
+        """
+        entry = self.entries.get(key)
+        if entry is None and len(self.entries) and vector.any():
+            scores = self.vectors @ vector
+            above = np.flatnonzero(scores >= threshold)
+            for slot in above[np.argsort(-scores[above])].tolist():
+                slot_key = self.slot_keys[slot]
+                if slot_key is not None and slot_key[0] == key[0]:
+                    key = slot_key
+                    entry = self.entries[key]
+                    similarity = float(scores[slot])
+                    break
+            else:
+                return None
+        elif entry is None:
+            return None
+        else:
+            similarity = None
+
+        if entry[1] <= now:
+            self._drop(key)
+            return None
+        self.entries.move_to_end(key)
+        return entry[2], entry[3], similarity
+
+    def put(self, key, vector, agent_name, answer, expires_at):
+        """Store an answer, evicting the least recently used entry when full.
+
+        Returns:
+            int: Number of entries evicted
+        """
+        evicted = 0
+        if key in self.entries:
+            self._drop(key)
+        elif not self.free_slots:
+            self._drop(next(iter(self.entries)))
+            evicted = 1
+        slot = self.free_slots.pop()
+        self.vectors[slot] = vector
+        self.slot_keys[slot] = key
+        self.entries[key] = (slot, expires_at, agent_name, answer)
+        return evicted
+
+
+class SemanticAnswerCache:
+    """Answer cache matched by normalized text or embedding similarity."""
+
+    def __init__(
+        self,
+        ttl=3600,
+        session_ttl=300,
+        threshold=0.85,
+        maxsize=2048,
+        session_maxsize=16,
+        max_sessions=4096,
+        shareable_agents=SHAREABLE_AGENTS,
+        shared_state_keys=(),
+        dim=EMBEDDING_DIM,
+    ):
+        """
+        Args:
+            ttl (float): Seconds a shared answer stays valid
+            session_ttl (float): Seconds a per-session answer stays valid
+            threshold (float): Minimum cosine similarity for a semantic hit
+            maxsize (int): Shared answers kept per app before LRU eviction
+            session_maxsize (int): Answers kept per session
+            max_sessions (int): Sessions with cached answers before LRU eviction
+            shareable_agents (frozenset): Agents whose answers may be shared
+            shared_state_keys (tuple): Session state keys the agent instructions template
+                in (see instruction_state_keys); entries only match sessions with the
+                same values, and nothing is shared when the caller gives no state
+            dim (int): Embedding dimensions
+        """
+        self.ttl = ttl
+        self.session_ttl = session_ttl
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.session_maxsize = session_maxsize
+        self.max_sessions = max_sessions
+        self.shareable_agents = shareable_agents
+        self.shared_state_keys = tuple(shared_state_keys)
+        self.dim = dim
+        # app_name -> shared scope
+        self._shared = {}
+        # (app_name, user_id, session_id) -> per-session scope, in LRU order
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.skipped = 0
+        self.evictions = 0
+
+    def _encode(self, query, state):
+        """(state tag, normalized query) key and embedding, or (None, None) for uncacheable queries."""
+        text = normalize_query(query)
+        if not text or is_follow_up(query):
+            return None, None
+        return (self._state_tag(state), text), embed_text(text, self.dim)
+
+    def _state_tag(self, state):
+        if not self.shared_state_keys or state is None:
+            return None
+        return json.dumps([state.get(k) for k in self.shared_state_keys], default=str)
+
+    def _shareable(self, query, state):
+        return not is_state_dependent(query) and (state is not None or not self.shared_state_keys)
+
+    def get(self, app_name, user_id, session_id, query, state=None):
+        """Look up a cached answer for a query.
+
+        The user's own session scope is checked first; the shared scope is only
+        consulted for queries that do not depend on session state.
+
+        Args:
+            state (dict, optional): The session's state, needed to match shared
+                answers when shared_state_keys is set
+
+        Returns:
+            tuple: (agent_name, answer) on a hit, otherwise None
+        """
+        key, vector = self._encode(query, state)
+        if key is None:
+            with self._lock:
+                self.skipped += 1
+            return None
+        session_key = (app_name, user_id, session_id)
+        shareable = self._shareable(query, state)
+
+        now = time.monotonic()
+        with self._lock:
+            scopes = [self._sessions.get(session_key)]
+            if shareable:
+                scopes.append(self._shared.get(app_name))
+            for scope in scopes:
+                if scope is None:
+                    continue
+                found = scope.get(key, vector, self.threshold, now)
+                if found is not None:
+                    agent_name, answer, similarity = found
+                    if similarity is None:
+                        self.exact_hits += 1
+                    else:
+                        self.semantic_hits += 1
+                    if session_key in self._sessions:
+                        self._sessions.move_to_end(session_key)
+                    return agent_name, answer
+            self.misses += 1
+        return None
+
+    def put(self, app_name, user_id, session_id, query, agent_name, answer, state=None):
+        """Cache a final answer in the widest scope it is safe to share in.
+
+        state is the session state the answer was produced with (see get).
+        """
+        if not answer:
+            return
+        key, vector = self._encode(query, state)
+        if key is None:
+            return
+        shared = agent_name in self.shareable_agents and self._shareable(query, state)
+
+        with self._lock:
+            if shared:
+                scope = self._shared.get(app_name)
+                if scope is None:
+                    scope = self._shared[app_name] = _Scope(self.maxsize, self.dim)
+                expires_at = time.monotonic() + self.ttl
+            else:
+                session_key = (app_name, user_id, session_id)
+                scope = self._sessions.get(session_key)
+                if scope is None:
+                    scope = self._sessions[session_key] = _Scope(self.session_maxsize, self.dim)
+                    while len(self._sessions) > self.max_sessions:
+                        dropped = self._sessions.popitem(last=False)[1]
+                        self.evictions += len(dropped.entries)
+                self._sessions.move_to_end(session_key)
+                expires_at = time.monotonic() + self.session_ttl
+            self.evictions += scope.put(key, vector, agent_name, answer, expires_at)
+
+    def clear(self):
+        """Drop every cached answer (counters are kept)."""
+        with self._lock:
+            self._shared.clear()
+            self._sessions.clear()
+
+    def stats(self):
+        """Return hit/miss counters and the current size."""
+        with self._lock:
+            hits = self.exact_hits + self.semantic_hits
+            lookups = hits + self.misses
+            return {
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "skipped": self.skipped,
+                "evictions": self.evictions,
+                "shared_entries": sum(len(s.entries) for s in self._shared.values()),
+                "session_scopes": len(self._sessions),
+                "threshold": self.threshold,
+                "ttl_seconds": self.ttl,
+                "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            }
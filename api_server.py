@@ -1,7 +1,12 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field, field_validator
 from typing import Optional, Dict, Any, List
 import asyncio
+import json
+import logging
+import os
+import time
 from datetime import datetime
 import uuid
 
@@ -11,18 +16,35 @@ from dotenv import load_dotenv
 
 # Import mock Google ADK for development/testing
 try:
-    from google.adk.runners import Runner
     from google.adk.sessions import DatabaseSessionService
 except ImportError:
     print("Google ADK not found, using mock implementation...")
     import mock_google_adk
-    from google.adk.runners import Runner
     from google.adk.sessions import DatabaseSessionService
 
-from utils import add_user_query_to_history, call_agent_async, get_most_recent_session_id
+from answer_cache import SemanticAnswerCache, instruction_state_keys
+from async_session_service import AsyncSessionService
+from history_store import InteractionHistoryStore
+from logging_config import configure_logging, shutdown_logging
+from metrics import CONTENT_TYPE, ServiceMetrics
+from router import QueryRouter
+from runner_pool import RunnerPool
+from sqlite_session_service import SQLiteSessionService
+from tools.price_ledger import close_price_ledger
+from tools.tool_cache import tool_cache_stats
+from tracing import Tracer, span
+from utils import (
+    add_user_query_to_history,
+    call_agent_async,
+    get_most_recent_session_id,
+    run_agent_query,
+    stream_agent_events,
+)
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # FastAPI app
 app = FastAPI(
     title="Agricultural Multi-Agent API",
@@ -31,8 +53,64 @@ app = FastAPI(
 )
 
 # Global session service - Using SQLite database for persistent storage
-db_url = "sqlite:///./agricultural_agent_sessions.db"
-session_service = DatabaseSessionService(db_url=db_url)
+SESSION_IO_WORKERS = int(os.getenv("SESSION_IO_WORKERS", "8"))
+db_path = "./agricultural_agent_sessions.db"
+# DatabaseSessionService stays the default so existing sessions keep loading;
+# SESSION_BACKEND=sqlite opts in to the faster backend (its tables start empty)
+if os.getenv("SESSION_BACKEND", "adk").lower() == "sqlite":
+    # WAL-mode SQLite with one pooled connection per session I/O worker
+    session_service = SQLiteSessionService(
+        db_path=db_path,
+        pool_size=SESSION_IO_WORKERS,
+        busy_timeout_ms=int(os.getenv("SESSION_BUSY_TIMEOUT_MS", "5000")),
+    )
+else:
+    session_service = DatabaseSessionService(db_url=f"sqlite:///{db_path}")
+
+# Append-only interaction history, kept out of session state so each turn is one insert
+history_store = InteractionHistoryStore(db_path=db_path)
+
+# Runners are stateless across requests, so one per app_name is shared process-wide
+runner_pool = RunnerPool(agent=root_agent, session_service=session_service)
+
+# Awaitable facade so handlers never block the event loop on SQLite I/O
+async_session_service = AsyncSessionService(
+    session_service,
+    history_store,
+    max_workers=SESSION_IO_WORKERS,
+)
+
+# Per-request latency traces, served at /debug/trace/{request_id}
+tracer = Tracer(
+    max_traces=int(os.getenv("TRACE_BUFFER_SIZE", "500")),
+    enabled=os.getenv("TRACING_ENABLED", "true").lower() == "true",
+)
+
+# Aggregate request/agent/tool/session store metrics, served at /metrics
+service_metrics = ServiceMetrics()
+tracer.add_listener(service_metrics.observe_span)
+
+# Deterministic pre-router: clear-cut queries go straight to a specialist agent
+FAST_PATH_ROUTING = os.getenv("FAST_PATH_ROUTING", "true").lower() == "true"
+query_router = QueryRouter(
+    root_agent,
+    min_confidence=float(os.getenv("ROUTER_MIN_CONFIDENCE", "0.7")),
+    min_score=float(os.getenv("ROUTER_MIN_SCORE", "3.0")),
+)
+
+# Answers to repeated FAQ-style questions, shared only between sessions with the same templated state
+answer_cache = (
+    SemanticAnswerCache(
+        ttl=float(os.getenv("ANSWER_CACHE_TTL", "3600")),
+        threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.85")),
+        shared_state_keys=instruction_state_keys(root_agent),
+    )
+    if os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    else None
+)
+
+# Default number of sessions a batch query runs through the agent at once
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "16"))
 
 # ===== PYDANTIC MODELS =====
 
@@ -96,6 +174,29 @@ class AgentQueryResponse(BaseModel):
     status: str
     timestamp: str
 
+class BatchQueryRequest(BaseModel):
+    """Request model for a batch of agent queries"""
+    items: List[AgentQueryRequest] = Field(..., min_length=1, max_length=500, description="Queries to run")
+    max_concurrency: Optional[int] = Field(None, ge=1, le=128, description="Sessions processed at once (defaults to BATCH_MAX_CONCURRENCY)")
+
+class BatchQueryItemResult(BaseModel):
+    """Result for one item of a batch query"""
+    index: int
+    user_id: str
+    session_id: Optional[str]
+    query: str
+    agent_response: Optional[str]
+    status: str
+    error: Optional[str] = None
+
+class BatchQueryResponse(BaseModel):
+    """Response model for a batch of agent queries"""
+    results: List[BatchQueryItemResult]
+    total: int
+    succeeded: int
+    failed: int
+    timestamp: str
+
 class SessionStateResponse(BaseModel):
     """Response model for session state retrieval"""
     session_id: str
@@ -116,6 +217,149 @@ def get_current_timestamp() -> str:
     """Get current timestamp as string"""
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def resolve_session_id(user_id: str, session_id: Optional[str]) -> str:
+    """Return the session to use for a query, raising 404 if it does not exist"""
+    session_id_to_use = session_id
+    
+    # If no session_id provided, try to get the most recent one
+    if not session_id_to_use:
+        session_id_to_use = await get_most_recent_session_id(
+            async_session_service, 
+            "Agricultural Support", 
+            user_id
+        )
+        
+        if not session_id_to_use:
+            raise HTTPException(
+                status_code=404,
+                detail=f"No sessions found for user_id: {user_id}. Please create a session first."
+            )
+    
+    # Verify session exists (reads only the hot state row)
+    state = await async_session_service.get_session_state(
+        app_name="Agricultural Support",  # Default app name
+        user_id=user_id,
+        session_id=session_id_to_use
+    )
+    if state is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Session not found for user_id: {user_id}, session_id: {session_id_to_use}"
+        )
+    
+    return session_id_to_use
+
+def select_runner(query: str):
+    """Return the runner for a query: a specialist on a confident fast-path match, else the root agent"""
+    if FAST_PATH_ROUTING:
+        with span("route_query", "router") as route_span:
+            decision = query_router.route(query)
+            if route_span is not None:
+                route_span.attrs.update(decision.to_dict())
+        if decision.fast_path:
+            return runner_pool.get("Agricultural Support", decision.agent)
+    return runner_pool.get("Agricultural Support")
+
+def collect_cache_metrics():
+    """Scrape-time metric families for the tool cache, answer cache and fast-path router"""
+    tool_stats = tool_cache_stats()
+    families = [
+        ("agri_tool_cache_hits_total", "counter", "Tool result cache hits",
+         [({"tool": name}, stats["hits"]) for name, stats in tool_stats.items()]),
+        ("agri_tool_cache_misses_total", "counter", "Tool result cache misses",
+         [({"tool": name}, stats["misses"]) for name, stats in tool_stats.items()]),
+        ("agri_tool_cache_hit_ratio", "gauge", "Tool result cache hit ratio",
+         [({"tool": name}, stats["hit_ratio"]) for name, stats in tool_stats.items()]),
+    ]
+    if answer_cache is not None:
+        answer_stats = answer_cache.stats()
+        families += [
+            ("agri_answer_cache_hits_total", "counter", "Answer cache hits by match kind",
+             [({"kind": "exact"}, answer_stats["exact_hits"]), ({"kind": "semantic"}, answer_stats["semantic_hits"])]),
+            ("agri_answer_cache_misses_total", "counter", "Answer cache misses",
+             [({}, answer_stats["misses"])]),
+            ("agri_answer_cache_hit_ratio", "gauge", "Answer cache hit ratio",
+             [({}, answer_stats["hit_ratio"])]),
+        ]
+    router_stats = query_router.stats()
+    families += [
+        ("agri_router_fast_path_total", "counter", "Queries routed straight to a specialist agent",
+         [({"agent": name}, count) for name, count in router_stats["fast_path_by_agent"].items()]),
+        ("agri_router_fallback_total", "counter", "Queries left to the LLM root agent",
+         [({"reason": reason}, count) for reason, count in router_stats["fallback_reasons"].items()]),
+        ("agri_router_hit_ratio", "gauge", "Share of queries served by the fast path",
+         [({}, router_stats["hit_rate"])]),
+    ]
+    return families
+
+service_metrics.registry.register_collector(collect_cache_metrics)
+
+# ===== LIFECYCLE =====
+
+# Background writer for queued log records, started with the app
+log_listener = None
+
+@app.on_event("startup")
+async def start_logging():
+    """Send log records through a queue so handlers never block on output"""
+    global log_listener
+    log_listener = configure_logging()
+
+@app.on_event("startup")
+async def warm_up_runners():
+    """Build the root and fast-path runners before the first request arrives"""
+    runner_pool.warm_up("Agricultural Support", agents=root_agent.sub_agents)
+
+@app.on_event("shutdown")
+async def shutdown_session_io():
+    """Drain pending session store calls, commit buffered ledger blocks and flush queued log records"""
+    async_session_service.shutdown()
+    if hasattr(session_service, "close"):
+        session_service.close()
+    close_price_ledger()
+    shutdown_logging(log_listener)
+
+# ===== MIDDLEWARE =====
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Record a trace for every request and return its ID in the X-Request-ID header"""
+    if request.url.path.startswith("/debug/") or request.url.path == "/metrics":
+        return await call_next(request)
+    
+    trace, token = tracer.start_trace(request.headers.get("X-Request-ID"))
+    try:
+        with span(f"{request.method} {request.url.path}", "route"):
+            response = await call_next(request)
+    finally:
+        tracer.end_trace(token)
+    
+    if trace is not None:
+        response.headers["X-Request-ID"] = trace.request_id
+    return response
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Count requests and errors and time them per route template"""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        service_metrics.observe_request(
+            request.method,
+            route.path if route is not None else "unmatched",
+            status,
+            time.perf_counter() - start
+        )
+
 # ===== API ENDPOINTS =====
 
 @app.get("/", tags=["Health"])
@@ -140,7 +384,7 @@ async def create_session(request: CreateSessionRequest):
         initial_state_dict = request.initial_state.dict()
         
         # Create a new session
-        new_session = session_service.create_session(
+        new_session = await async_session_service.create_session(
             app_name=request.app_name,
             user_id=request.user_id,
             state=initial_state_dict,
@@ -165,56 +409,25 @@ async def query_agent(request: AgentQueryRequest):
     """
     Send a query to the agricultural agent and get a response
     
-    This endpoint creates a runner, processes the user query through the agricultural
+    This endpoint uses the shared runner, processes the user query through the agricultural
     multi-agent system, and returns the agent's response. If no session_id is provided,
     it will automatically use the most recent session for the user.
     """
     try:
-        # Determine which session to use
-        session_id_to_use = request.session_id
-        
-        # If no session_id provided, try to get the most recent one
-        if not session_id_to_use:
-            session_id_to_use = get_most_recent_session_id(
-                session_service, 
-                "Agricultural Support", 
-                request.user_id
-            )
-            
-            if not session_id_to_use:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"No sessions found for user_id: {request.user_id}. Please create a session first."
-                )
-        
-        # Verify session exists
-        try:
-            session = session_service.get_session(
-                app_name="Agricultural Support",  # Default app name
-                user_id=request.user_id,
-                session_id=session_id_to_use
-            )
-        except Exception:
-            raise HTTPException(
-                status_code=404,
-                detail=f"Session not found for user_id: {request.user_id}, session_id: {session_id_to_use}"
-            )
+        # Determine which session to use (most recent one if not provided)
+        session_id_to_use = await resolve_session_id(request.user_id, request.session_id)
         
         # Add user query to interaction history
-        add_user_query_to_history(
-            session_service, 
+        await add_user_query_to_history(
+            async_session_service, 
             "Agricultural Support", 
             request.user_id, 
             session_id_to_use, 
             request.query
         )
         
-        # Create runner with the agricultural agent
-        runner = Runner(
-            agent=root_agent,
-            app_name="Agricultural Support",
-            session_service=session_service,
-        )
+        # Reuse the shared runner, skipping the LLM router when the query is clear-cut
+        runner = select_runner(request.query)
         
         # Process the query through the agent
         try:
@@ -222,10 +435,12 @@ async def query_agent(request: AgentQueryRequest):
                 runner, 
                 request.user_id, 
                 session_id_to_use, 
-                request.query
+                request.query,
+                async_session_service,
+                answer_cache=answer_cache
             )
         except Exception as agent_error:
-            print(f"ERROR in agent processing: {agent_error}")
+            logger.error("Agent processing error: %s", agent_error)
             # Still return success but with error info in response
             return AgentQueryResponse(
                 session_id=session_id_to_use,
@@ -253,40 +468,281 @@ async def query_agent(request: AgentQueryRequest):
             detail=f"Failed to process agent query: {str(e)}"
         )
 
+@app.post("/agent/query/stream", tags=["Agent Interaction"])
+async def query_agent_stream(request: AgentQueryRequest):
+    """
+    Send a query to the agricultural agent and stream its events
+    
+    Same as /agent/query, but responds with Server-Sent Events as soon as the
+    runner produces them, so clients see the first sub-agent's output without
+    waiting for the whole pipeline. Each `agent_event` carries the author,
+    text, partial flag and final marker; the stream ends with `done` (or
+    `error` if the agent fails).
+    """
+    try:
+        session_id_to_use = await resolve_session_id(request.user_id, request.session_id)
+        
+        await add_user_query_to_history(
+            async_session_service, 
+            "Agricultural Support", 
+            request.user_id, 
+            session_id_to_use, 
+            request.query
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to process agent query: {str(e)}"
+        )
+    
+    runner = select_runner(request.query)
+    
+    async def event_stream():
+        final_response = None
+        try:
+            async for payload in stream_agent_events(
+                runner,
+                request.user_id,
+                session_id_to_use,
+                request.query,
+                async_session_service
+            ):
+                if payload["is_final"] and payload["text"]:
+                    final_response = payload["text"].strip()
+                yield format_sse("agent_event", payload)
+        except Exception as agent_error:
+            logger.error("Agent processing error: %s", agent_error)
+            yield format_sse("error", {
+                "session_id": session_id_to_use,
+                "detail": f"Agent processing error: {str(agent_error)}",
+                "timestamp": get_current_timestamp()
+            })
+            return
+        
+        yield format_sse("done", {
+            "session_id": session_id_to_use,
+            "user_id": request.user_id,
+            "agent_response": final_response,
+            "status": "success",
+            "timestamp": get_current_timestamp()
+        })
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/agent/query/batch", response_model=BatchQueryResponse, tags=["Agent Interaction"])
+async def query_agent_batch(request: BatchQueryRequest):
+    """
+    Send several queries to the agricultural agent in one request
+    
+    Each (user_id, session_id) pair is resolved once, and the user queries and agent
+    responses of the whole batch are each written to the interaction history in a
+    single transaction. Queries for the same session run in order; different sessions
+    run concurrently, at most max_concurrency at a time. A failing item is reported in
+    its own result and never aborts the rest of the batch.
+    """
+    items = request.items
+    results: List[Optional[BatchQueryItemResult]] = [None] * len(items)
+
+    def fail(index: int, session_id: Optional[str], error: str):
+        results[index] = BatchQueryItemResult(
+            index=index,
+            user_id=items[index].user_id,
+            session_id=session_id,
+            query=items[index].query,
+            agent_response=None,
+            status="error",
+            error=error
+        )
+
+    # Resolve every distinct (user_id, session_id) pair once
+    keys = list(dict.fromkeys((item.user_id, item.session_id) for item in items))
+    resolved = await asyncio.gather(
+        *(resolve_session_id(user_id, session_id) for user_id, session_id in keys),
+        return_exceptions=True
+    )
+    resolved_by_key = dict(zip(keys, resolved))
+
+    # Queries grouped by session, in request order
+    sessions: Dict[tuple, List[int]] = {}
+    for index, item in enumerate(items):
+        outcome = resolved_by_key[(item.user_id, item.session_id)]
+        if isinstance(outcome, HTTPException):
+            fail(index, item.session_id, outcome.detail)
+        elif isinstance(outcome, Exception):
+            fail(index, item.session_id, f"Failed to resolve session: {str(outcome)}")
+        else:
+            sessions.setdefault((item.user_id, outcome), []).append(index)
+
+    runnable = [index for indexes in sessions.values() for index in indexes]
+    if runnable:
+        try:
+            await async_session_service.append_history_many(
+                ("Agricultural Support", items[i].user_id, session_id, {"action": "user_query", "query": items[i].query})
+                for (_, session_id), indexes in sessions.items()
+                for i in indexes
+            )
+        except Exception as e:
+            # Without the recorded queries these items cannot run; the batch still answers
+            logger.exception("Failed to record batch queries")
+            for (_, session_id), indexes in sessions.items():
+                for index in indexes:
+                    fail(index, session_id, f"Failed to record query: {str(e)}")
+            sessions = {}
+
+    semaphore = asyncio.Semaphore(request.max_concurrency or BATCH_MAX_CONCURRENCY)
+    responses: List[tuple] = []
+
+    async def run_session(user_id: str, session_id: str, indexes: List[int]):
+        async with semaphore:
+            for index in indexes:
+                try:
+                    agent_name, agent_response = await run_agent_query(
+                        select_runner(items[index].query), user_id, session_id, items[index].query,
+                        answer_cache=answer_cache, session_service=async_session_service
+                    )
+                except Exception as agent_error:
+                    logger.error("Agent processing error: %s", agent_error)
+                    fail(index, session_id, f"Agent processing error: {str(agent_error)}")
+                    continue
+                # Like the single-query path, only complete answers are recorded
+                if agent_name and agent_response:
+                    responses.append((session_id, user_id, agent_name, agent_response))
+                results[index] = BatchQueryItemResult(
+                    index=index,
+                    user_id=user_id,
+                    session_id=session_id,
+                    query=items[index].query,
+                    agent_response=agent_response,
+                    status="success"
+                )
+
+    await asyncio.gather(
+        *(run_session(user_id, session_id, indexes) for (user_id, session_id), indexes in sessions.items())
+    )
+
+    if responses:
+        try:
+            await async_session_service.append_history_many(
+                ("Agricultural Support", user_id, session_id, {"action": "agent_response", "agent": agent_name, "response": response})
+                for session_id, user_id, agent_name, response in responses
+            )
+        except Exception:
+            # The answers were produced, so return them even if recording them failed
+            logger.exception("Failed to record batch responses")
+
+    succeeded = sum(1 for result in results if result.status == "success")
+    return BatchQueryResponse(
+        results=results,
+        total=len(results),
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        timestamp=get_current_timestamp()
+    )
+
+@app.get("/router/stats", tags=["Monitoring"])
+async def router_stats():
+    """Fast-path routing decisions and hit rate since startup"""
+    return {
+        "enabled": FAST_PATH_ROUTING,
+        **query_router.stats(),
+        "timestamp": get_current_timestamp()
+    }
+
+@app.get("/cache/stats", tags=["Monitoring"])
+async def cache_stats():
+    """Answer cache and tool result cache counters since startup"""
+    return {
+        "answer_cache": answer_cache.stats() if answer_cache else None,
+        "tool_cache": tool_cache_stats(),
+        "timestamp": get_current_timestamp()
+    }
+
+@app.get("/metrics", tags=["Monitoring"])
+async def metrics():
+    """Prometheus metrics: per-route, per-agent, per-tool and session store latencies, cache hit ratios"""
+    return PlainTextResponse(service_metrics.render(), media_type=CONTENT_TYPE)
+
+@app.get("/debug/trace/{request_id}", tags=["Monitoring"])
+async def get_trace(request_id: str, format: str = "json"):
+    """
+    Latency trace of a recent request
+    
+    Spans cover the route, session store calls, routing, cache lookups, the runner,
+    each runner event, each sub-agent and each tool call. Use format=chrome to
+    download a Chrome trace-format file (chrome://tracing or ui.perfetto.dev).
+    """
+    trace = tracer.get(request_id)
+    if trace is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No trace recorded for request_id: {request_id}"
+        )
+    
+    if format == "chrome":
+        return JSONResponse(
+            trace.to_chrome(),
+            headers={"Content-Disposition": f'attachment; filename="trace-{request_id}.json"'}
+        )
+    return trace.to_dict()
+
 @app.get("/session/{user_id}/{session_id}", response_model=SessionStateResponse, tags=["Session Management"])
-async def get_session(user_id: str, session_id: str, app_name: str = "Agricultural Support"):
+async def get_session(
+    user_id: str,
+    session_id: str,
+    app_name: str = "Agricultural Support",
+    history_offset: int = 0,
+    history_limit: Optional[int] = None,
+    include_history: bool = True,
+):
     """
     Retrieve session state and interaction history
     
     This endpoint retrieves the current state of a session including the user's
-    agricultural context and complete interaction history.
+    agricultural context and interaction history. History can be paged with
+    history_offset (first sequence number) and history_limit, or skipped with
+    include_history=false.
     """
     try:
-        # Get the session
-        session = session_service.get_session(
+        # Hot state only: neither session events nor history are deserialized here
+        state = await async_session_service.get_session_state(
             app_name=app_name,
             user_id=user_id,
             session_id=session_id
         )
+        if state is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Session not found: {session_id}"
+            )
         
-        # Extract interaction history from state
-        interaction_history = session.state.get("interaction_history", [])
-        
-        # Create a clean state dict without interaction_history for the response
-        clean_state = {k: v for k, v in session.state.items() if k != "interaction_history"}
+        # Interaction history is cold data, read from the append-only store on request
+        interaction_history = []
+        if include_history:
+            interaction_history = await async_session_service.read_history(
+                app_name, user_id, session_id, offset=history_offset, limit=history_limit
+            )
         
         return SessionStateResponse(
             session_id=session_id,
             app_name=app_name,
             user_id=user_id,
-            state=clean_state,
+            state=state,
             interaction_history=interaction_history
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
+        logger.exception("Failed to read session %s", session_id)
         raise HTTPException(
-            status_code=404,
-            detail=f"Session not found: {str(e)}"
+            status_code=500,
+            detail=f"Failed to read session: {str(e)}"
         )
 
 @app.get("/sessions/{user_id}", tags=["Session Management"])
@@ -298,7 +754,7 @@ async def list_user_sessions(user_id: str, app_name: str = "Agricultural Support
     """
     try:
         # List all sessions for the user
-        existing_sessions = session_service.list_sessions(
+        existing_sessions = await async_session_service.list_sessions(
             app_name=app_name,
             user_id=user_id,
         )
@@ -310,7 +766,8 @@ async def list_user_sessions(user_id: str, app_name: str = "Agricultural Support
                 session_info = {
                     "session_id": session.id,
                     "created_at": getattr(session, 'created_at', 'Unknown'),
-                    "last_modified": getattr(session, 'updated_at', 'Unknown')
+                    "last_modified": getattr(session, 'updated_at', None)
+                    or getattr(session, 'last_update_time', 'Unknown')
                 }
                 session_list.append(session_info)
         
@@ -336,27 +793,28 @@ async def delete_session(user_id: str, session_id: str, app_name: str = "Agricul
     """
     try:
         # Check if session exists first
-        try:
-            session_service.get_session(
-                app_name=app_name,
-                user_id=user_id,
-                session_id=session_id
-            )
-        except Exception:
+        state = await async_session_service.get_session_state(
+            app_name=app_name,
+            user_id=user_id,
+            session_id=session_id
+        )
+        if state is None:
             raise HTTPException(
                 status_code=404,
                 detail=f"Session not found: {session_id}"
             )
         
-        # Delete the session (Note: DatabaseSessionService may or may not have direct delete)
-        # This is a limitation - most session services don't have explicit delete methods
-        # Sessions typically expire naturally or are cleaned up by the service
+        # Removes the session, its events and its interaction history
+        await async_session_service.delete_session(
+            app_name=app_name,
+            user_id=user_id,
+            session_id=session_id
+        )
         
         return {
-            "message": "Session deletion requested successfully",
+            "message": "Session deleted successfully",
             "session_id": session_id,
-            "user_id": user_id,
-            "note": "Session data will be cleaned up by the database service. In production, consider implementing session expiration policies."
+            "user_id": user_id
         }
     except HTTPException:
         raise
@@ -0,0 +1,187 @@
+"""
+Async adapter for the synchronous session and history stores.
+
+The session services and InteractionHistoryStore do blocking SQLite I/O. Calling
+them directly from ``async def`` FastAPI handlers stalls the event loop for every
+concurrent request, so this adapter runs them on a small, bounded thread pool
+and exposes awaitable versions of the operations the API needs.
+"""
+
+import asyncio
+import functools
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from google.genai import types
+
+from session_index import LatestSessionIndex
+from tracing import span
+
+try:
+    from google.adk.events import Event
+except ImportError:
+    # Mock ADK sessions keep no events
+    Event = None
+
+
+class AsyncSessionService:
+    """Awaitable facade over a session service and its interaction history store."""
+
+    def __init__(self, session_service, history_store, max_workers=8):
+        """
+        Args:
+            session_service: The synchronous session service (e.g. DatabaseSessionService)
+            history_store: The InteractionHistoryStore for the same database
+            max_workers: Maximum number of threads doing storage I/O at once
+        """
+        # The ADK Runner still needs the synchronous service
+        self.sync = session_service
+        self.history_store = history_store
+        self.latest_index = LatestSessionIndex()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="session-io"
+        )
+
+    async def run(self, fn, *args, **kwargs):
+        """Run a blocking callable on the storage thread pool and await its result."""
+        loop = asyncio.get_running_loop()
+        with span(getattr(fn, "__name__", "session_io"), "session_store"):
+            return await loop.run_in_executor(
+                self._executor, functools.partial(fn, *args, **kwargs)
+            )
+
+    async def create_session(self, *, app_name, user_id, state=None, session_id=None):
+        """Create a session without blocking the event loop."""
+        kwargs = {"app_name": app_name, "user_id": user_id, "state": state}
+        if session_id is not None:
+            kwargs["session_id"] = session_id
+        session = await self.run(self.sync.create_session, **kwargs)
+        self.latest_index.touch(app_name, user_id, session.id)
+        return session
+
+    async def get_session(self, *, app_name, user_id, session_id):
+        """Fetch a session without blocking the event loop."""
+        return await self.run(
+            self.sync.get_session,
+            app_name=app_name,
+            user_id=user_id,
+            session_id=session_id,
+        )
+
+    async def get_session_state(self, *, app_name, user_id, session_id):
+        """Fetch only a session's hot state, or None if the session does not exist.
+
+        Backends with ``get_session_state`` read the state row alone; others load
+        the whole session and any legacy interaction_history is dropped from the
+        returned dict.
+        """
+        if hasattr(self.sync, "get_session_state"):
+            return await self.run(
+                self.sync.get_session_state,
+                app_name=app_name,
+                user_id=user_id,
+                session_id=session_id,
+            )
+        try:
+            session = await self.get_session(
+                app_name=app_name, user_id=user_id, session_id=session_id
+            )
+        except LookupError:
+            # The mock service raises for unknown sessions instead of returning None;
+            # other failures are backend errors and must not look like a missing session
+            return None
+        if session is None:
+            return None
+        return {k: v for k, v in session.state.items() if k != "interaction_history"}
+
+    async def list_sessions(self, *, app_name, user_id):
+        """List a user's sessions without blocking the event loop."""
+        return await self.run(
+            self.sync.list_sessions, app_name=app_name, user_id=user_id
+        )
+
+    async def delete_session(self, *, app_name, user_id, session_id):
+        """Delete a session and its interaction history without blocking the event loop."""
+        await self.run(
+            self.sync.delete_session,
+            app_name=app_name,
+            user_id=user_id,
+            session_id=session_id,
+        )
+        await self.run(self.history_store.delete, app_name, user_id, session_id)
+        self.latest_index.remove(app_name, user_id, session_id)
+
+    async def latest_session_id(self, *, app_name, user_id):
+        """Return the user's most recently active session ID, or None.
+
+        Served from the in-memory index; a user not seen since startup is seeded
+        once from list_sessions.
+        """
+        if not self.latest_index.is_known(app_name, user_id):
+            existing_sessions = await self.list_sessions(
+                app_name=app_name, user_id=user_id
+            )
+            if existing_sessions:
+                self.latest_index.seed(app_name, user_id, existing_sessions.sessions)
+        return self.latest_index.latest(app_name, user_id)
+
+    async def record_turn(self, *, app_name, user_id, session_id, query, author, response):
+        """Append a user message and an agent reply to a session's events.
+
+        For answers served without running the agent (e.g. from the answer
+        cache), so the conversation the agent sees on the next turn still holds
+        this one. Does nothing on backends without session events.
+        """
+        if Event is None or not hasattr(self.sync, "append_event"):
+            return
+        invocation_id = f"e-{uuid.uuid4()}"
+        events = [
+            Event(
+                invocation_id=invocation_id,
+                author="user",
+                content=types.Content(role="user", parts=[types.Part(text=query)]),
+            ),
+            Event(
+                invocation_id=invocation_id,
+                author=author,
+                content=types.Content(role="model", parts=[types.Part(text=response)]),
+            ),
+        ]
+        await self.run(self._append_events, app_name, user_id, session_id, events)
+        self.latest_index.touch(app_name, user_id, session_id)
+
+    def _append_events(self, app_name, user_id, session_id, events):
+        session = self.sync.get_session(app_name=app_name, user_id=user_id, session_id=session_id)
+        for event in events:
+            self.sync.append_event(session, event)
+
+    async def append_history(self, app_name, user_id, session_id, entry):
+        """Append an interaction history entry without blocking the event loop."""
+        seq = await self.run(
+            self.history_store.append, app_name, user_id, session_id, entry
+        )
+        self.latest_index.touch(app_name, user_id, session_id)
+        return seq
+
+    async def append_history_many(self, items):
+        """Append (app_name, user_id, session_id, entry) tuples in one transaction."""
+        items = list(items)
+        seqs = await self.run(self.history_store.append_many, items)
+        for app_name, user_id, session_id, _ in items:
+            self.latest_index.touch(app_name, user_id, session_id)
+        return seqs
+
+    async def read_history(self, app_name, user_id, session_id, offset=0, limit=None):
+        """Read a page of interaction history without blocking the event loop."""
+        return await self.run(
+            self.history_store.read,
+            app_name,
+            user_id,
+            session_id,
+            offset=offset,
+            limit=limit,
+        )
+
+    def shutdown(self):
+        """Wait for in-flight storage calls and release the thread pool."""
+        self._executor.shutdown(wait=True)
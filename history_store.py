@@ -0,0 +1,162 @@
+"""
+Append-only interaction history store.
+
+Interaction history used to live inside ``session.state["interaction_history"]``,
+so every turn re-serialized and re-wrote the whole conversation. This store keeps
+one row per turn in its own SQLite table keyed by
+(app_name, user_id, session_id, seq), so appending is a single insert no matter
+how long the conversation is and reads can be paged.
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+
+class InteractionHistoryStore:
+    """SQLite-backed append-only log of session interactions."""
+
+    def __init__(self, db_path="./agricultural_agent_sessions.db"):
+        """
+        Args:
+            db_path: Path to the SQLite database file (":memory:" for tests/CLI)
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        # Transactions are explicit: appends take the write lock with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS interaction_history (
+                app_name TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                session_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                timestamp TEXT NOT NULL,
+                action TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                PRIMARY KEY (app_name, user_id, session_id, seq)
+            )
+            """
+        )
+
+    def _insert(self, key, entry, payload):
+        """Insert one entry at the session's next sequence number (write transaction must be open).
+
+        The number is read from the table, not cached, so several processes (e.g.
+        uvicorn workers) sharing the database never hand out the same one; the
+        BEGIN IMMEDIATE write lock keeps the read and the insert atomic, and
+        MAX(seq) is a single seek on the primary key.
+        """
+        seq = self._conn.execute(
+            "SELECT COALESCE(MAX(seq), -1) + 1 FROM interaction_history "
+            "WHERE app_name = ? AND user_id = ? AND session_id = ?",
+            key,
+        ).fetchone()[0]
+        self._conn.execute(
+            "INSERT INTO interaction_history "
+            "(app_name, user_id, session_id, seq, timestamp, action, payload) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (*key, seq, entry["timestamp"], entry["action"], payload),
+        )
+        return seq
+
+    def append(self, app_name, user_id, session_id, entry):
+        """Append one interaction entry.
+
+        Args:
+            app_name: The application name
+            user_id: The user ID
+            session_id: The session ID
+            entry: A dictionary containing the interaction data
+                - requires 'action' key (e.g., 'user_query', 'agent_response')
+                - other keys are flexible depending on the action type
+
+        Returns:
+            int: The sequence number assigned to the entry
+        """
+        return self.append_many([(app_name, user_id, session_id, entry)])[0]
+
+    def append_many(self, items):
+        """Append several entries (possibly for different sessions) in one transaction.
+
+        Args:
+            items: Iterable of (app_name, user_id, session_id, entry) tuples
+
+        Returns:
+            list: The sequence number assigned to each entry, in input order
+        """
+        rows = []
+        for app_name, user_id, session_id, entry in items:
+            if "timestamp" not in entry:
+                entry["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            payload = json.dumps(
+                {k: v for k, v in entry.items() if k not in ("action", "timestamp")}
+            )
+            rows.append(((app_name, user_id, session_id), entry, payload))
+
+        seqs = []
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for key, entry, payload in rows:
+                    seqs.append(self._insert(key, entry, payload))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return seqs
+
+    def read(self, app_name, user_id, session_id, offset=0, limit=None):
+        """Read a page of interaction entries in append order.
+
+        Args:
+            app_name: The application name
+            user_id: The user ID
+            session_id: The session ID
+            offset: Sequence number to start from
+            limit: Maximum number of entries to return (None for all)
+
+        Returns:
+            list: Entry dictionaries with 'seq', 'action' and 'timestamp' keys
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, timestamp, action, payload FROM interaction_history "
+                "WHERE app_name = ? AND user_id = ? AND session_id = ? AND seq >= ? "
+                "ORDER BY seq LIMIT ?",
+                (app_name, user_id, session_id, offset, -1 if limit is None else limit),
+            ).fetchall()
+
+        entries = []
+        for seq, timestamp, action, payload in rows:
+            entry = {"seq": seq, "action": action, "timestamp": timestamp}
+            entry.update(json.loads(payload))
+            entries.append(entry)
+        return entries
+
+    def count(self, app_name, user_id, session_id):
+        """Return the number of entries recorded for a session."""
+        key = (app_name, user_id, session_id)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MAX(seq) FROM interaction_history "
+                "WHERE app_name = ? AND user_id = ? AND session_id = ?",
+                key,
+            ).fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    def delete(self, app_name, user_id, session_id):
+        """Delete every entry recorded for a session."""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM interaction_history "
+                "WHERE app_name = ? AND user_id = ? AND session_id = ?",
+                (app_name, user_id, session_id),
+            )
+
+    def close(self):
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,163 @@
+"""
+Structured, queued logging for the API server.
+
+Request handlers must not block on stdout. ``configure_logging`` installs a
+QueueHandler on the root logger, so a log call only formats its message and
+puts the record on an in-memory queue; a background QueueListener thread
+writes records out. Each record carries the current request ID (see
+tracing.py) and any ``extra={"fields": {...}}`` as structured fields, rendered
+as one JSON object per line (or key=value text).
+
+Per-event debug lines are marked ``extra={"sample": True}`` and only a
+fraction of them (LOG_DEBUG_SAMPLE_RATE) are kept. Callers guard them with
+``logger.isEnabledFor(logging.DEBUG)``, so with debug off they cost one cached
+level check.
+
+Console rendering with ANSI colors lives only in the main.py CLI.
+"""
+
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+from tracing import current_trace
+
+# Longest agent text included in a log line; full responses go to the history store
+MAX_LOGGED_TEXT = int(os.getenv("LOG_MAX_TEXT", "200"))
+
+# Attributes every LogRecord has; anything else came from extra=
+_RECORD_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+def truncate(text, limit=None):
+    """Shorten text for a log line, noting how much was cut."""
+    limit = MAX_LOGGED_TEXT if limit is None else limit
+    if text is None or len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [{len(text) - limit} more chars]"
+
+
+class RequestContextFilter(logging.Filter):
+    """Samples marked debug records and stamps the request ID on the caller's thread."""
+
+    def __init__(self, debug_sample_rate=1.0):
+        super().__init__()
+        self.debug_sample_rate = debug_sample_rate
+
+    def filter(self, record):
+        if getattr(record, "sample", False) and random.random() >= self.debug_sample_rate:
+            return False
+        # Must run before the record is queued: the listener thread has no request context
+        trace = current_trace()
+        record.request_id = trace.request_id if trace is not None else None
+        return True
+
+
+class _StructuredQueueHandler(QueueHandler):
+    """QueueHandler that keeps structured fields instead of pre-formatting the line."""
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+def _record_fields(record):
+    fields = {}
+    for key, value in vars(record).items():
+        if key not in _RECORD_ATTRS and key not in ("fields", "sample", "request_id"):
+            fields[key] = value
+    fields.update(getattr(record, "fields", None) or {})
+    return fields
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record):
+        payload = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created))
+            + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            payload["request_id"] = record.request_id
+        payload.update(_record_fields(record))
+        if record.exc_text:
+            payload["exc"] = record.exc_text
+        return json.dumps(payload, default=str)
+
+
+class KeyValueFormatter(logging.Formatter):
+    """Human-readable line with key=value fields."""
+
+    def format(self, record):
+        parts = [
+            self.formatTime(record, "%Y-%m-%d %H:%M:%S"),
+            record.levelname,
+            record.name,
+            record.getMessage(),
+        ]
+        if getattr(record, "request_id", None):
+            parts.append(f"request_id={record.request_id}")
+        parts.extend(f"{k}={json.dumps(v, default=str)}" for k, v in _record_fields(record).items())
+        line = " ".join(parts)
+        if record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+
+def configure_logging(level=None, fmt=None, debug_sample_rate=None, stream=None):
+    """Route the root logger through a queue to a background writer thread.
+
+    Args:
+        level (str): Log level name (default: LOG_LEVEL env var, else INFO)
+        fmt (str): "json" or "text" (default: LOG_FORMAT env var, else json)
+        debug_sample_rate (float): Share of sampled debug records kept
+            (default: LOG_DEBUG_SAMPLE_RATE env var, else 0.01)
+        stream: Output stream for the writer thread (default: stderr)
+
+    Returns:
+        QueueListener: The started listener; pass it to shutdown_logging
+    """
+    level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    fmt = (fmt or os.getenv("LOG_FORMAT", "json")).lower()
+    if debug_sample_rate is None:
+        debug_sample_rate = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.01"))
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if fmt == "json" else KeyValueFormatter())
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _StructuredQueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter(debug_sample_rate))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, _StructuredQueueHandler):
+            root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    listener = QueueListener(log_queue, output, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+def shutdown_logging(listener):
+    """Flush queued records and stop the writer thread."""
+    if listener is not None:
+        listener.stop()
@@ -5,13 +5,77 @@ from agent import agent
 from dotenv import load_dotenv
 from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
+from async_session_service import AsyncSessionService
+from history_store import InteractionHistoryStore
 from utils import add_user_query_to_history, call_agent_async
 
 load_dotenv()
 
+
+# ANSI color codes for terminal output
+class Colors:
+    RESET = "\033[0m"
+    BOLD = "\033[1m"
+    UNDERLINE = "\033[4m"
+
+    # Foreground colors
+    BLACK = "\033[30m"
+    RED = "\033[31m"
+    GREEN = "\033[32m"
+    YELLOW = "\033[33m"
+    BLUE = "\033[34m"
+    MAGENTA = "\033[35m"
+    CYAN = "\033[36m"
+    WHITE = "\033[37m"
+
+    # Background colors
+    BG_BLACK = "\033[40m"
+    BG_RED = "\033[41m"
+    BG_GREEN = "\033[42m"
+    BG_YELLOW = "\033[43m"
+    BG_BLUE = "\033[44m"
+    BG_MAGENTA = "\033[45m"
+    BG_CYAN = "\033[46m"
+    BG_WHITE = "\033[47m"
+
+
+def print_agent_event(event):
+    """Display a runner event on the console."""
+    print(f"Event ID: {event.id}, Author: {event.author}")
+
+    if event.content and event.content.parts:
+        for part in event.content.parts:
+            if hasattr(part, "text") and part.text and not part.text.isspace():
+                print(f"  Text: '{part.text.strip()}'")
+
+    if event.is_final_response() and not (
+        event.content
+        and event.content.parts
+        and hasattr(event.content.parts[0], "text")
+        and event.content.parts[0].text
+    ):
+        print(
+            f"\n{Colors.BG_RED}{Colors.WHITE}{Colors.BOLD}==> Final Agent Response: [No text content in final event]{Colors.RESET}\n"
+        )
+
+
+def print_agent_response(response):
+    """Display the final agent response so it stands out."""
+    if not response:
+        return
+    print(
+        f"\n{Colors.BG_BLUE}{Colors.WHITE}{Colors.BOLD}╔══ AGENT RESPONSE ═════════════════════════════════════════{Colors.RESET}"
+    )
+    print(f"{Colors.CYAN}{Colors.BOLD}{response}{Colors.RESET}")
+    print(
+        f"{Colors.BG_BLUE}{Colors.WHITE}{Colors.BOLD}╚═════════════════════════════════════════════════════════════{Colors.RESET}\n"
+    )
+
 # ===== PART 1: Initialize In-Memory Session Service =====
 # Using in-memory storage for this example (non-persistent)
 session_service = InMemorySessionService()
+history_store = InteractionHistoryStore(db_path=":memory:")
+async_session_service = AsyncSessionService(session_service, history_store)
 
 
 # ===== PART 2: Define Initial State =====
@@ -64,12 +128,30 @@ async def main_async():
             break
 
         # Update interaction history with the user's query
-        add_user_query_to_history(
-            session_service, APP_NAME, USER_ID, SESSION_ID, user_input
+        await add_user_query_to_history(
+            async_session_service, APP_NAME, USER_ID, SESSION_ID, user_input
         )
 
         # Process the user query through the agent
-        await call_agent_async(runner, USER_ID, SESSION_ID, user_input)
+        print(
+            f"\n{Colors.BG_GREEN}{Colors.BLACK}{Colors.BOLD}--- Running Query: {user_input} ---{Colors.RESET}"
+        )
+        try:
+            response = await call_agent_async(
+                runner,
+                USER_ID,
+                SESSION_ID,
+                user_input,
+                async_session_service,
+                on_event=print_agent_event,
+            )
+        except Exception as e:
+            print(f"{Colors.BG_RED}{Colors.WHITE}ERROR during agent run: {e}{Colors.RESET}")
+            print(f"Error type: {type(e).__name__}")
+            print(f"Error details: {str(e)}")
+        else:
+            print_agent_response(response)
+        print(f"{Colors.YELLOW}{'-' * 30}{Colors.RESET}")
 
     # ===== PART 6: State Examination =====
     # Show final session state
@@ -79,6 +161,7 @@ async def main_async():
     print("\nFinal Session State:")
     for key, value in final_session.state.items():
         print(f"{key}: {value}")
+    print(f"interaction_history: {history_store.count(APP_NAME, USER_ID, SESSION_ID)} entries")
 
 
 def main():
@@ -0,0 +1,261 @@
+"""
+Prometheus-style metrics with a lock-cheap registry.
+
+Counters and histograms keep one shard of values per thread: the hot path
+increments its own thread's dict without taking a lock, and a lock is only
+taken when a thread records its first value for a metric or when /metrics is
+scraped and the shards are summed. On the event loop thread every
+request therefore updates metrics with plain dict operations.
+
+Values that already live elsewhere (cache counters, router hit rates) are
+exported through collector callbacks that run at scrape time only.
+
+The output follows the Prometheus text exposition format 0.0.4.
+"""
+
+import bisect
+import threading
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets in seconds, from a fast tool call up to a slow multi-agent pipeline
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    pairs.extend(f'{n}="{_escape(v)}"' for n, v in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _ShardedMetric:
+    """Base class keeping one values dict per thread."""
+
+    metric_type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, "values", None)
+        if shard is None:
+            shard = self._local.values = {}
+            # Only taken once per thread; the shard outlives its thread so counts are kept
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def _snapshots(self):
+        with self._shards_lock:
+            shards = list(self._shards)
+        # dict.copy() is atomic under the GIL, so writers never need a lock
+        return [shard.copy() for shard in shards]
+
+
+class Counter(_ShardedMetric):
+    """Monotonically increasing count per label set."""
+
+    metric_type = "counter"
+
+    def inc(self, labels=(), amount=1):
+        """Add amount to the counter for a tuple of label values."""
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def values(self):
+        """Return {label values: total} summed over all threads."""
+        totals = {}
+        for snapshot in self._snapshots():
+            for labels, value in snapshot.items():
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+    def samples(self):
+        for labels, value in sorted(self.values().items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Histogram(_ShardedMetric):
+    """Bucketed distribution of observed values per label set."""
+
+    metric_type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, labels=()):
+        """Record one observation (e.g. a latency in seconds)."""
+        shard = self._shard()
+        state = shard.get(labels)
+        if state is None:
+            # [per-bucket counts (last one is +Inf), sum, count]
+            state = shard[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        state[0][bisect.bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    def values(self):
+        """Return {label values: (cumulative bucket counts, sum, count)} over all threads."""
+        totals = {}
+        for snapshot in self._snapshots():
+            for labels, (counts, total, count) in snapshot.items():
+                merged = totals.get(labels)
+                if merged is None:
+                    merged = totals[labels] = [[0] * len(counts), 0.0, 0]
+                merged[0] = [a + b for a, b in zip(merged[0], counts)]
+                merged[1] += total
+                merged[2] += count
+        result = {}
+        for labels, (counts, total, count) in totals.items():
+            cumulative, running = [], 0
+            for c in counts:
+                running += c
+                cumulative.append(running)
+            result[labels] = (cumulative, total, count)
+        return result
+
+    def samples(self):
+        bounds = self.buckets + (float("inf"),)
+        for labels, (cumulative, total, count) in sorted(self.values().items()):
+            for bound, value in zip(bounds, cumulative):
+                label_str = _format_labels(self.labelnames, labels, (("le", _format_value(float(bound))),))
+                yield f"{self.name}_bucket{label_str} {value}"
+            label_str = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{label_str} {_format_value(total)}"
+            yield f"{self.name}_count{label_str} {count}"
+
+
+class MetricsRegistry:
+    """Holds metrics and scrape-time collectors and renders them as text."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector):
+        """Add a callable returning [(name, type, documentation, [(labels dict, value)])].
+
+        Collectors run only when metrics are rendered.
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors)
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.metric_type}")
+            lines.extend(metric.samples())
+        for collector in collectors:
+            for name, metric_type, documentation, samples in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for labels, value in samples:
+                    label_str = _format_labels(labels.keys(), labels.values())
+                    lines.append(f"{name}{label_str} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class ServiceMetrics:
+    """The API's request, agent, tool and session store metrics."""
+
+    def __init__(self, registry=None):
+        self.registry = registry or MetricsRegistry()
+        r = self.registry
+        self.requests = r.counter(
+            "agri_http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+        self.request_errors = r.counter(
+            "agri_http_request_errors_total", "HTTP requests that failed with a 5xx or an exception", ("method", "route"))
+        self.request_latency = r.histogram(
+            "agri_http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+        self.agent_runs = r.counter(
+            "agri_agent_runs_total", "Sub-agent turns seen in runner events", ("agent",))
+        self.agent_errors = r.counter(
+            "agri_agent_errors_total", "Sub-agent turns that ended in an error", ("agent",))
+        self.agent_latency = r.histogram(
+            "agri_agent_duration_seconds", "Sub-agent turn latency derived from runner events", ("agent",))
+        self.runner_events = r.counter(
+            "agri_runner_events_total", "Runner events by author", ("author",))
+        self.tool_calls = r.counter(
+            "agri_tool_calls_total", "Tool calls seen in runner events", ("tool",))
+        self.tool_errors = r.counter(
+            "agri_tool_errors_total", "Tool calls without a matching response", ("tool",))
+        self.tool_latency = r.histogram(
+            "agri_tool_duration_seconds", "Tool call latency derived from runner events", ("tool",))
+        self.session_ops = r.counter(
+            "agri_session_store_operations_total", "Session and history store operations", ("operation",))
+        self.session_errors = r.counter(
+            "agri_session_store_errors_total", "Session and history store operations that raised", ("operation",))
+        self.session_latency = r.histogram(
+            "agri_session_store_duration_seconds", "Session and history store operation latency", ("operation",))
+
+    def observe_request(self, method, route, status, seconds):
+        """Record one finished HTTP request."""
+        self.requests.inc((method, route, str(status)))
+        if status >= 500:
+            self.request_errors.inc((method, route))
+        self.request_latency.observe(seconds, (method, route))
+
+    def observe_span(self, span):
+        """Tracer listener turning finished spans into agent, tool and store metrics."""
+        category = span.category
+        seconds = (span.end_ns - span.start_ns) / 1e9
+        if category == "sub_agent":
+            labels = (span.attrs.get("agent"),)
+            self.agent_runs.inc(labels)
+            if "error" in span.attrs:
+                self.agent_errors.inc(labels)
+            self.agent_latency.observe(seconds, labels)
+        elif category == "tool":
+            labels = (span.attrs.get("tool"),)
+            self.tool_calls.inc(labels)
+            if span.attrs.get("unfinished"):
+                self.tool_errors.inc(labels)
+            self.tool_latency.observe(seconds, labels)
+        elif category == "session_store":
+            labels = (span.name,)
+            self.session_ops.inc(labels)
+            if "error" in span.attrs:
+                self.session_errors.inc(labels)
+            self.session_latency.observe(seconds, labels)
+        elif category == "runner_event":
+            self.runner_events.inc((span.attrs.get("author"),))
+
+    def render(self):
+        return self.registry.render()
@@ -3,22 +3,30 @@ Mock Google ADK classes and functions for testing and development purposes.
 This allows the multi-agent system to work without the actual Google ADK installed.
 """
 
+import asyncio
+
+
 class Agent:
     """Mock Agent class"""
-    def __init__(self, name=None, model=None, description=None, instruction=None, tools=None, sub_agents=None):
+    def __init__(self, name=None, model=None, description=None, instruction=None, tools=None, sub_agents=None, output_key=None):
         self.name = name
         self.model = model
         self.description = description
         self.instruction = instruction
         self.tools = tools or []
         self.sub_agents = sub_agents or []
+        self.output_key = output_key
         
     def __str__(self):
         return f"MockAgent(name={self.name})"
         
     async def run(self, message, context=None):
         """Mock run method that returns a simple response"""
-        return f"Mock response from {self.name}: Processed '{message}'"
+        response = f"Mock response from {self.name}: Processed '{message}'"
+        # Like the ADK, store the final response in state under output_key
+        if self.output_key and context is not None:
+            context[self.output_key] = response
+        return response
 
 class SequentialAgent(Agent):
     """Mock SequentialAgent class"""
@@ -33,6 +41,36 @@ class SequentialAgent(Agent):
             responses.append(f"Step {i+1}: {response}")
         return " -> ".join(responses)
 
+class ParallelAgent(Agent):
+    """Mock ParallelAgent class: runs every sub-agent concurrently"""
+    def __init__(self, name=None, sub_agents=None, description=None, branch_timeout=None):
+        super().__init__(name=name, description=description, sub_agents=sub_agents)
+        # Seconds each branch may run before it is abandoned (None waits forever)
+        self.branch_timeout = branch_timeout
+
+    async def _run_branch(self, agent, message, context):
+        try:
+            if self.branch_timeout:
+                return await asyncio.wait_for(agent.run(message, context), self.branch_timeout)
+            return await agent.run(message, context)
+        except asyncio.TimeoutError:
+            result = f"{agent.name} timed out after {self.branch_timeout}s"
+        except Exception as e:
+            result = f"{agent.name} failed: {e}"
+        # A failed branch still leaves a note in state so the next agent can see it
+        if agent.output_key and context is not None:
+            context[agent.output_key] = result
+        return result
+
+    async def run(self, message, context=None):
+        """Mock parallel processing: latency is the slowest branch, not the sum"""
+        responses = await asyncio.gather(
+            *(self._run_branch(agent, message, context) for agent in self.sub_agents)
+        )
+        return " | ".join(
+            f"{agent.name}: {response}" for agent, response in zip(self.sub_agents, responses)
+        )
+
 class AgentTool:
     """Mock AgentTool class"""
     def __init__(self, agent=None):
@@ -44,6 +82,30 @@ class AgentTool:
             return f"Tool result from {self.agent.name}: {args} {kwargs}"
         return f"Tool result: {args} {kwargs}"
 
+class Part:
+    """Mock google.genai Part class"""
+    def __init__(self, text=None):
+        self.text = text
+
+class Content:
+    """Mock google.genai Content class"""
+    def __init__(self, role=None, parts=None):
+        self.role = role
+        self.parts = parts or []
+
+class Event:
+    """Mock runner Event class"""
+    def __init__(self, author, text, partial=False, final=False):
+        import uuid
+        self.id = str(uuid.uuid4())
+        self.author = author
+        self.content = Content(role="model", parts=[Part(text=text)])
+        self.partial = partial
+        self._final = final
+
+    def is_final_response(self):
+        return self._final
+
 class Runner:
     """Mock Runner class"""
     def __init__(self, agent=None, app_name=None, session_service=None):
@@ -57,37 +119,61 @@ class Runner:
             return await self.agent.run(message)
         return f"Mock runner response to: {message}"
 
+    async def run_async(self, user_id, session_id, new_message):
+        """Mock event stream: one event per sequential step, then the final response"""
+        message = new_message.parts[0].text if new_message and new_message.parts else ""
+        if not self.agent:
+            yield Event("runner", f"Mock runner response to: {message}", final=True)
+            return
+        if isinstance(self.agent, SequentialAgent):
+            for agent in self.agent.sub_agents:
+                yield Event(agent.name, await agent.run(message))
+        yield Event(self.agent.name, await self.agent.run(message), final=True)
+
 class DatabaseSessionService:
     """Mock DatabaseSessionService class"""
     def __init__(self, db_url=None):
         self.db_url = db_url
         self.sessions = {}
+        # (app_name, user_id) -> {session_id: session}, so listing never scans every user
+        self.user_sessions = {}
         
-    def create_session(self, app_name, user_id, state=None):
+    def create_session(self, app_name, user_id, state=None, session_id=None):
         """Mock session creation"""
         import uuid
-        session_id = str(uuid.uuid4())
+        session_id = session_id or str(uuid.uuid4())
         session = MockSession(session_id, app_name, user_id, state or {})
         self.sessions[session_id] = session
+        self.user_sessions.setdefault((app_name, user_id), {})[session_id] = session
         return session
         
     def get_session(self, app_name, user_id, session_id):
         """Mock session retrieval"""
         if session_id in self.sessions:
             return self.sessions[session_id]
-        raise Exception(f"Session {session_id} not found")
+        raise LookupError(f"Session {session_id} not found")
         
     def update_session(self, app_name, user_id, session_id, state):
         """Mock session update"""
         if session_id in self.sessions:
+            import datetime
             self.sessions[session_id].state.update(state)
+            self.sessions[session_id].updated_at = datetime.datetime.now()
             return self.sessions[session_id]
-        raise Exception(f"Session {session_id} not found")
+        raise LookupError(f"Session {session_id} not found")
         
+    def delete_session(self, app_name, user_id, session_id):
+        """Mock session deletion"""
+        self.sessions.pop(session_id, None)
+        self.user_sessions.get((app_name, user_id), {}).pop(session_id, None)
+
     def list_sessions(self, app_name, user_id):
-        """Mock session listing"""
-        user_sessions = [s for s in self.sessions.values() 
-                        if s.user_id == user_id and s.app_name == app_name]
+        """Mock session listing, most recently updated first"""
+        user_sessions = sorted(
+            self.user_sessions.get((app_name, user_id), {}).values(),
+            key=lambda s: s.updated_at,
+            reverse=True,
+        )
         return MockSessionList(user_sessions)
 
 class MockSession:
@@ -118,6 +204,7 @@ class MockTools:
 class MockAgents:
     Agent = Agent
     SequentialAgent = SequentialAgent
+    ParallelAgent = ParallelAgent
 
 class MockToolsModule:
     agent_tool = type('AgentTool', (), {'AgentTool': AgentTool})
@@ -138,6 +225,17 @@ class MockGoogleADK:
 import sys
 import types
 
+# Keep the real google.genai types (Content/Part) when the package is installed
+try:
+    from google.genai import types as genai_types_module
+    genai_module = sys.modules['google.genai']
+except ImportError:
+    genai_module = types.ModuleType('google.genai')
+    genai_types_module = types.ModuleType('google.genai.types')
+    genai_types_module.Content = Content
+    genai_types_module.Part = Part
+    genai_module.types = genai_types_module
+
 # Create mock google module
 google_module = types.ModuleType('google')
 adk_module = types.ModuleType('google.adk')
@@ -150,6 +248,7 @@ sessions_module = types.ModuleType('google.adk.sessions')
 # Add classes to modules
 agents_module.Agent = Agent
 agents_module.SequentialAgent = SequentialAgent
+agents_module.ParallelAgent = ParallelAgent
 tools_module.google_search = google_search
 agent_tool_module.AgentTool = AgentTool
 runners_module.Runner = Runner
@@ -157,6 +256,7 @@ sessions_module.DatabaseSessionService = DatabaseSessionService
 
 # Build module hierarchy
 google_module.adk = adk_module
+google_module.genai = genai_module
 adk_module.agents = agents_module
 adk_module.tools = tools_module
 adk_module.runners = runners_module
@@ -171,5 +271,7 @@ sys.modules['google.adk.tools'] = tools_module
 sys.modules['google.adk.tools.agent_tool'] = agent_tool_module
 sys.modules['google.adk.runners'] = runners_module
 sys.modules['google.adk.sessions'] = sessions_module
+sys.modules['google.genai'] = genai_module
+sys.modules['google.genai.types'] = genai_types_module
 
 print("Mock Google ADK modules created successfully!")
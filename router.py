@@ -0,0 +1,212 @@
+"""
+Rule-based fast-path router in front of the LLM root agent.
+
+The root agent spends a full model call just deciding which specialist should
+answer. Many queries are unambiguous ("PM-Kisan eligibility", "yellow spots on
+wheat leaves"), so this router scores a query against a keyword index of the
+root agent's sub-agents and, when one agent clearly wins, the query is sent to
+that sub-agent directly. Anything below the confidence thresholds falls back to
+the LLM router unchanged.
+
+The index is built from each sub-agent's description (and its sub-agents'),
+weighted by how specific a word is to one agent, plus a small set of curated
+intent keywords per agent. Every decision is counted so hit rates can be
+monitored.
+"""
+
+import math
+import re
+import threading
+from collections import Counter
+
+# Curated intent keywords per specialist; descriptions alone miss everyday phrasing
+ROUTE_KEYWORDS = {
+    "crop_care_agent": (
+        "disease", "pest", "insect", "infection", "symptom", "spot", "yellow",
+        "yellowing", "wilting", "wilt", "blight", "rust", "fungus", "fungal",
+        "mildew", "rot", "leaves", "leaf", "lesion", "curl", "aphid", "worm",
+        "diagnose", "diagnosis", "sick", "dying",
+    ),
+    "crop_advisory_agent": (
+        "soil", "sow", "sowing", "plant", "grow", "cultivate", "variety",
+        "hybrid", "seed", "climate", "suitable", "yield", "rotation", "kharif",
+        "rabi", "zaid",
+    ),
+    "govt_support_agent": (
+        "scheme", "subsidy", "insurance", "government", "govt", "pm", "kisan",
+        "pmfby", "eligibility", "eligible", "apply", "application", "loan",
+        "credit", "kcc", "benefit", "registration",
+    ),
+    "marketplace_agent": (
+        "buy", "purchase", "product", "supplier", "vendor", "fertilizer",
+        "pesticide", "equipment", "tractor", "shop", "store", "order",
+        "marketing", "advertise",
+    ),
+    "faq_support_agent": (
+        "app", "dashboard", "login", "account", "password", "profile",
+        "navigate", "navigation", "feature", "settings", "notification",
+        "language",
+    ),
+}
+
+# Words that carry no routing signal
+_STOPWORDS = frozenset({
+    "a", "about", "agent", "all", "an", "and", "any", "are", "as", "at", "be",
+    "by", "can", "do", "does", "for", "from", "get", "give", "how", "i", "in",
+    "is", "it", "me", "my", "of", "on", "or", "our", "please", "should", "tell",
+    "that", "the", "this", "to", "what", "whats", "when", "where", "which",
+    "who", "why", "will", "with", "you", "your",
+})
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Weight of a curated keyword relative to a description word
+_KEYWORD_WEIGHT = 2.0
+
+
+def _stem(token):
+    """Fold simple English plurals so 'spots' matches 'spot'."""
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def route_tokens(text):
+    """Lowercase, tokenize, drop stopwords and stem a text for routing."""
+    if not text:
+        return []
+    return [_stem(t) for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def _descriptions(agent):
+    """Yield the description of an agent and of every agent below it."""
+    if getattr(agent, "description", None):
+        yield agent.description
+    for sub_agent in getattr(agent, "sub_agents", None) or []:
+        yield from _descriptions(sub_agent)
+
+
+class RouteDecision:
+    """Outcome of routing one query."""
+
+    __slots__ = ("agent", "agent_name", "confidence", "score", "fast_path")
+
+    def __init__(self, agent, agent_name, confidence, score, fast_path):
+        self.agent = agent
+        self.agent_name = agent_name
+        self.confidence = confidence
+        self.score = score
+        self.fast_path = fast_path
+
+    def to_dict(self):
+        return {
+            "agent": self.agent_name,
+            "confidence": round(self.confidence, 4),
+            "score": round(self.score, 4),
+            "fast_path": self.fast_path,
+        }
+
+
+class QueryRouter:
+    """Keyword/intent index over a root agent's sub-agents with confidence thresholds."""
+
+    def __init__(self, root_agent, keywords=ROUTE_KEYWORDS, min_confidence=0.7, min_score=3.0):
+        """
+        Args:
+            root_agent: The LLM root agent whose sub_agents are routing targets
+            keywords (dict): {agent name: curated intent keywords}
+            min_confidence (float): Share of the total score the best agent needs
+            min_score (float): Absolute score the best agent needs
+        """
+        self.root_agent = root_agent
+        self.min_confidence = min_confidence
+        self.min_score = min_score
+        self._agents = {agent.name: agent for agent in root_agent.sub_agents}
+
+        # token -> {agent name: weight}
+        self._index = {}
+        vocabularies = {
+            name: Counter(
+                token
+                for description in _descriptions(agent)
+                for token in route_tokens(description)
+            )
+            for name, agent in self._agents.items()
+        }
+        # Words shared by many agents ("agricultural", "recommendation") say little
+        document_frequency = Counter(
+            token for vocabulary in vocabularies.values() for token in vocabulary
+        )
+        num_agents = max(len(self._agents), 1)
+        for name, vocabulary in vocabularies.items():
+            for token in vocabulary:
+                idf = math.log((1 + num_agents) / document_frequency[token])
+                self._index.setdefault(token, {})[name] = idf
+        for name, words in keywords.items():
+            if name not in self._agents:
+                continue
+            for word in words:
+                for token in route_tokens(word):
+                    postings = self._index.setdefault(token, {})
+                    postings[name] = max(postings.get(name, 0.0), _KEYWORD_WEIGHT)
+
+        self._lock = threading.Lock()
+        self._total = 0
+        self._fast_path = Counter()
+        self._fallback_reasons = Counter()
+
+    def scores(self, query):
+        """Return {agent name: score} for a query (agents with no matches omitted)."""
+        totals = Counter()
+        # Each distinct word counts once so repetition cannot force a route
+        for token in set(route_tokens(query)):
+            for name, weight in self._index.get(token, {}).items():
+                totals[name] += weight
+        return totals
+
+    def route(self, query):
+        """Decide whether a query can skip the LLM router.
+
+        Returns:
+            RouteDecision: fast_path is True when agent should handle the query
+                directly; otherwise agent is the root agent
+        """
+        totals = self.scores(query)
+        fallback_reason = None
+        if not totals:
+            fallback_reason = "no_match"
+            best_name, best_score, confidence = None, 0.0, 0.0
+        else:
+            best_name, best_score = totals.most_common(1)[0]
+            confidence = best_score / sum(totals.values())
+            if best_score < self.min_score:
+                fallback_reason = "low_score"
+            elif confidence < self.min_confidence:
+                fallback_reason = "ambiguous"
+
+        with self._lock:
+            self._total += 1
+            if fallback_reason:
+                self._fallback_reasons[fallback_reason] += 1
+            else:
+                self._fast_path[best_name] += 1
+
+        if fallback_reason:
+            return RouteDecision(self.root_agent, self.root_agent.name, confidence, best_score, False)
+        return RouteDecision(self._agents[best_name], best_name, confidence, best_score, True)
+
+    def stats(self):
+        """Return routing counters and the fast-path hit rate."""
+        with self._lock:
+            fast_path = sum(self._fast_path.values())
+            return {
+                "total": self._total,
+                "fast_path": fast_path,
+                "llm_fallback": self._total - fast_path,
+                "hit_rate": round(fast_path / self._total, 4) if self._total else 0.0,
+                "fast_path_by_agent": dict(self._fast_path),
+                "fallback_reasons": dict(self._fallback_reasons),
+                "min_confidence": self.min_confidence,
+                "min_score": self.min_score,
+            }
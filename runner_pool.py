@@ -0,0 +1,75 @@
+"""
+Process-wide pool of agent runners.
+
+A Runner only holds references to the agent tree and the session service; all
+per-request state lives in the session and the invocation context. One runner
+per app_name can therefore be shared by every concurrent request instead of
+rebuilding the agent wiring on each /agent/query call. Runners for other agents
+of the tree (e.g. a specialist picked by the fast-path router) are pooled the
+same way, keyed by (app_name, agent name).
+"""
+
+import threading
+
+# Import mock Google ADK for development/testing
+try:
+    from google.adk.runners import Runner
+except ImportError:
+    print("Google ADK not found, using mock implementation...")
+    import mock_google_adk
+    from google.adk.runners import Runner
+
+
+class RunnerPool:
+    """Lazily builds and caches one Runner per (app_name, agent)."""
+
+    def __init__(self, agent, session_service):
+        """
+        Args:
+            agent: The root agent runners are built for by default
+            session_service: The session service shared by all runners
+        """
+        self.agent = agent
+        self.session_service = session_service
+        self._runners = {}
+        self._lock = threading.Lock()
+
+    def get(self, app_name, agent=None):
+        """Return the shared runner for app_name and agent, creating it on first use.
+
+        Args:
+            app_name: The application name
+            agent: The agent to run (defaults to the pool's root agent)
+        """
+        agent = agent or self.agent
+        key = (app_name, agent.name)
+        runner = self._runners.get(key)
+        if runner is not None:
+            return runner
+
+        with self._lock:
+            # Another request may have built it while we waited for the lock
+            runner = self._runners.get(key)
+            if runner is None:
+                runner = Runner(
+                    agent=agent,
+                    app_name=app_name,
+                    session_service=self.session_service,
+                )
+                self._runners[key] = runner
+        return runner
+
+    def warm_up(self, *app_names, agents=()):
+        """Create runners for the given app names ahead of the first request.
+
+        Args:
+            app_names: Application names to build root agent runners for
+            agents: Additional agents to build runners for under each app name
+        """
+        for app_name in app_names:
+            self.get(app_name)
+            for agent in agents:
+                self.get(app_name, agent)
+
+    def __len__(self):
+        return len(self._runners)
@@ -0,0 +1,79 @@
+"""
+In-memory index of each user's most recently active session.
+
+Resolving "the user's latest session" used to list every session for the user
+and take the first one, which is neither cheap nor ordered by activity. This
+index is updated whenever a session is created or written to, so the lookup is
+a dictionary hit. After a restart it is seeded lazily, one user at a time, from
+the session service's own update timestamps.
+"""
+
+import threading
+import time
+
+
+def session_update_time(session):
+    """Return a session's last update time as a POSIX timestamp.
+
+    Handles both ADK sessions (``last_update_time``) and the mock sessions
+    (``updated_at`` datetime).
+    """
+    last_update_time = getattr(session, "last_update_time", None)
+    if last_update_time is not None:
+        return float(last_update_time)
+    updated_at = getattr(session, "updated_at", None)
+    if updated_at is not None:
+        return updated_at.timestamp()
+    return 0.0
+
+
+class LatestSessionIndex:
+    """Tracks the most recently updated session per (app_name, user_id)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (app_name, user_id) -> {session_id: last activity timestamp}
+        self._sessions = {}
+        # (app_name, user_id) -> (timestamp, session_id) of the latest session
+        self._latest = {}
+
+    def touch(self, app_name, user_id, session_id, timestamp=None):
+        """Record activity on a session (creation, new turn, state update)."""
+        if timestamp is None:
+            timestamp = time.time()
+        key = (app_name, user_id)
+        with self._lock:
+            self._sessions.setdefault(key, {})[session_id] = timestamp
+            latest = self._latest.get(key)
+            if latest is None or timestamp >= latest[0]:
+                self._latest[key] = (timestamp, session_id)
+
+    def seed(self, app_name, user_id, sessions):
+        """Load a user's sessions (e.g. from list_sessions) into the index."""
+        for session in sessions:
+            self.touch(app_name, user_id, session.id, session_update_time(session))
+
+    def latest(self, app_name, user_id):
+        """Return the most recently active session ID, or None if unknown."""
+        latest = self._latest.get((app_name, user_id))
+        return latest[1] if latest else None
+
+    def is_known(self, app_name, user_id):
+        """Whether the index already holds this user's sessions."""
+        return (app_name, user_id) in self._latest
+
+    def remove(self, app_name, user_id, session_id):
+        """Forget a deleted session, promoting the next most recent one."""
+        key = (app_name, user_id)
+        with self._lock:
+            sessions = self._sessions.get(key)
+            if not sessions or sessions.pop(session_id, None) is None:
+                return
+            if self._latest[key][1] != session_id:
+                return
+            if sessions:
+                newest = max(sessions, key=sessions.get)
+                self._latest[key] = (sessions[newest], newest)
+            else:
+                del self._sessions[key]
+                del self._latest[key]
@@ -0,0 +1,507 @@
+"""
+SQLite session backend tuned for concurrent API workers.
+
+DatabaseSessionService goes through SQLAlchemy with SQLite's default rollback
+journal, so concurrent requests serialize on the database file and every call
+pays for ORM setup. This backend talks to sqlite3 directly:
+
+- WAL journal mode, so readers never block the single writer and writers
+  never block readers; ``synchronous=NORMAL`` is durable across crashes in WAL
+- a fixed pool of connections, sized to the session I/O worker count
+- constant SQL text for every operation, so sqlite3's per-connection
+  statement cache keeps them prepared after first use
+- ``busy_timeout`` on every connection, and writes that begin with
+  ``BEGIN IMMEDIATE`` so a transaction takes the write lock up front instead
+  of failing on a read-to-write upgrade
+
+It implements the ADK session service interface (create/get/list/delete
+sessions, list/append events, ``app:``/``user:``/``temp:`` state prefixes), so
+the Runner can use it in place of DatabaseSessionService. Tables are prefixed
+``session_store_`` and can share a database file with the ADK tables.
+
+Session state is split into a hot row and cold values. The hot row holds the
+small fields agent instructions template in (user_name, weather, location,
+...) and is the only state read on every turn. Keys listed in
+COLD_STATE_KEYS, such as a legacy ``interaction_history`` list, are written to
+their own table and only loaded by ``get_cold_state``. ``get_session_state``
+reads the hot row without the session's events for callers that only need
+state.
+"""
+
+import copy
+import json
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional
+
+try:
+    from google.adk.events import Event
+    from google.adk.sessions import Session
+    from google.adk.sessions.base_session_service import (
+        BaseSessionService,
+        ListEventsResponse,
+        ListSessionsResponse,
+    )
+
+    class _ListedSession(Session):
+        """Session as returned by list_sessions: no state or events, plus its creation time."""
+
+        created_at: Optional[datetime] = None
+except ImportError:
+    # Mock ADK: minimal stand-ins with the attributes the API and index use
+    Event = None
+    BaseSessionService = object
+
+    class Session:
+        def __init__(self, app_name, user_id, id, state=None, last_update_time=0.0, created_at=None):
+            self.app_name = app_name
+            self.user_id = user_id
+            self.id = id
+            self.state = state or {}
+            self.events = []
+            self.last_update_time = last_update_time
+            self.created_at = created_at
+
+    _ListedSession = Session
+
+    class ListSessionsResponse:
+        def __init__(self, sessions=None):
+            self.sessions = sessions or []
+
+    class ListEventsResponse:
+        def __init__(self, events=None, next_page_token=None):
+            self.events = events or []
+            self.next_page_token = next_page_token
+
+APP_PREFIX = "app:"
+USER_PREFIX = "user:"
+TEMP_PREFIX = "temp:"
+
+# State keys that grow without bound; stored outside the hot session row
+COLD_STATE_KEYS = frozenset({"interaction_history"})
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS session_store_sessions (
+        app_name TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        id TEXT NOT NULL,
+        state TEXT NOT NULL,
+        create_time REAL NOT NULL,
+        update_time REAL NOT NULL,
+        PRIMARY KEY (app_name, user_id, id)
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS session_store_sessions_by_update
+    ON session_store_sessions (app_name, user_id, update_time DESC)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS session_store_events (
+        app_name TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        session_id TEXT NOT NULL,
+        seq INTEGER NOT NULL,
+        id TEXT NOT NULL,
+        author TEXT,
+        timestamp REAL NOT NULL,
+        payload TEXT NOT NULL,
+        PRIMARY KEY (app_name, user_id, session_id, seq)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS session_store_app_states (
+        app_name TEXT PRIMARY KEY,
+        state TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS session_store_user_states (
+        app_name TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        state TEXT NOT NULL,
+        PRIMARY KEY (app_name, user_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS session_store_cold_state (
+        app_name TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        session_id TEXT NOT NULL,
+        key TEXT NOT NULL,
+        value TEXT NOT NULL,
+        PRIMARY KEY (app_name, user_id, session_id, key)
+    )
+    """,
+)
+
+# Every statement is a constant so sqlite3's statement cache keeps it compiled
+_INSERT_SESSION = (
+    "INSERT INTO session_store_sessions (app_name, user_id, id, state, create_time, update_time) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+_SELECT_SESSION = (
+    "SELECT state, update_time FROM session_store_sessions "
+    "WHERE app_name = ? AND user_id = ? AND id = ?"
+)
+_UPDATE_SESSION = (
+    "UPDATE session_store_sessions SET state = ?, update_time = ? "
+    "WHERE app_name = ? AND user_id = ? AND id = ?"
+)
+_LIST_SESSIONS = (
+    "SELECT id, create_time, update_time FROM session_store_sessions "
+    "WHERE app_name = ? AND user_id = ? ORDER BY update_time DESC"
+)
+_DELETE_SESSION = (
+    "DELETE FROM session_store_sessions WHERE app_name = ? AND user_id = ? AND id = ?"
+)
+_DELETE_EVENTS = (
+    "DELETE FROM session_store_events WHERE app_name = ? AND user_id = ? AND session_id = ?"
+)
+_INSERT_EVENT = (
+    "INSERT INTO session_store_events "
+    "(app_name, user_id, session_id, seq, id, author, timestamp, payload) "
+    "SELECT ?, ?, ?, COALESCE(MAX(seq) + 1, 0), ?, ?, ?, ? FROM session_store_events "
+    "WHERE app_name = ? AND user_id = ? AND session_id = ?"
+)
+_SELECT_EVENTS = (
+    "SELECT payload FROM session_store_events "
+    "WHERE app_name = ? AND user_id = ? AND session_id = ? AND timestamp >= ? "
+    "ORDER BY seq"
+)
+_SELECT_RECENT_EVENTS = (
+    "SELECT payload FROM (SELECT seq, payload FROM session_store_events "
+    "WHERE app_name = ? AND user_id = ? AND session_id = ? AND timestamp >= ? "
+    "ORDER BY seq DESC LIMIT ?) ORDER BY seq"
+)
+_UPSERT_COLD_STATE = (
+    "INSERT INTO session_store_cold_state (app_name, user_id, session_id, key, value) "
+    "VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT (app_name, user_id, session_id, key) DO UPDATE SET value = excluded.value"
+)
+_SELECT_COLD_STATE = (
+    "SELECT value FROM session_store_cold_state "
+    "WHERE app_name = ? AND user_id = ? AND session_id = ? AND key = ?"
+)
+_DELETE_COLD_STATE = (
+    "DELETE FROM session_store_cold_state WHERE app_name = ? AND user_id = ? AND session_id = ?"
+)
+_SELECT_APP_STATE = "SELECT state FROM session_store_app_states WHERE app_name = ?"
+_UPSERT_APP_STATE = (
+    "INSERT INTO session_store_app_states (app_name, state) VALUES (?, ?) "
+    "ON CONFLICT (app_name) DO UPDATE SET state = excluded.state"
+)
+_SELECT_USER_STATE = (
+    "SELECT state FROM session_store_user_states WHERE app_name = ? AND user_id = ?"
+)
+_UPSERT_USER_STATE = (
+    "INSERT INTO session_store_user_states (app_name, user_id, state) VALUES (?, ?, ?) "
+    "ON CONFLICT (app_name, user_id) DO UPDATE SET state = excluded.state"
+)
+
+
+def _split_state_delta(state):
+    """Split a state dict into (app, user, session) deltas; temp: keys are dropped."""
+    app_delta, user_delta, session_delta = {}, {}, {}
+    for key, value in (state or {}).items():
+        if key.startswith(APP_PREFIX):
+            app_delta[key[len(APP_PREFIX):]] = value
+        elif key.startswith(USER_PREFIX):
+            user_delta[key[len(USER_PREFIX):]] = value
+        elif not key.startswith(TEMP_PREFIX):
+            session_delta[key] = value
+    return app_delta, user_delta, session_delta
+
+
+def _split_cold(session_delta, cold_keys):
+    """Split a session-scoped delta into (hot, cold) dicts."""
+    if not cold_keys.intersection(session_delta):
+        return session_delta, {}
+    hot = {k: v for k, v in session_delta.items() if k not in cold_keys}
+    cold = {k: v for k, v in session_delta.items() if k in cold_keys}
+    return hot, cold
+
+
+def _merge_state(app_state, user_state, session_state):
+    """The state a session exposes: its own keys plus prefixed app and user keys."""
+    merged = dict(session_state)
+    for key, value in app_state.items():
+        merged[APP_PREFIX + key] = value
+    for key, value in user_state.items():
+        merged[USER_PREFIX + key] = value
+    return merged
+
+
+def _state_delta(event):
+    actions = getattr(event, "actions", None)
+    return getattr(actions, "state_delta", None) or {}
+
+
+def _encode_event(event):
+    if hasattr(event, "model_dump_json"):
+        return event.model_dump_json(exclude_none=True)
+    return json.dumps({"id": event.id, "author": event.author})
+
+
+def _decode_event(payload):
+    if Event is not None:
+        return Event.model_validate_json(payload)
+    return json.loads(payload)
+
+
+class SQLiteSessionService(BaseSessionService):
+    """ADK-compatible session service on a pooled, WAL-mode SQLite database."""
+
+    def __init__(
+        self,
+        db_path="./agricultural_agent_sessions.db",
+        pool_size=8,
+        busy_timeout_ms=5000,
+        cold_keys=COLD_STATE_KEYS,
+    ):
+        """
+        Args:
+            db_path: Path to the SQLite database file
+            pool_size: Number of pooled connections (match the session I/O worker count)
+            busy_timeout_ms: How long a connection waits for a lock before failing
+            cold_keys: Session state keys stored outside the hot row and loaded lazily
+        """
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cold_keys = frozenset(cold_keys)
+        self._pool = queue.LifoQueue()
+        self._connections = []
+        self._closed = False
+        self._lock = threading.Lock()
+
+        conn = self._connect()
+        # WAL is a property of the database file; set once, it sticks
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("BEGIN IMMEDIATE")
+        for statement in _SCHEMA:
+            conn.execute(statement)
+        conn.execute("COMMIT")
+        self._pool.put(conn)
+        for _ in range(pool_size - 1):
+            self._pool.put(self._connect())
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=64,
+        )
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        """Borrow a pooled connection (blocks while all are in use)."""
+        if self._closed:
+            raise RuntimeError("SQLiteSessionService is closed")
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    @contextmanager
+    def _write_transaction(self):
+        """Borrow a connection inside a transaction that holds the write lock."""
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def _read_shared_states(self, conn, app_name, user_id):
+        row = conn.execute(_SELECT_APP_STATE, (app_name,)).fetchone()
+        app_state = json.loads(row[0]) if row else {}
+        row = conn.execute(_SELECT_USER_STATE, (app_name, user_id)).fetchone()
+        user_state = json.loads(row[0]) if row else {}
+        return app_state, user_state
+
+    def _write_shared_states(self, conn, app_name, user_id, app_state, user_state, app_delta, user_delta):
+        if app_delta:
+            app_state.update(app_delta)
+            conn.execute(_UPSERT_APP_STATE, (app_name, json.dumps(app_state)))
+        if user_delta:
+            user_state.update(user_delta)
+            conn.execute(_UPSERT_USER_STATE, (app_name, user_id, json.dumps(user_state)))
+
+    def _write_cold_state(self, conn, app_name, user_id, session_id, cold_delta):
+        for key, value in cold_delta.items():
+            conn.execute(_UPSERT_COLD_STATE, (app_name, user_id, session_id, key, json.dumps(value)))
+
+    def create_session(self, *, app_name, user_id, state=None, session_id=None):
+        """Create a session with an initial state."""
+        session_id = session_id or str(uuid.uuid4())
+        app_delta, user_delta, session_state = _split_state_delta(state)
+        session_state, cold_state = _split_cold(session_state, self.cold_keys)
+        now = time.time()
+        with self._write_transaction() as conn:
+            app_state, user_state = self._read_shared_states(conn, app_name, user_id)
+            self._write_shared_states(conn, app_name, user_id, app_state, user_state, app_delta, user_delta)
+            conn.execute(
+                _INSERT_SESSION,
+                (app_name, user_id, session_id, json.dumps(session_state), now, now),
+            )
+            self._write_cold_state(conn, app_name, user_id, session_id, cold_state)
+        return Session(
+            app_name=app_name,
+            user_id=user_id,
+            id=session_id,
+            state=_merge_state(app_state, user_state, session_state),
+            last_update_time=now,
+        )
+
+    def get_session(self, *, app_name, user_id, session_id, config=None):
+        """Fetch a session with its hot state and events, or None if it does not exist."""
+        after_timestamp = getattr(config, "after_timestamp", None) or 0.0
+        num_recent_events = getattr(config, "num_recent_events", None)
+        with self._connection() as conn:
+            row = conn.execute(_SELECT_SESSION, (app_name, user_id, session_id)).fetchone()
+            if row is None:
+                return None
+            app_state, user_state = self._read_shared_states(conn, app_name, user_id)
+            if num_recent_events:
+                event_rows = conn.execute(
+                    _SELECT_RECENT_EVENTS,
+                    (app_name, user_id, session_id, after_timestamp, num_recent_events),
+                ).fetchall()
+            else:
+                event_rows = conn.execute(
+                    _SELECT_EVENTS, (app_name, user_id, session_id, after_timestamp)
+                ).fetchall()
+
+        session = Session(
+            app_name=app_name,
+            user_id=user_id,
+            id=session_id,
+            state=_merge_state(app_state, user_state, json.loads(row[0])),
+            last_update_time=row[1],
+        )
+        session.events = [_decode_event(payload) for (payload,) in event_rows]
+        return session
+
+    def get_session_state(self, *, app_name, user_id, session_id):
+        """Read a session's hot state without loading its events or cold values.
+
+        Returns:
+            dict: The merged session, app: and user: state, or None if the session does not exist
+        """
+        with self._connection() as conn:
+            row = conn.execute(_SELECT_SESSION, (app_name, user_id, session_id)).fetchone()
+            if row is None:
+                return None
+            app_state, user_state = self._read_shared_states(conn, app_name, user_id)
+        return _merge_state(app_state, user_state, json.loads(row[0]))
+
+    def get_cold_state(self, *, app_name, user_id, session_id, key, default=None):
+        """Load one cold state value (e.g. a legacy interaction_history list)."""
+        with self._connection() as conn:
+            row = conn.execute(_SELECT_COLD_STATE, (app_name, user_id, session_id, key)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def list_sessions(self, *, app_name, user_id):
+        """List a user's sessions, most recently updated first (state and events not loaded)."""
+        with self._connection() as conn:
+            rows = conn.execute(_LIST_SESSIONS, (app_name, user_id)).fetchall()
+        return ListSessionsResponse(
+            sessions=[
+                _ListedSession(app_name=app_name, user_id=user_id, id=session_id, state={},
+                               last_update_time=update_time,
+                               created_at=datetime.fromtimestamp(create_time))
+                for session_id, create_time, update_time in rows
+            ]
+        )
+
+    def delete_session(self, *, app_name, user_id, session_id):
+        """Delete a session, its events and its cold state."""
+        with self._write_transaction() as conn:
+            conn.execute(_DELETE_EVENTS, (app_name, user_id, session_id))
+            conn.execute(_DELETE_COLD_STATE, (app_name, user_id, session_id))
+            conn.execute(_DELETE_SESSION, (app_name, user_id, session_id))
+
+    def list_events(self, *, app_name, user_id, session_id):
+        """List all events of a session in order."""
+        with self._connection() as conn:
+            rows = conn.execute(_SELECT_EVENTS, (app_name, user_id, session_id, 0.0)).fetchall()
+        return ListEventsResponse(events=[_decode_event(payload) for (payload,) in rows])
+
+    def append_event(self, session, event):
+        """Persist an event and its state delta, then apply both to the in-memory session."""
+        if getattr(event, "partial", False):
+            return event
+
+        app_delta, user_delta, session_delta = _split_state_delta(_state_delta(event))
+        session_delta, cold_delta = _split_cold(session_delta, self.cold_keys)
+        now = time.time()
+        with self._write_transaction() as conn:
+            row = conn.execute(
+                _SELECT_SESSION, (session.app_name, session.user_id, session.id)
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Session {session.id} not found")
+            stored_state, update_time = row
+            if update_time > session.last_update_time:
+                raise ValueError(
+                    f"Session last_update_time {session.last_update_time} is earlier than"
+                    f" the update_time in storage {update_time}; reload the session"
+                )
+            if app_delta or user_delta:
+                app_state, user_state = self._read_shared_states(conn, session.app_name, session.user_id)
+                self._write_shared_states(
+                    conn, session.app_name, session.user_id,
+                    app_state, user_state, app_delta, user_delta,
+                )
+            if session_delta:
+                session_state = json.loads(stored_state)
+                session_state.update(session_delta)
+                stored_state = json.dumps(session_state)
+            conn.execute(
+                _UPDATE_SESSION,
+                (stored_state, now, session.app_name, session.user_id, session.id),
+            )
+            self._write_cold_state(conn, session.app_name, session.user_id, session.id, cold_delta)
+            conn.execute(
+                _INSERT_EVENT,
+                (
+                    session.app_name, session.user_id, session.id,
+                    event.id, event.author, getattr(event, "timestamp", None) or now,
+                    _encode_event(event),
+                    session.app_name, session.user_id, session.id,
+                ),
+            )
+        session.last_update_time = now
+
+        # Same in-memory update the ADK base service performs
+        for key, value in _state_delta(event).items():
+            if not key.startswith(TEMP_PREFIX):
+                session.state[key] = copy.deepcopy(value)
+        session.events.append(event)
+        return event
+
+    def close_session(self, *, session):
+        """Sessions hold no resources; present for interface compatibility."""
+
+    def close(self):
+        """Close every pooled connection."""
+        with self._lock:
+            self._closed = True
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
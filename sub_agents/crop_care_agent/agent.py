@@ -1,46 +1,70 @@
 # Import mock Google ADK for development/testing
 try:
-    from google.adk.agents import Agent
-    from google.adk.tools.agent_tool import AgentTool
+    from google.adk.agents import Agent, ParallelAgent, SequentialAgent
 except ImportError:
     print("Google ADK not found, using mock implementation...")
     import sys
     import os
     sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
     import mock_google_adk
-    from google.adk.agents import Agent
-    from google.adk.tools.agent_tool import AgentTool
+    from google.adk.agents import Agent, ParallelAgent, SequentialAgent
+
+import os
 
 from .subagents.database_search_agent.agent import database_search_agent
 from .subagents.google_search_agent.agent import google_search_agent
 
-# Wrap subagents as tools
-vector_db_tool = AgentTool(agent=database_search_agent)
-google_search_tool = AgentTool(agent=google_search_agent)
+# Seconds either search branch may take before the diagnosis goes ahead without it
+CROP_CARE_BRANCH_TIMEOUT = float(os.getenv("CROP_CARE_BRANCH_TIMEOUT", "20"))
 
-crop_care_agent = Agent(
-    name="crop_care_agent",
+# Both searches run at once, so diagnosis latency is the slower branch rather than the sum
+crop_care_search_agent = ParallelAgent(
+    name="crop_care_search_agent",
+    sub_agents=[
+        database_search_agent,
+        google_search_agent
+    ],
+    description="Parallel agent running the vector database search and Google Search for crop disease diagnosis at the same time.",
+)
+# The ADK ParallelAgent has no per-branch timeout; only set it where supported
+if hasattr(crop_care_search_agent, "branch_timeout"):
+    crop_care_search_agent.branch_timeout = CROP_CARE_BRANCH_TIMEOUT
+
+crop_care_aggregator_agent = Agent(
+    name="crop_care_aggregator_agent",
     model="gemini-2.5-flash-lite",
-    description="Agent for comprehensive crop disease diagnosis, aggregating results from both a vector database and Google Search, and providing actionable advice.",
+    description="Agent that aggregates the vector database and Google Search results into one diagnosis with actionable advice.",
     instruction="""
     You are the Crop Care Agent, responsible for diagnosing crop diseases and providing actionable treatment and prevention advice.
 
+    **Search Results:**
+    Both searches have already run in parallel for this request:
+    - Vector database search (symptom, crop, and context matching): {database_search_result}
+    - Google Search (up-to-date web information): {google_search_result}
+    A result may say that its search timed out or failed; in that case rely on the other one.
+
     **Your Capabilities:**
-    1. **Parallel Analysis:** Use both a vector database search (for symptom, crop, and context matching) and Google Search (for up-to-date web information) to diagnose crop diseases.
-    2. **Result Aggregation:** Aggregate and analyze results from both tools to pinpoint the most likely disease and provide a confidence level.
-    3. **Clarifying Questions:** If the diagnosis is uncertain, ask the user targeted follow-up questions (e.g., "Do you observe these symptoms as well?") to improve accuracy.
-    4. **Treatment & Advice:** Provide clear, actionable treatment and prevention recommendations based on the diagnosis.
-    5. **User Guidance:** If neither tool returns a confident result, explain possible causes and next steps, and ask for more information or images if needed.
+    1. **Result Aggregation:** Aggregate and analyze both search results to pinpoint the most likely disease and provide a confidence level.
+    2. **Clarifying Questions:** If the diagnosis is uncertain, ask the user targeted follow-up questions (e.g., "Do you observe these symptoms as well?") to improve accuracy.
+    3. **Treatment & Advice:** Provide clear, actionable treatment and prevention recommendations based on the diagnosis.
+    4. **User Guidance:** If neither search returns a confident result, explain possible causes and next steps, and ask for more information or images if needed.
 
     **Session State Context:**
     Access weather information from the user's session state which includes current {weather}, {weather_disc}, {precipitation}, {humidity}, {windspeed} and {location}.
     Use this weather context to enhance disease diagnosis accuracy and provide weather-specific recommendations.
 
     **Process:**
-    1. For each user request, call both the vector database tool and the Google Search tool sequentially.
-    2. Aggregate and compare their outputs, synthesizing a unified diagnosis and advice.
-    3. Clearly communicate the reasoning behind your diagnosis, referencing both sources.
-    4. Always maintain a helpful, step-by-step approach and ensure scientific accuracy.
+    1. Compare the two search results, synthesizing a unified diagnosis and advice.
+    2. Clearly communicate the reasoning behind your diagnosis, referencing both sources.
+    3. Always maintain a helpful, step-by-step approach and ensure scientific accuracy.
     """,
-    tools=[vector_db_tool, google_search_tool],
-) 
\ No newline at end of file
+)
+
+crop_care_agent = SequentialAgent(
+    name="crop_care_agent",
+    sub_agents=[
+        crop_care_search_agent,
+        crop_care_aggregator_agent
+    ],
+    description="Agent for comprehensive crop disease diagnosis, aggregating results from both a vector database and Google Search, and providing actionable advice.",
+)
@@ -9,7 +9,7 @@ except ImportError:
     import mock_google_adk
     from google.adk.agents import Agent
 
-from tools.crop_tools import firebase_disease_search
+from tools.crop_tools import firebase_disease_search, vector_disease_search
 
 database_search_agent = Agent(
     name="database_search_agent",
@@ -20,7 +20,7 @@ database_search_agent = Agent(
 
     **Your Capabilities:**
     1. Accept user input including crop, symptoms, affected crop part, and location.
-    2. Query the Firebase database for the most similar entry using vector similarity search.
+    2. Query the local vector index with `vector_disease_search` for the most similar entry using vector similarity search. Use `firebase_disease_search` as a keyword cross-check when the user names specific visual indicators.
     3. If the similarity score is above a set threshold, return the matching disease object with all relevant details.
     4. If no match is found above the threshold, return None and suggest the user provide more details or a clearer image.
 
@@ -30,5 +30,7 @@ database_search_agent = Agent(
 
     Always provide clear, concise, and actionable results. If uncertain, ask for more information.
     """,
-    tools=[firebase_disease_search],
+    # Stored in session state for crop_care_aggregator_agent
+    output_key="database_search_result",
+    tools=[vector_disease_search, firebase_disease_search],
 )
\ No newline at end of file
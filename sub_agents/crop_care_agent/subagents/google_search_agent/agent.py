@@ -30,5 +30,7 @@ google_search_agent = Agent(
 
     Always provide clear, actionable, and well-reasoned results. If uncertain, ask for more information.
     """,
+    # Stored in session state for crop_care_aggregator_agent
+    output_key="google_search_result",
     tools=[google_search],
 ) 
\ No newline at end of file
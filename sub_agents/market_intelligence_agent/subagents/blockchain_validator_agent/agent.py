@@ -1,5 +1,9 @@
 from google.adk.agents import Agent
-from multiAgenticAgri.tools.market_tools import submit_price_to_blockchain, detect_price_anomalies
+from multiAgenticAgri.tools.market_tools import (
+    detect_price_anomalies,
+    get_price_submission_proof,
+    submit_price_to_blockchain,
+)
 
 blockchain_validator_agent = Agent(
     name="blockchain_validator_agent",
@@ -18,6 +22,7 @@ blockchain_validator_agent = Agent(
     **Available Tools:**
     - `submit_price_to_blockchain()`: Record validated prices on blockchain
     - `detect_price_anomalies()`: Detect potential price manipulation
+    - `get_price_submission_proof()`: Prove a recorded submission is in the ledger
 
     **Validation Process:**
     1. Cross-check submitted prices with official sources
@@ -36,5 +41,5 @@ blockchain_validator_agent = Agent(
 
     Ensure data integrity and maintain trust in the community-driven price system.
     """,
-    tools=[submit_price_to_blockchain, detect_price_anomalies],
+    tools=[submit_price_to_blockchain, detect_price_anomalies, get_price_submission_proof],
 ) 
\ No newline at end of file
@@ -1,5 +1,9 @@
 from google.adk.agents import Agent
-from multiAgenticAgri.tools.market_tools import fetch_mandi_prices, validate_community_price
+from multiAgenticAgri.tools.market_tools import (
+    fetch_mandi_prices,
+    validate_community_price,
+    validate_community_price_file,
+)
 
 price_collector_agent = Agent(
     name="price_collector_agent",
@@ -18,6 +22,7 @@ price_collector_agent = Agent(
     **Available Tools:**
     - `fetch_mandi_prices()`: Fetch real-time prices from official mandi APIs
     - `validate_community_price()`: Validate community-submitted price data
+    - `validate_community_price_file()`: Validate a whole uploaded CSV of community price submissions
 
     **Data Sources:**
     - Government agricultural portals
@@ -35,5 +40,5 @@ price_collector_agent = Agent(
 
     Provide comprehensive price data for informed selling decisions.
     """,
-    tools=[fetch_mandi_prices, validate_community_price],
+    tools=[fetch_mandi_prices, validate_community_price, validate_community_price_file],
 ) 
\ No newline at end of file
@@ -1,5 +1,5 @@
 from google.adk.agents import Agent
-from multiAgenticAgri.tools.market_tools import calculate_selling_recommendations
+from multiAgenticAgri.tools.market_tools import calculate_selling_recommendations, plan_fpo_sales
 
 recommendation_engine_agent = Agent(
     name="recommendation_engine_agent",
@@ -16,7 +16,8 @@ recommendation_engine_agent = Agent(
     5. **Risk Mitigation**: Suggest strategies to minimize market risks
 
     **Available Tools:**
-    - `calculate_selling_recommendations()`: Generate selling recommendations
+    - `calculate_selling_recommendations()`: Generate selling recommendations (best mandis by net realisation after transport)
+    - `plan_fpo_sales()`: Plan mandis and timing for all members of a farmer producer organisation at once
 
     **Session State Context:**
     Access weather information from the user's session state which includes current {weather}, {weather_disc}, {precipitation}, {humidity}, {windspeed} and {location}.
@@ -32,5 +33,5 @@ recommendation_engine_agent = Agent(
 
     Provide actionable selling recommendations for maximum profitability.
     """,
-    tools=[calculate_selling_recommendations],
+    tools=[calculate_selling_recommendations, plan_fpo_sales],
 )
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Checks for the semantic answer cache
+A shared FAQ answer must only be served to sessions whose templated state
+(weather, location, ...) matches the one it was produced with, short or
+contextual follow-ups must never be cached, and a cached answer must still be
+recorded in the session like an agent run. Run with: python test_answer_cache.py
+"""
+
+import asyncio
+
+from google.genai import types
+
+from agent import root_agent
+from answer_cache import SemanticAnswerCache, instruction_state_keys
+from utils import call_agent_async
+
+APP = "Agricultural Support"
+FAQ = "faq_support_agent"
+QUESTION = "How do I reset my password in the app?"
+PUNE = {"user_name": "Ramesh", "location": "Pune", "weather": "Sunny"}
+NAGPUR = {"user_name": "Sita", "location": "Nagpur", "weather": "Rainy"}
+
+
+def test_shared_answers_follow_templated_state():
+    """Another user gets a shared answer only when the state the instructions template in matches"""
+    keys = instruction_state_keys(root_agent)
+    assert "location" in keys and "weather" in keys and "user_name" not in keys
+
+    cache = SemanticAnswerCache(shared_state_keys=keys)
+    cache.put(APP, "ramesh", "s1", QUESTION, FAQ, "Sunny in Pune today, so...", state=PUNE)
+    assert cache.get(APP, "sita", "s2", QUESTION, state=NAGPUR) is None
+    assert cache.get(APP, "sita", "s2", QUESTION) is None
+    neighbour = dict(PUNE, user_name="Ganesh")
+    assert cache.get(APP, "ganesh", "s3", QUESTION, state=neighbour) is not None
+    assert cache.get(APP, "ganesh", "s3", "how can i reset my app password", state=neighbour) is not None
+
+    # The same question from the other state is cached alongside, not over, the first answer
+    cache.put(APP, "sita", "s2", QUESTION, FAQ, "Rain in Nagpur today, so...", state=NAGPUR)
+    assert cache.get(APP, "sita", "s4", QUESTION, state=NAGPUR)[1].startswith("Rain in Nagpur")
+    assert cache.get(APP, "ganesh", "s3", QUESTION, state=neighbour)[1].startswith("Sunny in Pune")
+    print("✅ Shared answers are only served to sessions with the same templated state")
+
+
+def test_follow_ups_not_cached():
+    """Short and contextual follow-ups are neither stored nor answered from the cache"""
+    cache = SemanticAnswerCache()
+    for query in ("yes", "yes please", "tell me more", "what about that one", "ok do it"):
+        cache.put(APP, "ramesh", "s1", query, FAQ, "Here is how to apply for PM-KISAN...")
+    for query in ("yes", "yes please", "Yes, please!", "tell me more", "ok do it"):
+        assert cache.get(APP, "ramesh", "s1", query) is None, query
+    assert cache.stats()["shared_entries"] == 0
+
+    cache.put(APP, "ramesh", "s1", QUESTION, FAQ, "Open Settings, then Account...")
+    assert cache.get(APP, "ramesh", "s1", QUESTION) is not None
+    print("✅ Follow-up queries bypass the cache")
+
+
+class _Event:
+    id = "faq-event"
+    author = FAQ
+    partial = False
+    error_code = None
+
+    def __init__(self, text):
+        self.content = types.Content(role="model", parts=[types.Part(text=text)])
+
+    def is_final_response(self):
+        return True
+
+
+class _Agent:
+    name = "root_agent"
+
+
+class _Runner:
+    app_name = APP
+    agent = _Agent()
+
+    def __init__(self):
+        self.runs = 0
+
+    async def run_async(self, user_id, session_id, new_message):
+        self.runs += 1
+        yield _Event(f"Answer for {user_id}")
+
+
+class _SessionService:
+    """Records what call_agent_async writes for each session"""
+
+    def __init__(self, states):
+        self.states = states
+        self.turns = []
+        self.history = []
+
+    async def get_session_state(self, *, app_name, user_id, session_id):
+        return self.states.get(session_id)
+
+    async def record_turn(self, *, app_name, user_id, session_id, query, author, response):
+        self.turns.append((session_id, query, author, response))
+
+    async def append_history(self, app_name, user_id, session_id, entry):
+        self.history.append((session_id, entry))
+
+
+def test_cache_hit_recorded_in_session():
+    """A cached answer adds the user's turn and the reply to the session, without running the agent"""
+    runner = _Runner()
+    sessions = _SessionService({"s1": PUNE, "s2": dict(PUNE, user_name="Ganesh"), "s3": NAGPUR})
+    cache = SemanticAnswerCache(shared_state_keys=instruction_state_keys(root_agent))
+
+    async def ask(user_id, session_id):
+        return await call_agent_async(runner, user_id, session_id, QUESTION, sessions, answer_cache=cache)
+
+    assert asyncio.run(ask("ramesh", "s1")) == "Answer for ramesh"
+    assert sessions.turns == []
+    assert asyncio.run(ask("ganesh", "s2")) == "Answer for ramesh"
+    assert runner.runs == 1
+    assert sessions.turns == [("s2", QUESTION, FAQ, "Answer for ramesh")]
+    assert sessions.history[-1] == ("s2", {"action": "agent_response", "agent": FAQ, "response": "Answer for ramesh"})
+
+    assert asyncio.run(ask("sita", "s3")) == "Answer for sita"
+    assert runner.runs == 2
+    print("✅ Cached answers are recorded in the session")
+
+
+if __name__ == "__main__":
+    test_shared_answers_follow_templated_state()
+    test_follow_ups_not_cached()
+    test_cache_hit_recorded_in_session()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Load test for the Agricultural Multi-Agent API
+Fires concurrent requests at a running server and reports latency percentiles.
+Run this after starting the API server with: python api_server.py
+
+    python test_load_api.py [concurrency]
+"""
+
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+try:
+    import pytest
+except ImportError:
+    pytest = None
+
+# API base URL
+BASE_URL = "http://localhost:8000"
+USER_ID = "load_test_farmer"
+CONCURRENCY = 200
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def run_concurrently(label, request_fn, concurrency):
+    """Run request_fn concurrently and print latency percentiles in ms"""
+    def timed(i):
+        start = time.perf_counter()
+        try:
+            ok = request_fn(i).status_code == 200
+        except requests.RequestException:
+            ok = False
+        return (time.perf_counter() - start) * 1000, ok
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed, range(concurrency)))
+    wall = time.perf_counter() - wall_start
+
+    latencies = sorted(latency for latency, _ in results)
+    failures = sum(1 for _, ok in results if not ok)
+    print(f"\n📈 {label} ({concurrency} concurrent)")
+    print(f"   p50: {percentile(latencies, 50):8.1f} ms")
+    print(f"   p95: {percentile(latencies, 95):8.1f} ms")
+    print(f"   p99: {percentile(latencies, 99):8.1f} ms")
+    print(f"   max: {latencies[-1]:8.1f} ms")
+    print(f"   throughput: {concurrency / wall:.1f} req/s, failures: {failures}")
+
+
+def test_load(concurrency=CONCURRENCY):
+    """Measure p99 latency of session reads and agent queries under load"""
+
+    print("🌾 Load testing Agricultural Multi-Agent API")
+    print("=" * 50)
+
+    session_data = {
+        "app_name": "Agricultural Support",
+        "user_id": USER_ID,
+        "initial_state": {
+            "user_name": "Load Test Farmer",
+            "weather": "sunny",
+            "weather_disc": "clear",
+            "precipitation": "0mm",
+            "humidity": "50%",
+            "windspeed": "10km/h",
+            "location": "Punjab"
+        }
+    }
+
+    try:
+        response = requests.post(f"{BASE_URL}/session/create", json=session_data)
+        response.raise_for_status()
+        session_id = response.json()["session_id"]
+    except requests.RequestException as e:
+        message = f"Could not create session (is the server running on {BASE_URL}?): {e}"
+        if pytest is not None and __name__ != "__main__":
+            # Collected by pytest without a live server: report a skip, not a pass
+            pytest.skip(message)
+        print(f"❌ {message}")
+        return
+
+    run_concurrently(
+        "GET /session/{user_id}/{session_id}",
+        lambda i: requests.get(f"{BASE_URL}/session/{USER_ID}/{session_id}"),
+        concurrency,
+    )
+    run_concurrently(
+        "POST /agent/query",
+        lambda i: requests.post(
+            f"{BASE_URL}/agent/query",
+            json={"user_id": USER_ID, "session_id": session_id, "query": f"Hello #{i}"},
+        ),
+        concurrency,
+    )
+
+
+if __name__ == "__main__":
+    test_load(int(sys.argv[1]) if len(sys.argv) > 1 else CONCURRENCY)
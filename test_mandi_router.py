@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Checks for mandi selection over the road-distance graph
+The cached mandi distances must equal all-pairs shortest paths, the on-disk
+cache must follow edits to the graph, and an FPO plan must rank each member's
+mandis exactly as a single-seller lookup does. Run with: python test_mandi_router.py
+"""
+
+import csv
+import os
+import shutil
+import tempfile
+from datetime import date
+
+import numpy as np
+
+from tools.mandi_router import MandiSelector, RoadNetwork, generate_mock_network
+from tools.market_tools import calculate_selling_recommendations
+from tools.price_store import generate_mock_store
+
+END = date(2026, 3, 31)
+CROP = "Wheat"
+
+
+def _floyd_warshall(network):
+    """(node x mandi) shortest road km by brute force, with the haul limit applied"""
+    n = len(network.nodes)
+    km = np.full((n, n), np.inf)
+    np.fill_diagonal(km, 0)
+    for a, b, d in network.edges:
+        km[a, b] = km[b, a] = min(km[a, b], d)
+    for k in range(n):
+        km = np.minimum(km, km[:, k, None] + km[None, k, :])
+    km = km[:, network.mandi_nodes]
+    return np.where(km <= network.max_haul_km, km, np.inf)
+
+
+def test_distances_match_shortest_paths():
+    """One Dijkstra per mandi gives the same matrix as all-pairs shortest paths"""
+    for max_haul_km in (800.0, 250.0):
+        network = generate_mock_network(max_haul_km=max_haul_km)
+        np.testing.assert_allclose(network.distances, _floyd_warshall(network), rtol=1e-5)
+    print("✅ Cached mandi distances match all-pairs shortest paths")
+
+
+def _write_graph(directory, network, scale=1.0):
+    with open(os.path.join(directory, "nodes.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "kind", "district", "state"])
+        writer.writerows([n["name"], n["kind"], n["district"], n["state"]] for n in network.nodes)
+    with open(os.path.join(directory, "edges.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["from", "to", "km"])
+        names = [f"{n['name']}, {n['district']}" for n in network.nodes]
+        writer.writerows([names[a], names[b], km * scale] for a, b, km in network.edges)
+
+
+def test_distance_cache_follows_graph():
+    """A saved matrix is reused for the same graph and rebuilt when edges or the haul limit change"""
+    network = generate_mock_network()
+    directory = tempfile.mkdtemp()
+    try:
+        _write_graph(directory, network)
+        first = RoadNetwork.from_directory(directory)
+        reloaded = RoadNetwork.from_directory(directory)
+        assert isinstance(reloaded.distances, np.memmap)
+        np.testing.assert_array_equal(reloaded.distances, first.distances)
+
+        _write_graph(directory, network, scale=2.0)
+        longer = RoadNetwork.from_directory(directory)
+        reachable = np.isfinite(longer.distances) & np.isfinite(first.distances)
+        np.testing.assert_allclose(longer.distances[reachable], 2 * first.distances[reachable], rtol=1e-5)
+
+        shorter_haul = RoadNetwork.from_directory(directory, max_haul_km=200.0)
+        assert np.all(np.isinf(shorter_haul.distances[shorter_haul.distances > 200]))
+        assert len([name for name in os.listdir(directory) if name.endswith(".npy")]) == 3
+        print("✅ Distance cache is keyed on the graph and haul limit")
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_fpo_plan_matches_single_seller():
+    """plan_batch ranks each member's mandis like top_mandis and skips unusable members"""
+    selector = MandiSelector(generate_mock_network(), generate_mock_store(days=30, end=END))
+    members = [
+        {"member_id": "a", "location": "Samrala", "quantity": 40},
+        {"member_id": "b", "location": "Assandh", "quantity": 250},
+        {"member_id": "c", "location": "Nabha", "quantity": "75"},
+        {"member_id": "d", "location": "Samrala", "quantity": "40 quintals"},
+        {"member_id": "e", "location": "Atlantis", "quantity": 10},
+        {"member_id": "f", "location": "Moga", "quantity": 0},
+    ]
+    plan = selector.plan_batch(CROP, members, top=3)
+    assert plan["unresolved"] == ["d", "e", "f"]
+    assert [m["member_id"] for m in plan["members"]] == ["a", "b", "c"]
+    for member, planned in zip(members, plan["members"]):
+        single = selector.top_mandis(CROP, float(member["quantity"]), member["location"], top=3)
+        assert planned["mandis"] == single
+    assert plan["common_mandi"] is not None
+    print("✅ FPO plan matches single-seller rankings")
+
+
+def test_selling_recommendations_reject_bad_quantity():
+    """Zero, negative and non-numeric quantities get an error instead of a ranking"""
+    for quantity in (0, -5, "forty", None, float("nan")):
+        result = calculate_selling_recommendations(CROP, quantity, "Samrala", "A")
+        assert result["status"] == "error", quantity
+    assert calculate_selling_recommendations(CROP, 40, "Samrala", "A")["status"] == "success"
+    print("✅ Selling recommendations reject unusable quantities")
+
+
+def test_nearest_mandi_is_closest_quoted():
+    """nearest_mandi is the closest reachable mandi with a price, even outside the top ranking"""
+    network = generate_mock_network()
+    selector = MandiSelector(network, generate_mock_store(days=30, end=END))
+    for location in ("Samrala", "Assandh", "Nabha", "Azadpur"):
+        nearest = selector.nearest_mandi(CROP, 40, location)
+        distances = np.asarray(network.distances[network.resolve(location)], dtype=np.float64)
+        quoted = np.isfinite(distances) & np.isfinite(selector.market(CROP)["price"])
+        column = int(np.flatnonzero(quoted)[np.argmin(distances[quoted])])
+        assert nearest["mandi"] == network.nodes[network.mandi_nodes[column]]["name"]
+        assert nearest["distance_km"] == round(float(distances[column]), 1)
+        ranked = selector.top_mandis(CROP, 40, location, top=len(network.mandi_nodes))
+        assert nearest in ranked
+        assert nearest["distance_km"] == min(m["distance_km"] for m in ranked)
+    assert selector.nearest_mandi(CROP, 40, "Atlantis") is None
+    print("✅ Nearest mandi is the closest reachable one with a price")
+
+
+if __name__ == "__main__":
+    test_distances_match_shortest_paths()
+    test_distance_cache_follows_graph()
+    test_fpo_plan_matches_single_seller()
+    test_selling_recommendations_reject_bad_quantity()
+    test_nearest_mandi_is_closest_quoted()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Checks for the agent metrics derived from traces
+A runner whose sub-agent raises must count one agent error for that agent,
+and a run that completes must count none. Run with: python test_metrics.py
+"""
+
+import asyncio
+
+from metrics import ServiceMetrics
+from tracing import Tracer
+from utils import run_agent_query
+
+
+class _Event:
+    def __init__(self, author, error_code=None):
+        self.id = f"{author}-event"
+        self.author = author
+        self.content = None
+        self.partial = False
+        self.error_code = error_code
+
+    def is_final_response(self):
+        return False
+
+
+class _Agent:
+    name = "root_agent"
+
+
+class _Runner:
+    """Yields an event from each listed author, then raises if asked to"""
+
+    app_name = "Agricultural Support"
+    agent = _Agent()
+
+    def __init__(self, authors, error=None):
+        self.authors = authors
+        self.error = error
+
+    async def run_async(self, user_id, session_id, new_message):
+        for author in self.authors:
+            yield author if isinstance(author, _Event) else _Event(author)
+        if self.error is not None:
+            raise self.error
+
+
+def _run(metrics, runner):
+    tracer = Tracer()
+    tracer.add_listener(metrics.observe_span)
+
+    async def query():
+        _, token = tracer.start_trace()
+        try:
+            return await run_agent_query(runner, "farmer", "session", "How is my wheat?")
+        finally:
+            tracer.end_trace(token)
+
+    try:
+        asyncio.run(query())
+    except RuntimeError:
+        pass
+
+
+def test_agent_errors_counted():
+    """agent_errors increments for the sub-agent that was running when the run failed"""
+    metrics = ServiceMetrics()
+    _run(metrics, _Runner(["root_agent", "weather_agent"]))
+    assert metrics.agent_errors.values() == {}
+    assert metrics.agent_runs.values() == {("root_agent",): 1, ("weather_agent",): 1}
+
+    _run(metrics, _Runner(["root_agent", "weather_agent"], error=RuntimeError("model unavailable")))
+    assert metrics.agent_errors.values() == {("weather_agent",): 1}
+
+    # Failing before any event is charged to the runner's root agent
+    _run(metrics, _Runner([], error=RuntimeError("model unavailable")))
+    assert metrics.agent_errors.values() == {("weather_agent",): 1, ("root_agent",): 1}
+
+    # Model errors reported as events count too
+    _run(metrics, _Runner([_Event("market_agent", error_code="RESOURCE_EXHAUSTED")]))
+    assert metrics.agent_errors.values()[("market_agent",)] == 1
+    print("✅ Sub-agent errors are counted per agent")
+
+
+if __name__ == "__main__":
+    test_agent_errors_counted()
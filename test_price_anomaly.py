@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Consistency check for the price anomaly detector
+The vectorized batch pass, the tick-by-tick streaming path and a backfill
+followed by streaming must flag the same ticks with the same anomaly types,
+and the live series behind detect_price_anomalies must follow prices merged
+into the store without a new backfill. Run with: python test_price_anomaly.py
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+
+from tools import market_tools, price_store
+from tools.market_tools import _daily_series, _series_location, detect_price_anomalies
+from tools.price_anomaly import ANOMALY_TYPES, PriceAnomalyDetector, price_anomaly_detector
+from tools.price_store import generate_mock_store, to_day
+
+SERIES = 200
+TICKS = 120
+
+
+def _random_series(rng, ticks=TICKS):
+    """A noisy price walk with injected spikes, drops, ramps and flat runs"""
+    prices = 2000 * np.exp(np.cumsum(rng.normal(0, 0.01, ticks)))
+    for _ in range(rng.integers(1, 4)):
+        t = rng.integers(10, ticks - 10)
+        kind = rng.integers(4)
+        if kind == 0:
+            prices[t] *= 1.4
+        elif kind == 1:
+            prices[t:t + 3] *= 1.3
+            prices[t + 3] *= 0.7
+        elif kind == 2:
+            prices[t:t + 8] *= np.linspace(1.02, 1.25, 8)
+        else:
+            prices[t:t + 9] = prices[t]
+    return np.round(prices, 0)
+
+
+def _batch_types(detector, prices):
+    flags = detector.detect_batch(prices)["flags"]
+    return [ANOMALY_TYPES[int(code)] if code else None for code in flags]
+
+
+def _stream_types(detector, prices, crop="wheat", location="karnal"):
+    types = []
+    for price in prices.tolist():
+        anomaly = detector.update(crop, location, price)
+        types.append(anomaly["type"] if anomaly else None)
+    return types
+
+
+def test_batch_matches_stream(series=SERIES, seed=7):
+    """detect_batch flags exactly the ticks the streaming path flags"""
+    rng = np.random.default_rng(seed)
+    flagged = 0
+    for _ in range(series):
+        prices = _random_series(rng)
+        window = int(rng.integers(5, 31))
+        expected = _stream_types(PriceAnomalyDetector(window=window), prices)
+        assert _batch_types(PriceAnomalyDetector(window=window), prices) == expected
+        flagged += sum(t is not None for t in expected)
+    print(f"✅ Batch and streaming agree on {series} series ({flagged} anomalies)")
+
+
+def test_backfill_then_stream(series=SERIES, seed=11):
+    """Streaming after a backfill continues exactly where the batch pass ended"""
+    rng = np.random.default_rng(seed)
+    for _ in range(series):
+        prices = _random_series(rng)
+        split = int(rng.integers(1, TICKS))
+        expected = _batch_types(PriceAnomalyDetector(), prices)
+
+        detector = PriceAnomalyDetector()
+        backfilled = detector.backfill("wheat", "karnal", prices[:split])
+        streamed = _stream_types(detector, prices[split:])
+        head = [a["type"] for a in backfilled]
+        assert head == [t for t in expected[:split] if t is not None]
+        assert streamed == expected[split:]
+    print(f"✅ Backfill followed by streaming matches one batch pass on {series} series")
+
+
+def test_supplied_prices_leave_shared_state_alone(seed=3):
+    """Analysing caller-supplied prices is repeatable and does not touch the shared detector"""
+    prices = _random_series(np.random.default_rng(seed)).tolist()
+    before = price_anomaly_detector.stats()
+    first = detect_price_anomalies(prices, "Wheat", "Karnal")
+    second = detect_price_anomalies(prices, "Wheat", "Karnal")
+    assert first["status"] == "success"
+    assert first == second
+    assert price_anomaly_detector.stats() == before
+
+    short = detect_price_anomalies(prices[:10], "Wheat", "Karnal")
+    assert short["status"] == "success" and "note" in short
+    print("✅ Supplied prices are analysed in isolation")
+
+
+def _append_day(store, crop, day, factors):
+    """One more day of prices for every mock mandi and grade, scaled per mandi name"""
+    latest = store.query(crop, start=day - 1, end=day - 1)
+    mandi = latest.mandi
+    scale = np.array([factors.get(store.mandis.names[code], 1.0) for code in mandi.tolist()])
+    store.append_columns(crop, mandi, np.full(len(mandi), day), latest.modal_price * scale,
+                         grade=latest.grade)
+
+
+def test_live_series_follow_merged_prices():
+    """Prices merged into the store feed the live series; only unseen series are backfilled"""
+    end = date(2026, 3, 31)
+    store = generate_mock_store(days=120, end=end)
+    detector = PriceAnomalyDetector()
+    previous = price_store._default_store, market_tools.price_anomaly_detector
+    price_store.set_price_store(store)
+    market_tools.price_anomaly_detector = detector
+    try:
+        karnal = detect_price_anomalies([], "Wheat", "Karnal")
+        punjab = detect_price_anomalies([], "Wheat", "Punjab")
+        assert karnal["ticks_analyzed"] == punjab["ticks_analyzed"] == 120
+        assert detector.stats()["series"] == 2
+        ticks = detector.stats()["ticks"]
+
+        _append_day(store, "Wheat", to_day(end) + 1, {"Karnal": 1.6})
+        karnal = detect_price_anomalies([], "Wheat", "Karnal")
+        punjab = detect_price_anomalies([], "Wheat", "Punjab")
+        # One tick per live series, no backfill
+        assert detector.stats()["ticks"] == ticks + 2
+        assert karnal["ticks_analyzed"] == punjab["ticks_analyzed"] == 121
+        latest = karnal["anomaly_details"][-1]
+        assert latest["type"] == "sudden_spike"
+        assert latest["date"] == (end + timedelta(days=1)).isoformat()
+        assert all(d["date"] != latest["date"] for d in punjab["anomaly_details"])
+
+        # The live series flags what one batch pass over the whole history flags
+        _append_day(store, "Wheat", to_day(end) + 2, {"Karnal": 0.6})
+        filters = {"mandi": store.resolve_location("Karnal")[1]}
+        location = _series_location(store, filters)
+        store.latest_day("Wheat")
+        series = store.recent("Wheat", days=365, **filters)
+        expected = PriceAnomalyDetector().backfill("Wheat", location, *_daily_series(series.day, series.modal_price))
+        live = detector.snapshot("Wheat", location)["anomalies"]
+        assert [(a["type"], a["day"]) for a in live] == [(a["type"], a["day"]) for a in expected]
+
+        # Series of other crops and locations are not started by merges
+        assert detector.stats()["series"] == 2
+    finally:
+        price_store.set_price_store(previous[0])
+        market_tools.price_anomaly_detector = previous[1]
+    print("✅ Live anomaly series follow merged prices without a new backfill")
+
+
+if __name__ == "__main__":
+    test_batch_matches_stream()
+    test_backfill_then_stream()
+    test_supplied_prices_leave_shared_state_alone()
+    test_live_series_follow_merged_prices()
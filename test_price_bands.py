@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Consistency checks for the reference price band index
+The vectorized scorer must agree with the scalar one, an incremental refresh
+must build the same bands as a full rebuild, and validate_batch must agree
+with validate row by row. Run with: python test_price_bands.py
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+
+from tools.price_bands import BAND_QUANTILES, ReferenceBandIndex, _score_one, band_scores
+from tools.price_store import _MOCK_MANDIS, generate_mock_store, to_day
+
+END = date(2026, 3, 31)
+CROP = "Wheat"
+
+
+def test_band_scores_match_scalar(samples=20000, seed=5):
+    """band_scores gives the same score as _score_one for every price"""
+    rng = np.random.default_rng(seed)
+    median = rng.uniform(500, 8000, samples)
+    offsets = np.sort(rng.uniform(-0.3, 0.3, (samples, len(BAND_QUANTILES))), axis=1)
+    bands = median[:, None] * (1 + offsets)
+    low = bands[:, 0] * rng.uniform(0.7, 1.0, samples)
+    high = bands[:, -1] * rng.uniform(1.0, 1.3, samples)
+    prices = median * rng.uniform(0.3, 1.7, samples)
+
+    vectorized = band_scores(prices, bands, low, high)
+    scalar = np.array([_score_one(p, q, lo, hi) for p, q, lo, hi in zip(prices, bands, low, high)])
+    np.testing.assert_allclose(vectorized, scalar, rtol=1e-12)
+    assert np.isnan(band_scores([2000.0], np.full((1, len(BAND_QUANTILES)), np.nan), [np.nan], [np.nan])[0])
+    print(f"✅ Vectorized and scalar scores agree on {samples} prices")
+
+
+def _append_days(store, first_day, days, seed):
+    rng = np.random.default_rng(seed)
+    mandis = np.array([store.mandis.get(mandi) for _, _, mandi in _MOCK_MANDIS], dtype=np.int32)
+    grid_days, grid_mandis = np.meshgrid(np.arange(first_day, first_day + days), mandis, indexing="ij")
+    modal = np.round(2200 * rng.uniform(0.85, 1.15, grid_days.shape), 0)
+    store.append_columns(CROP, grid_mandis.ravel(), grid_days.ravel(), modal.ravel(),
+                         min_price=(modal * 0.95).ravel(), max_price=(modal * 1.05).ravel())
+
+
+def test_incremental_refresh_matches_rebuild():
+    """Bands refreshed after new prices arrive equal bands built from scratch"""
+    store = generate_mock_store(days=120, end=END)
+    incremental = ReferenceBandIndex(store)
+    incremental.refresh(CROP)
+
+    # New days, plus a late correction to a day that is already indexed
+    _append_days(store, to_day(END) + 1, 10, seed=1)
+    _append_days(store, to_day(END) - 3, 1, seed=2)
+    incremental.refresh(CROP, since=END - timedelta(days=3))
+    rebuilt = ReferenceBandIndex(store)
+    rebuilt.refresh(CROP)
+
+    for old, new in zip(incremental._bands(CROP).levels, rebuilt._bands(CROP).levels):
+        np.testing.assert_array_equal(old.keys, new.keys)
+        np.testing.assert_array_equal(old.quantiles, new.quantiles)
+        np.testing.assert_array_equal(old.low, new.low)
+        np.testing.assert_array_equal(old.high, new.high)
+        np.testing.assert_array_equal(old.counts, new.counts)
+    print("✅ Incremental refresh matches a full rebuild")
+
+
+def test_validate_batch_matches_validate(submissions=500, seed=9):
+    """validate_batch picks the same band and score as validate for each submission"""
+    rng = np.random.default_rng(seed)
+    store = generate_mock_store(days=120, end=END)
+    index = ReferenceBandIndex(store)
+    places = [mandi for _, _, mandi in _MOCK_MANDIS] + [district for _, district, _ in _MOCK_MANDIS]
+    places += ["Punjab", "Maharashtra", "Nowhere"]
+    locations = rng.choice(places, submissions)
+    dates = [(END - timedelta(days=int(d))).isoformat() for d in rng.integers(-5, 60, submissions)]
+    prices = np.round(2200 * rng.uniform(0.5, 1.5, submissions), 0)
+
+    batch = index.validate_batch(CROP, locations, prices, dates)
+    for i in range(submissions):
+        single = index.validate(CROP, locations[i], prices[i], dates[i])
+        if single["band"] is None:
+            assert batch["level"][i] is None and np.isnan(batch["score"][i])
+            continue
+        assert batch["level"][i] == single["band"]["level"]
+        # validate reports the band rounded to paise, so scores may differ in the last digits
+        assert abs(batch["score"][i] - single["validation_score"]) < 5e-3
+        if abs(single["validation_score"] - 0.5) > 5e-3:
+            assert bool(batch["is_authentic"][i]) == single["is_authentic"]
+    print(f"✅ validate_batch agrees with validate on {submissions} submissions")
+
+
+if __name__ == "__main__":
+    test_band_scores_match_scalar()
+    test_incremental_refresh_matches_rebuild()
+    test_validate_batch_matches_validate()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Checks for the batched price ledger
+Concurrent submissions all commit with valid Merkle inclusion proofs, a reopened
+ledger rebuilds the same chain and points, altered entries are caught by verify,
+and a failed block write leaves the file loadable. Run with: python test_price_ledger.py
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from tools.price_ledger import PriceLedger, verify_proof
+
+WRITERS = 8
+SUBMISSIONS_PER_WRITER = 50
+BLOCK_SIZE = 16
+
+
+def _submit_all(ledger):
+    def writer(writer_id):
+        return [
+            ledger.submit(f"farmer_{writer_id}", "wheat", 2000 + i, "Karnal")["transaction_hash"]
+            for i in range(SUBMISSIONS_PER_WRITER)
+        ]
+
+    with ThreadPoolExecutor(max_workers=WRITERS) as executor:
+        return [leaf for leaves in executor.map(writer, range(WRITERS)) for leaf in leaves]
+
+
+def test_proofs_and_reload():
+    """Every submission gets a verifiable proof, before and after reopening the file"""
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "ledger.jsonl")
+    try:
+        ledger = PriceLedger(path=path, block_size=BLOCK_SIZE, flush_interval=0)
+        leaves = _submit_all(ledger)
+        ledger.flush()
+        assert len(set(leaves)) == WRITERS * SUBMISSIONS_PER_WRITER
+        for leaf in leaves:
+            proof = ledger.proof(leaf)
+            assert ledger.status(leaf) == "committed"
+            assert ledger.block_number(leaf) == proof["block_number"]
+            assert verify_proof(leaf, proof["proof"], proof["merkle_root"])
+            assert not verify_proof(leaf, proof["proof"], "0" * 64)
+        stats = ledger.stats()
+        points = ledger.contributor("farmer_0")
+        ledger.close()
+
+        reopened = PriceLedger(path=path, block_size=BLOCK_SIZE, flush_interval=0)
+        assert reopened.stats() == stats
+        assert reopened.contributor("farmer_0") == points
+        assert reopened.verify() == stats["blocks"]
+        proof = reopened.proof(leaves[-1])
+        assert verify_proof(leaves[-1], proof["proof"], proof["merkle_root"])
+        reopened.close()
+        print(f"✅ {len(leaves)} concurrent submissions committed in {stats['blocks']} blocks with valid proofs")
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_tampering_detected():
+    """Changing a recorded price breaks verify"""
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "ledger.jsonl")
+    try:
+        ledger = PriceLedger(path=path, block_size=4, flush_interval=0)
+        for i in range(10):
+            ledger.submit("farmer", "onion", 1500 + i, "Lasalgaon")
+        ledger.close()
+
+        with open(path, encoding="utf-8") as f:
+            lines = f.readlines()
+        block = json.loads(lines[1])
+        block["entries"][0]["price"] = 9999.0
+        lines[1] = json.dumps(block, separators=(",", ":")) + "\n"
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+
+        ledger = PriceLedger(path=path, block_size=4, flush_interval=0)
+        try:
+            ledger.verify()
+        except ValueError as e:
+            assert "block 1" in str(e)
+        else:
+            raise AssertionError("altered submission was not detected")
+        ledger.close()
+        print("✅ Altered submission detected")
+    finally:
+        shutil.rmtree(directory)
+
+
+class _FailingFile:
+    """Wraps the ledger file and fails the second write after a partial first write"""
+
+    def __init__(self, file):
+        self.file = file
+        self.writes = 0
+
+    def write(self, data):
+        self.writes += 1
+        if self.writes > 1:
+            raise OSError("disk full")
+        return self.file.write(data[:100])
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+
+def test_failed_write_leaves_file_loadable():
+    """A block write that fails partway is rolled back and retried on the next flush"""
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "ledger.jsonl")
+    try:
+        ledger = PriceLedger(path=path, block_size=4, flush_interval=0)
+        for i in range(4):
+            ledger.submit("farmer", "rice", 3000 + i, "Raipur")
+        size = os.path.getsize(path)
+
+        leaf = ledger.submit("farmer", "rice", 3100, "Raipur")["transaction_hash"]
+        real_file = ledger._file
+        ledger._file = _FailingFile(real_file)
+        try:
+            ledger.flush()
+        except OSError:
+            pass
+        else:
+            raise AssertionError("write failure was not raised")
+        ledger._file = real_file
+        assert os.path.getsize(path) == size
+        assert ledger.status(leaf) == "pending"
+
+        ledger.flush()
+        ledger.close()
+        reopened = PriceLedger(path=path, block_size=4, flush_interval=0)
+        assert reopened.status(leaf) == "committed"
+        assert reopened.verify() == 2
+        reopened.close()
+        print("✅ Failed block write rolled back and retried")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    test_proofs_and_reload()
+    test_tampering_detected()
+    test_failed_write_leaves_file_loadable()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Consistency check for incremental merges in the mandi price store
+Random sequences of appends (new days, late rows and corrections) must leave
+the store holding exactly what a last-write-wins replay of every row gives,
+series returned by earlier queries must not change underneath their
+callers, the price listing must show each mandi once, and markets with the
+same name in different districts must stay apart. Run with:
+python test_price_store.py
+"""
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from tools import price_store
+from tools.market_tools import fetch_mandi_prices
+from tools.price_store import MandiPriceStore
+
+CROP = "Wheat"
+TRIALS = 100
+
+
+def _expected(rows):
+    """Last write wins per (day, mandi, grade), sorted the way the store sorts"""
+    latest = {}
+    for day, mandi, grade, price in rows:
+        latest[(day, mandi, grade)] = price
+    keys = sorted(latest)
+    return np.array([k[0] for k in keys]), np.array([k[1] for k in keys]), np.array([latest[k] for k in keys])
+
+
+def test_merge_matches_replay(trials=TRIALS, seed=3):
+    """Appends, late rows and corrections merge to the last-write-wins result"""
+    rng = np.random.default_rng(seed)
+    for _ in range(trials):
+        store = MandiPriceStore()
+        mandis = [store.mandi_code(f"Mandi {i}", "District", "State") for i in range(5)]
+        rows, snapshots = [], []
+        last_day = 20000
+        for _ in range(rng.integers(2, 8)):
+            n = int(rng.integers(1, 40))
+            if rng.random() < 0.6:
+                # New days after everything stored
+                days = last_day + rng.integers(1, 5, n)
+            else:
+                # Late rows and corrections to days already stored
+                days = rng.integers(20000, last_day + 2, n)
+            last_day = max(last_day, int(days.max()))
+            mandi = rng.choice(mandis, n)
+            prices = np.round(rng.uniform(1500, 2500, n), 0)
+            store.append_columns(CROP, mandi, days, prices)
+            rows += list(zip(days.tolist(), mandi.tolist(), [0] * n, prices.tolist()))
+
+            series = store.query(CROP)
+            snapshots.append((series, series.modal_price.copy()))
+            day, mandi_code, price = _expected(rows)
+            np.testing.assert_array_equal(series.day, day)
+            np.testing.assert_array_equal(series.mandi, mandi_code)
+            np.testing.assert_array_equal(series.modal_price, price.astype(np.float32))
+
+        for series, prices in snapshots:
+            np.testing.assert_array_equal(series.modal_price, prices)
+    print(f"✅ Incremental merges match a last-write-wins replay over {trials} random histories")
+
+
+def test_listing_shows_each_mandi_once():
+    """With no rows of the requested grade, one grade is listed and each mandi appears once"""
+    store = MandiPriceStore()
+    day = 20500
+    for mandi, base in (("Karnal", 2100), ("Hisar", 2050)):
+        for grade, factor in (("FAQ", 1.0), ("Medium", 0.9)):
+            store.append(CROP, mandi, day, base * factor, grade=grade, district=mandi, state="Haryana")
+
+    previous = price_store._default_store
+    price_store.set_price_store(store)
+    try:
+        result = fetch_mandi_prices("wheat", "Haryana", "A")
+    finally:
+        price_store.set_price_store(previous)
+    assert result["status"] == "success"
+    assert result["quality_grade"] in ("FAQ", "Medium") and "note" in result
+    assert result["mandis_reporting"] == 2
+    assert sorted(m["mandi"] for m in result["mandi_prices"]) == ["Hisar", "Karnal"]
+    print("✅ Price listing falls back to one grade and lists each mandi once")
+
+
+def test_namesake_mandis_stay_apart():
+    """Same-named markets in different districts get their own codes, locations and prices"""
+    store = MandiPriceStore()
+    bilaspur_hp = store.mandi_code("Bilaspur", "Bilaspur", "Himachal Pradesh")
+    bilaspur_cg = store.mandi_code("Bilaspur", "Bilaspur", "Chhattisgarh")
+    assert bilaspur_hp != bilaspur_cg
+    assert store.mandi_code(" bilaspur ", "BILASPUR", "Chhattisgarh") == bilaspur_cg
+    store.append_columns(CROP, [bilaspur_hp, bilaspur_cg], [20500, 20500], [2300.0, 2100.0])
+
+    assert store.resolve_location("Bilaspur, Chhattisgarh")[:2] == ("mandi", bilaspur_cg)
+    assert store.resolve_location("Bilaspur, Himachal Pradesh")[:2] == ("mandi", bilaspur_hp)
+    assert store.query(CROP, mandi=bilaspur_cg).modal_price.tolist() == [2100.0]
+    records = store.query(CROP).to_records()
+    assert sorted(r["state"] for r in records) == ["Chhattisgarh", "Himachal Pradesh"]
+
+    directory = tempfile.mkdtemp()
+    try:
+        reopened = MandiPriceStore.load(store.save(os.path.join(directory, "store")))
+        assert reopened.mandis.get("Bilaspur", "Chhattisgarh") == bilaspur_cg
+        assert reopened.mandi_code("Bilaspur", "Bilaspur", "Himachal Pradesh") == bilaspur_hp
+    finally:
+        shutil.rmtree(directory)
+    print("✅ Namesake mandis keep separate codes, locations and prices")
+
+
+if __name__ == "__main__":
+    test_merge_matches_replay()
+    test_listing_shows_each_mandi_once()
+    test_namesake_mandis_stay_apart()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Checks for the fast-path query router
+Clear-cut queries must go straight to the one specialist they name, while
+empty, weak, ambiguous or keyword-stuffed queries must stay with the LLM root
+agent, with every decision counted. Run with: python test_router.py
+"""
+
+from collections import Counter
+
+from agent import root_agent
+from router import QueryRouter, route_tokens
+
+FAST_PATH = {
+    "PM-Kisan eligibility": "govt_support_agent",
+    "Yellow spots on my wheat leaves": "crop_care_agent",
+    "How do I reset my app password?": "faq_support_agent",
+    "Which seed variety should I sow this kharif?": "crop_advisory_agent",
+}
+
+FALLBACK = {
+    "": "no_match",
+    "hello": "no_match",
+    "What should I do?": "no_match",
+    "my leaves": "low_score",
+    "buy fertilizer for wheat disease": "ambiguous",
+    # Repeating a word adds nothing, so it cannot outvote the other agent
+    "disease disease disease pest subsidy scheme": "ambiguous",
+}
+
+
+def test_route_tokens():
+    """Stopwords are dropped and plurals folded"""
+    assert route_tokens("What are the SPOTS on my leaves?") == ["spot", "leave"]
+    assert route_tokens("Subsidies for grass") == ["subsidy", "grass"]
+    assert route_tokens(None) == []
+    print("✅ Queries are tokenized for routing")
+
+
+def test_clear_queries_take_fast_path():
+    """A query that clearly names one specialist is routed straight to it"""
+    router = QueryRouter(root_agent)
+    for query, agent_name in FAST_PATH.items():
+        decision = router.route(query)
+        assert decision.fast_path, query
+        assert decision.agent_name == agent_name, (query, decision.to_dict())
+        assert decision.agent is next(a for a in root_agent.sub_agents if a.name == agent_name)
+        assert decision.confidence >= router.min_confidence and decision.score >= router.min_score
+    print(f"✅ {len(FAST_PATH)} clear-cut queries take the fast path")
+
+
+def test_unclear_queries_fall_back():
+    """Empty, weak and ambiguous queries stay with the root agent, and the reason is counted"""
+    router = QueryRouter(root_agent)
+    for query in FALLBACK:
+        decision = router.route(query)
+        assert not decision.fast_path, query
+        assert decision.agent is root_agent and decision.agent_name == root_agent.name
+
+    stats = router.stats()
+    assert stats["total"] == len(FALLBACK) and stats["fast_path"] == 0
+    assert stats["fallback_reasons"] == Counter(FALLBACK.values())
+
+    # Thresholds decide: the ambiguous query goes through once confidence is relaxed
+    relaxed = QueryRouter(root_agent, min_confidence=0.6)
+    assert relaxed.route("buy fertilizer for wheat disease").agent_name == "marketplace_agent"
+    assert relaxed.stats()["fast_path_by_agent"] == {"marketplace_agent": 1}
+    print("✅ Unclear queries fall back to the LLM router with the reason counted")
+
+
+if __name__ == "__main__":
+    test_route_tokens()
+    test_clear_queries_take_fast_path()
+    test_unclear_queries_fall_back()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the shared runner pool
+Compares the per-request cost of building a new Runner (old /agent/query behaviour)
+with fetching the shared runner from RunnerPool. Run with: python test_runner_pool.py
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from agent import root_agent
+from runner_pool import Runner, RunnerPool
+
+APP_NAME = "Agricultural Support"
+ITERATIONS = 10000
+
+
+def _per_call_us(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def test_runner_pool(iterations=ITERATIONS):
+    """Measure per-request runner overhead before and after pooling"""
+
+    print("🏃 Benchmarking per-request runner overhead")
+    print("=" * 50)
+
+    session_service = object()
+    pool = RunnerPool(agent=root_agent, session_service=session_service)
+    pool.warm_up(APP_NAME)
+
+    before = _per_call_us(
+        lambda: Runner(agent=root_agent, app_name=APP_NAME, session_service=session_service),
+        iterations,
+    )
+    after = _per_call_us(lambda: pool.get(APP_NAME), iterations)
+
+    print(f"   New Runner per request: {before:8.2f} µs/request")
+    print(f"   Shared pooled runner:   {after:8.2f} µs/request")
+    print(f"   Speedup:                {before / after:8.1f}x")
+
+    # Concurrent first access must still produce exactly one runner per app
+    fresh_pool = RunnerPool(agent=root_agent, session_service=session_service)
+    with ThreadPoolExecutor(max_workers=32) as executor:
+        runners = list(executor.map(lambda _: fresh_pool.get(APP_NAME), range(256)))
+    assert len({id(r) for r in runners}) == 1
+    assert len(fresh_pool) == 1
+    print("✅ Concurrent requests share a single runner")
+
+
+if __name__ == "__main__":
+    test_runner_pool()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Checks for the latest-session index
+After a restart the index must be seeded once per user from list_sessions,
+pick the most recently updated session whatever order the backend lists
+them in, follow new activity without listing again, and promote the next
+session when the latest one is deleted. Run with: python test_session_index.py
+"""
+
+import asyncio
+from datetime import datetime
+
+from async_session_service import AsyncSessionService
+from session_index import LatestSessionIndex, session_update_time
+
+APP = "Agricultural Support"
+
+
+class _AdkSession:
+    def __init__(self, id, last_update_time):
+        self.id = id
+        self.last_update_time = last_update_time
+
+
+class _MockSession:
+    def __init__(self, id, updated_at):
+        self.id = id
+        self.updated_at = updated_at
+
+
+class _Listing:
+    def __init__(self, sessions):
+        self.sessions = sessions
+
+
+class _SessionService:
+    """Lists fixed sessions per user and counts the calls"""
+
+    def __init__(self, sessions):
+        self.sessions = sessions
+        self.list_calls = 0
+
+    def list_sessions(self, *, app_name, user_id):
+        self.list_calls += 1
+        return _Listing(self.sessions.get(user_id, []))
+
+    def delete_session(self, *, app_name, user_id, session_id):
+        self.sessions[user_id] = [s for s in self.sessions[user_id] if s.id != session_id]
+
+
+class _HistoryStore:
+    def append(self, app_name, user_id, session_id, entry):
+        return 0
+
+    def delete(self, app_name, user_id, session_id):
+        pass
+
+
+def test_seed_picks_most_recent():
+    """Seeding takes the newest update time from ADK and mock sessions alike, in any order"""
+    assert session_update_time(_AdkSession("a", 50.0)) == 50.0
+    assert session_update_time(_MockSession("b", datetime.fromtimestamp(60))) == 60.0
+    assert session_update_time(object()) == 0.0
+
+    index = LatestSessionIndex()
+    assert not index.is_known(APP, "farmer") and index.latest(APP, "farmer") is None
+    index.seed(APP, "farmer", [
+        _AdkSession("old", 10.0),
+        _MockSession("newest", datetime.fromtimestamp(300)),
+        _AdkSession("middle", 200.0),
+    ])
+    assert index.is_known(APP, "farmer") and index.latest(APP, "farmer") == "newest"
+
+    index.touch(APP, "farmer", "old", timestamp=400.0)
+    assert index.latest(APP, "farmer") == "old"
+    index.remove(APP, "farmer", "old")
+    assert index.latest(APP, "farmer") == "newest"
+    index.remove(APP, "farmer", "middle")
+    assert index.latest(APP, "farmer") == "newest"
+    index.remove(APP, "farmer", "newest")
+    assert not index.is_known(APP, "farmer") and index.latest(APP, "farmer") is None
+    print("✅ Seeded index picks the most recently updated session")
+
+
+def test_latest_session_seeded_once():
+    """latest_session_id lists a user's sessions once, then follows activity from the index"""
+    service = _SessionService({
+        "ramesh": [_AdkSession("s1", 100.0), _AdkSession("s3", 300.0), _AdkSession("s2", 200.0)],
+    })
+    sessions = AsyncSessionService(service, _HistoryStore(), max_workers=2)
+
+    async def run():
+        assert await sessions.latest_session_id(app_name=APP, user_id="ramesh") == "s3"
+        assert await sessions.latest_session_id(app_name=APP, user_id="ramesh") == "s3"
+        assert service.list_calls == 1
+
+        # A new turn in an older session makes it the latest without listing again
+        await sessions.append_history(APP, "ramesh", "s1", {"action": "user_query", "query": "Hi"})
+        assert await sessions.latest_session_id(app_name=APP, user_id="ramesh") == "s1"
+        await sessions.delete_session(app_name=APP, user_id="ramesh", session_id="s1")
+        assert await sessions.latest_session_id(app_name=APP, user_id="ramesh") == "s3"
+        assert service.list_calls == 1
+
+        # A user with no sessions has nothing to seed
+        assert await sessions.latest_session_id(app_name=APP, user_id="sita") is None
+
+    try:
+        asyncio.run(run())
+    finally:
+        sessions.shutdown()
+    print("✅ Latest session is seeded once from list_sessions")
+
+
+if __name__ == "__main__":
+    test_seed_picks_most_recent()
+    test_latest_session_seeded_once()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the SQLite session backend
+Measures session operations per second (create, get, list, delete) with 1, 8 and
+64 concurrent writer threads on a temporary database. When the real Google ADK
+is installed, DatabaseSessionService is measured on the same workload for
+comparison. Run with: python test_session_store.py
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlite_session_service import SQLiteSessionService
+
+try:
+    from google.adk.sessions import DatabaseSessionService
+except ImportError:
+    DatabaseSessionService = None
+
+APP_NAME = "Agricultural Support"
+WRITER_COUNTS = (1, 8, 64)
+SESSIONS_PER_WRITER = 50
+POOL_SIZE = int(os.getenv("SESSION_IO_WORKERS", "8"))
+
+
+def _writer(service, writer_id, sessions):
+    """One farmer's worth of traffic: create, read, list and delete sessions"""
+    user_id = f"farmer_{writer_id}"
+    ops = 0
+    for _ in range(sessions):
+        session = service.create_session(
+            app_name=APP_NAME,
+            user_id=user_id,
+            state={"user_name": user_id, "location": "Pune", "app:version": 1},
+            session_id=str(uuid.uuid4()),
+        )
+        fetched = service.get_session(app_name=APP_NAME, user_id=user_id, session_id=session.id)
+        assert fetched is not None and fetched.state["location"] == "Pune"
+        service.list_sessions(app_name=APP_NAME, user_id=user_id)
+        service.delete_session(app_name=APP_NAME, user_id=user_id, session_id=session.id)
+        ops += 4
+    return ops
+
+
+def _ops_per_second(service, writers, sessions=SESSIONS_PER_WRITER):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=writers) as executor:
+        ops = sum(executor.map(lambda i: _writer(service, i, sessions), range(writers)))
+    return ops / (time.perf_counter() - start)
+
+
+def test_session_store():
+    """Measure session throughput as the number of concurrent writers grows"""
+
+    print("🗄️  Benchmarking session store throughput")
+    print("=" * 50)
+
+    workdir = tempfile.mkdtemp(prefix="session_bench_")
+    try:
+        db_path = os.path.join(workdir, "sqlite_backend.db")
+        service = SQLiteSessionService(db_path=db_path, pool_size=POOL_SIZE)
+        print(f"   SQLiteSessionService (WAL, pool of {POOL_SIZE})")
+        for writers in WRITER_COUNTS:
+            rate = _ops_per_second(service, writers)
+            print(f"   {writers:3d} writers: {rate:10.0f} ops/sec")
+        service.close()
+
+        if DatabaseSessionService is not None:
+            adk_service = DatabaseSessionService(
+                db_url=f"sqlite:///{os.path.join(workdir, 'adk_backend.db')}"
+            )
+            print("   DatabaseSessionService (SQLAlchemy, rollback journal)")
+            for writers in WRITER_COUNTS:
+                try:
+                    rate = _ops_per_second(adk_service, writers)
+                    print(f"   {writers:3d} writers: {rate:10.0f} ops/sec")
+                except Exception as e:
+                    print(f"   {writers:3d} writers: ❌ {type(e).__name__}: {e}")
+
+        # Concurrent appends to one session must not lose updates or hit "database is locked"
+        service = SQLiteSessionService(db_path=db_path, pool_size=POOL_SIZE)
+        with ThreadPoolExecutor(max_workers=64) as executor:
+            created = list(executor.map(
+                lambda i: service.create_session(app_name=APP_NAME, user_id="shared", state={"n": i}),
+                range(256),
+            ))
+        listed = service.list_sessions(app_name=APP_NAME, user_id="shared").sessions
+        assert len(listed) == len(created) == 256
+        service.close()
+        print("✅ 64 concurrent writers completed without lock errors")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_session_store()
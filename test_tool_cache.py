@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Checks for the shared tool result cache
+Case and whitespace variants of the normalized arguments must share one
+entry, other arguments must not be folded, fields that echo an argument must
+come back in each caller's own spelling, and callers must never see each
+other's changes to a result. Run with: python test_tool_cache.py
+"""
+
+from tools.crop_tools import match_climate_requirements
+from tools.tool_cache import cached_tool, normalize_value
+
+
+def test_normalized_arguments_share_entry():
+    """Spelling variants of a normalized argument hit one entry; other arguments stay distinct"""
+    calls = []
+
+    @cached_tool(ttl=60, normalize=("crop",))
+    def price(crop, mandi_code, grades=None):
+        calls.append((crop, mandi_code, grades))
+        return {"crop": crop, "mandi_code": mandi_code, "grades": grades}
+
+    assert normalize_value({"a": [" Wheat  Durum ", 3]}) == {"a": ["wheat durum", 3]}
+    price("Wheat", "KNL")
+    price(" wheat ", "KNL")
+    price(crop="WHEAT", mandi_code="KNL", grades=None)
+    assert len(calls) == 1
+    price("Wheat", "knl")
+    assert len(calls) == 2
+    price("Wheat", "KNL", grades=["A", "B"])
+    price("Wheat", "KNL", grades=["A", "B"])
+    assert len(calls) == 3
+    assert price.cache.stats()["hits"] == 3 and price.cache.stats()["misses"] == 3
+    print("✅ Normalized arguments share one cache entry")
+
+
+def test_echoed_arguments_keep_caller_spelling():
+    """A cached result echoes each caller's own spelling, not the first caller's"""
+    match_climate_requirements.cache.clear()
+    first = match_climate_requirements("Punjab", season="Rabi")
+    second = match_climate_requirements(" punjab ", season="RABI")
+    assert first["location"] == "Punjab"
+    assert second["location"] == " punjab "
+    assert match_climate_requirements(location="PUNJAB", season="rabi")["location"] == "PUNJAB"
+    assert match_climate_requirements.cache.stats()["size"] == 1
+    assert {k: v for k, v in second.items() if k != "location"} == {
+        k: v for k, v in first.items() if k != "location"
+    }
+    print("✅ Echoed arguments come back in the caller's spelling")
+
+
+def test_results_are_copies():
+    """Changing a returned result does not change what later callers get"""
+    match_climate_requirements.cache.clear()
+    first = match_climate_requirements("Karnal")
+    first["climate_analysis"]["climate_zone"] = "Changed"
+    first["climate_matched_varieties"].clear()
+    second = match_climate_requirements("karnal")
+    assert second["climate_analysis"]["climate_zone"] == "Sub-tropical"
+    assert second["climate_matched_varieties"]
+    print("✅ Cached results are copied for every caller")
+
+
+if __name__ == "__main__":
+    test_normalized_arguments_share_entry()
+    test_echoed_arguments_keep_caller_spelling()
+    test_results_are_copies()
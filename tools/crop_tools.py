@@ -1,3 +1,11 @@
+from .disease_index import DISEASE_RECORDS, DiseaseMatch, symptom_index
+from .disease_vectors import disease_vector_index
+from .tool_cache import cached_tool
+
+# Minimum cosine similarity for a vector search hit to count as a diagnosis
+VECTOR_SIMILARITY_THRESHOLD = 0.2
+
+
 def firebase_disease_search(symptoms, crop, crop_part, location):
     """
     Mock Firebase disease search with comprehensive disease database.
@@ -9,123 +17,21 @@ def firebase_disease_search(symptoms, crop, crop_part, location):
     Returns:
         dict: Matching disease info or None
     """
-    # Mock comprehensive disease database
-    disease_database = {
-        "wheat": {
-            "yellow_rust": {
-                "name": "Yellow Rust (Puccinia striiformis)",
-                "crop": "Wheat",
-                "symptoms": [
-                    {
-                        "description": "Yellow powdery pustules forming linear stripes on leaves under cool, humid conditions.",
-                        "visual_indicators": ["yellow stripes", "pustules", "powdery coating"],
-                        "affected_parts": ["leaves", "stems"]
-                    }
-                ],
-                "treatment": {
-                    "method": "Apply fungicides like captan and hexaconazole early at disease onset. Spray during cool morning hours.",
-                    "cost_estimate_USD": 11,
-                    "organic_treatment": "Neem oil spray, increase plant spacing for better air circulation"
-                },
-                "prevention": "Plant resistant wheat varieties like HD-2967, avoid late sowing, maintain proper drainage.",
-                "confidence_score": 0.92,
-                "location_relevance": {"Punjab": 0.95, "Haryana": 0.90, "UP": 0.85}
-            },
-            "leaf_blight": {
-                "name": "Leaf Blight (Bipolaris sorokiniana)",
-                "crop": "Wheat",
-                "symptoms": [
-                    {
-                        "description": "Brown spots with dark borders on leaves, eventually leading to leaf drying.",
-                        "visual_indicators": ["brown spots", "dark borders", "leaf drying"],
-                        "affected_parts": ["leaves"]
-                    }
-                ],
-                "treatment": {
-                    "method": "Apply fungicides like propiconazole or tebuconazole at early stage.",
-                    "cost_estimate_USD": 15,
-                    "organic_treatment": "Copper sulfate spray, remove infected plant debris"
-                },
-                "prevention": "Crop rotation, seed treatment, avoid excessive nitrogen fertilization.",
-                "confidence_score": 0.88,
-                "location_relevance": {"Maharashtra": 0.95, "Karnataka": 0.90, "AP": 0.85}
-            }
-        },
-        "rice": {
-            "blast": {
-                "name": "Rice Blast (Magnaporthe oryzae)",
-                "crop": "Rice",
-                "symptoms": [
-                    {
-                        "description": "Diamond-shaped lesions with gray centers and brown borders on leaves.",
-                        "visual_indicators": ["diamond lesions", "gray centers", "brown borders"],
-                        "affected_parts": ["leaves", "neck", "panicle"]
-                    }
-                ],
-                "treatment": {
-                    "method": "Apply tricyclazole or carbendazim fungicides. Ensure proper drainage.",
-                    "cost_estimate_USD": 18,
-                    "organic_treatment": "Pseudomonas fluorescens application, silicon fertilization"
-                },
-                "prevention": "Use resistant varieties, balanced fertilization, avoid dense planting.",
-                "confidence_score": 0.90,
-                "location_relevance": {"West Bengal": 0.95, "Punjab": 0.85, "Tamil Nadu": 0.90}
-            }
-        },
-        "cotton": {
-            "bollworm": {
-                "name": "Cotton Bollworm (Helicoverpa armigera)",
-                "crop": "Cotton",
-                "symptoms": [
-                    {
-                        "description": "Small holes in bolls, larvae feeding inside, premature boll drop.",
-                        "visual_indicators": ["holes in bolls", "larvae", "boll drop", "frass"],
-                        "affected_parts": ["bolls", "flowers", "leaves"]
-                    }
-                ],
-                "treatment": {
-                    "method": "Apply cypermethrin or chlorpyrifos insecticides. Use pheromone traps.",
-                    "cost_estimate_USD": 20,
-                    "organic_treatment": "Bt spray, release Trichogramma parasites, neem oil application"
-                },
-                "prevention": "Plant Bt cotton varieties, intercropping with marigold, regular monitoring.",
-                "confidence_score": 0.95,
-                "location_relevance": {"Gujarat": 0.95, "Maharashtra": 0.92, "Andhra Pradesh": 0.90}
-            }
-        }
-    }
-    
-    # Simple matching logic based on symptoms and crop
     crop_lower = crop.lower() if crop else ""
-    symptoms_lower = symptoms.lower() if symptoms else ""
-    
-    # Search for matching diseases
+
+    # Score diseases by how many visual indicators the symptoms hit
     matches = []
-    if crop_lower in disease_database:
-        for disease_key, disease_data in disease_database[crop_lower].items():
-            # Check if symptoms match
-            symptom_match = False
-            for symptom in disease_data["symptoms"]:
-                for indicator in symptom["visual_indicators"]:
-                    if indicator.lower() in symptoms_lower:
-                        symptom_match = True
-                        break
-                if symptom_match:
-                    break
-            
-            if symptom_match:
-                # Adjust confidence based on location if provided
-                confidence = disease_data["confidence_score"]
-                if location and location in disease_data["location_relevance"]:
-                    confidence *= disease_data["location_relevance"][location]
-                
-                disease_data["final_confidence"] = confidence
-                matches.append({disease_key: disease_data})
-    
+    for disease_key, matched_indicators in symptom_index.search(crop_lower, symptoms).items():
+        # Shared immutable record; the location-adjusted score lives on the match
+        record = DISEASE_RECORDS[crop_lower][disease_key]
+        matches.append(
+            DiseaseMatch(record, record.confidence_for(location), matched_indicators)
+        )
+
     # Return best match or mock default
     if matches:
-        # Sort by confidence and return best match
-        best_match = max(matches, key=lambda x: list(x.values())[0]["final_confidence"])
+        best = max(matches, key=DiseaseMatch.sort_key)
+        best_match = {best.record.key: best.to_dict()}
         return {
             "status": "success",
             "matches_found": len(matches),
@@ -156,6 +62,61 @@ def firebase_disease_search(symptoms, crop, crop_part, location):
             }
         }
 
+def vector_disease_search(symptoms, crop, crop_part, location, top_k=3):
+    """
+    Local vector-similarity disease search over the disease knowledge base.
+    Args:
+        symptoms (str): Free-text description of the visible symptoms
+        crop (str): Crop name
+        crop_part (str): Affected part of the crop
+        location (str): User's location
+        top_k (int): Maximum number of candidate diseases to return
+    Returns:
+        dict: Best matching disease above the similarity threshold with ranked candidates
+    """
+    query = f"{symptoms or ''} {crop_part or ''}".strip()
+    ranked = disease_vector_index.search(query, crop=crop, top_k=top_k)
+    matches = [
+        DiseaseMatch(record, record.confidence_for(location), [], similarity=score)
+        for record, score in ranked
+        if score >= VECTOR_SIMILARITY_THRESHOLD
+    ]
+
+    search_query = {
+        "symptoms": symptoms,
+        "crop": crop,
+        "crop_part": crop_part,
+        "location": location
+    }
+    if matches:
+        best = matches[0]
+        return {
+            "status": "success",
+            "matches_found": len(matches),
+            "best_match": {best.record.key: best.to_dict()},
+            "candidates": [
+                {
+                    "disease": match.record.key,
+                    "name": match.record.name,
+                    "similarity_score": round(match.similarity, 4),
+                    "final_confidence": match.final_confidence
+                }
+                for match in matches
+            ],
+            "similarity_threshold": VECTOR_SIMILARITY_THRESHOLD,
+            "search_query": search_query
+        }
+    return {
+        "status": "no_match",
+        "message": f"No disease above similarity threshold {VECTOR_SIMILARITY_THRESHOLD} for {crop} with symptoms: {symptoms}",
+        "general_recommendations": [
+            "Describe the symptoms in more detail (color, shape, affected part)",
+            "Take clear photos of affected parts for better diagnosis",
+            "Consult local agricultural extension officer"
+        ],
+        "search_query": search_query
+    }
+
 def analyze_soil_parameters(soil_data, crop_requirements):
     """
     Analyze soil parameters to determine crop suitability and recommendations.
@@ -196,6 +157,7 @@ def analyze_soil_parameters(soil_data, crop_requirements):
         "expected_yield_impact": "+15-20% with recommended improvements"
     }
 
+@cached_tool(ttl=6 * 60 * 60)
 def match_climate_requirements(location, crop_preferences=None, season=None):
     """
     Match crop requirements with local climate conditions and seasonal patterns.
@@ -0,0 +1,288 @@
+"""
+Crop disease knowledge base and its precompiled symptom index.
+
+The knowledge base is loaded once at import into immutable DiseaseRecord objects
+and compiled into an inverted index from visual-indicator token to the
+(disease, indicator) postings that contain it, so a symptom lookup only touches
+the postings for the words in the query instead of scanning every disease.
+
+Records are shared by every request and thread, so nothing per-query (such as a
+location-adjusted confidence) is ever stored on them; searches return
+DiseaseMatch objects instead.
+"""
+
+import re
+from types import MappingProxyType
+
+# Mock comprehensive disease database (source data for DISEASE_RECORDS)
+_DISEASE_DATA = {
+    "wheat": {
+        "yellow_rust": {
+            "name": "Yellow Rust (Puccinia striiformis)",
+            "crop": "Wheat",
+            "symptoms": [
+                {
+                    "description": "Yellow powdery pustules forming linear stripes on leaves under cool, humid conditions.",
+                    "visual_indicators": ["yellow stripes", "pustules", "powdery coating"],
+                    "affected_parts": ["leaves", "stems"]
+                }
+            ],
+            "treatment": {
+                "method": "Apply fungicides like captan and hexaconazole early at disease onset. Spray during cool morning hours.",
+                "cost_estimate_USD": 11,
+                "organic_treatment": "Neem oil spray, increase plant spacing for better air circulation"
+            },
+            "prevention": "Plant resistant wheat varieties like HD-2967, avoid late sowing, maintain proper drainage.",
+            "confidence_score": 0.92,
+            "location_relevance": {"Punjab": 0.95, "Haryana": 0.90, "UP": 0.85}
+        },
+        "leaf_blight": {
+            "name": "Leaf Blight (Bipolaris sorokiniana)",
+            "crop": "Wheat",
+            "symptoms": [
+                {
+                    "description": "Brown spots with dark borders on leaves, eventually leading to leaf drying.",
+                    "visual_indicators": ["brown spots", "dark borders", "leaf drying"],
+                    "affected_parts": ["leaves"]
+                }
+            ],
+            "treatment": {
+                "method": "Apply fungicides like propiconazole or tebuconazole at early stage.",
+                "cost_estimate_USD": 15,
+                "organic_treatment": "Copper sulfate spray, remove infected plant debris"
+            },
+            "prevention": "Crop rotation, seed treatment, avoid excessive nitrogen fertilization.",
+            "confidence_score": 0.88,
+            "location_relevance": {"Maharashtra": 0.95, "Karnataka": 0.90, "AP": 0.85}
+        }
+    },
+    "rice": {
+        "blast": {
+            "name": "Rice Blast (Magnaporthe oryzae)",
+            "crop": "Rice",
+            "symptoms": [
+                {
+                    "description": "Diamond-shaped lesions with gray centers and brown borders on leaves.",
+                    "visual_indicators": ["diamond lesions", "gray centers", "brown borders"],
+                    "affected_parts": ["leaves", "neck", "panicle"]
+                }
+            ],
+            "treatment": {
+                "method": "Apply tricyclazole or carbendazim fungicides. Ensure proper drainage.",
+                "cost_estimate_USD": 18,
+                "organic_treatment": "Pseudomonas fluorescens application, silicon fertilization"
+            },
+            "prevention": "Use resistant varieties, balanced fertilization, avoid dense planting.",
+            "confidence_score": 0.90,
+            "location_relevance": {"West Bengal": 0.95, "Punjab": 0.85, "Tamil Nadu": 0.90}
+        }
+    },
+    "cotton": {
+        "bollworm": {
+            "name": "Cotton Bollworm (Helicoverpa armigera)",
+            "crop": "Cotton",
+            "symptoms": [
+                {
+                    "description": "Small holes in bolls, larvae feeding inside, premature boll drop.",
+                    "visual_indicators": ["holes in bolls", "larvae", "boll drop", "frass"],
+                    "affected_parts": ["bolls", "flowers", "leaves"]
+                }
+            ],
+            "treatment": {
+                "method": "Apply cypermethrin or chlorpyrifos insecticides. Use pheromone traps.",
+                "cost_estimate_USD": 20,
+                "organic_treatment": "Bt spray, release Trichogramma parasites, neem oil application"
+            },
+            "prevention": "Plant Bt cotton varieties, intercropping with marigold, regular monitoring.",
+            "confidence_score": 0.95,
+            "location_relevance": {"Gujarat": 0.95, "Maharashtra": 0.92, "Andhra Pradesh": 0.90}
+        }
+    }
+}
+
+
+
+def _freeze(value):
+    """Recursively convert dicts/lists into read-only mappings/tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _thaw(value):
+    """Inverse of _freeze: build fresh, JSON-serializable dicts/lists."""
+    if isinstance(value, MappingProxyType):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    return value
+
+
+class DiseaseRecord:
+    """Immutable knowledge-base entry for one crop disease."""
+
+    __slots__ = (
+        "key",
+        "name",
+        "crop",
+        "symptoms",
+        "treatment",
+        "prevention",
+        "confidence_score",
+        "location_relevance",
+    )
+
+    def __init__(self, key, data):
+        """
+        Args:
+            key (str): Disease key within its crop (e.g. "yellow_rust")
+            data (dict): Raw disease data in the knowledge-base schema
+        """
+        set_attr = object.__setattr__
+        set_attr(self, "key", key)
+        set_attr(self, "name", data["name"])
+        set_attr(self, "crop", data["crop"])
+        set_attr(self, "symptoms", _freeze(data["symptoms"]))
+        set_attr(self, "treatment", _freeze(data["treatment"]))
+        set_attr(self, "prevention", data["prevention"])
+        set_attr(self, "confidence_score", data["confidence_score"])
+        set_attr(self, "location_relevance", _freeze(data["location_relevance"]))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __repr__(self):
+        return f"DiseaseRecord({self.crop!r}, {self.key!r})"
+
+    def confidence_for(self, location):
+        """Base confidence adjusted by how relevant the disease is to a location."""
+        confidence = self.confidence_score
+        if location and location in self.location_relevance:
+            confidence *= self.location_relevance[location]
+        return confidence
+
+    def to_dict(self):
+        """Return a fresh dict in the knowledge-base schema."""
+        return {
+            "name": self.name,
+            "crop": self.crop,
+            "symptoms": _thaw(self.symptoms),
+            "treatment": _thaw(self.treatment),
+            "prevention": self.prevention,
+            "confidence_score": self.confidence_score,
+            "location_relevance": _thaw(self.location_relevance),
+        }
+
+
+class DiseaseMatch:
+    """Per-query search result pointing at a shared DiseaseRecord."""
+
+    __slots__ = ("record", "final_confidence", "matched_indicators", "similarity")
+
+    def __init__(self, record, final_confidence, matched_indicators, similarity=None):
+        self.record = record
+        self.final_confidence = final_confidence
+        self.matched_indicators = matched_indicators
+        # Cosine similarity when the match came from the vector index
+        self.similarity = similarity
+
+    def sort_key(self):
+        """Most indicators hit wins; confidence breaks ties."""
+        return (len(self.matched_indicators), self.final_confidence)
+
+    def to_dict(self):
+        """Return the record as a dict plus this query's scores."""
+        result = self.record.to_dict()
+        result["final_confidence"] = self.final_confidence
+        result["matched_indicators"] = list(self.matched_indicators)
+        if self.similarity is not None:
+            result["similarity_score"] = round(self.similarity, 4)
+        return result
+
+
+# Immutable records shared by every request: {crop: {disease_key: DiseaseRecord}}
+DISEASE_RECORDS = MappingProxyType({
+    crop: MappingProxyType({key: DiseaseRecord(key, data) for key, data in diseases.items()})
+    for crop, diseases in _DISEASE_DATA.items()
+})
+
+
+# Filler words that should not decide whether an indicator matched
+_STOPWORDS = frozenset({"a", "an", "and", "in", "of", "on", "the", "with"})
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    """Lowercase text and split it into indicator tokens, dropping filler words."""
+    if not text:
+        return []
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+class SymptomIndex:
+    """Inverted index from visual-indicator tokens to disease postings, per crop."""
+
+    def __init__(self, disease_records):
+        """
+        Args:
+            disease_records (Mapping): {crop: {disease_key: DiseaseRecord}}
+        """
+        # crop -> token -> [(disease_key, indicator_id)]
+        self._postings = {}
+        # crop -> [(disease_key, indicator text, number of distinct tokens)]
+        self._indicators = {}
+
+        for crop, diseases in disease_records.items():
+            postings = self._postings.setdefault(crop.lower(), {})
+            indicators = self._indicators.setdefault(crop.lower(), [])
+            for disease_key, record in diseases.items():
+                for symptom in record.symptoms:
+                    for indicator in symptom["visual_indicators"]:
+                        tokens = set(tokenize(indicator))
+                        if not tokens:
+                            continue
+                        indicator_id = len(indicators)
+                        indicators.append((disease_key, indicator, len(tokens)))
+                        for token in tokens:
+                            postings.setdefault(token, []).append(
+                                (disease_key, indicator_id)
+                            )
+
+    def search(self, crop, symptoms):
+        """Score a crop's diseases by how many of their indicators the symptoms hit.
+
+        An indicator hits when every one of its tokens appears in the symptoms.
+
+        Args:
+            crop (str): Crop name
+            symptoms (str): Free-text symptom description
+
+        Returns:
+            dict: {disease_key: [matched indicator texts]} for diseases with hits
+        """
+        postings = self._postings.get(crop.lower() if crop else "")
+        if not postings:
+            return {}
+        indicators = self._indicators[crop.lower()]
+
+        # Count how many distinct tokens of each indicator the query contains
+        token_hits = {}
+        for token in set(tokenize(symptoms)):
+            for _, indicator_id in postings.get(token, ()):
+                token_hits[indicator_id] = token_hits.get(indicator_id, 0) + 1
+
+        matches = {}
+        for indicator_id, hits in sorted(token_hits.items()):
+            disease_key, indicator, token_count = indicators[indicator_id]
+            if hits == token_count:
+                matches.setdefault(disease_key, []).append(indicator)
+        return matches
+
+
+# Compiled once per process
+symptom_index = SymptomIndex(DISEASE_RECORDS)
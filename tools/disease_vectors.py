@@ -0,0 +1,147 @@
+"""
+Local vector index over crop disease symptom descriptions.
+
+Each symptom entry of every DiseaseRecord becomes one document (disease name,
+description, visual indicators and affected parts), embedded offline with
+tools.embeddings into a matrix of unit vectors. Queries are embedded the same
+way and ranked with a single matrix product, so free-text symptoms such as
+"yellow lines on leaves" are matched locally in milliseconds.
+
+The matrix is persisted as a .npy file named after a fingerprint of the
+knowledge base and reopened memory-mapped, so worker processes share the pages
+and the embeddings are only recomputed when the knowledge base changes.
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+from .disease_index import DISEASE_RECORDS
+from .embeddings import EMBEDDING_DIM, embed_text, embed_texts
+
+DEFAULT_CACHE_DIR = os.getenv(
+    "DISEASE_VECTOR_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".vector_cache"),
+)
+
+
+def _symptom_document(record, symptom):
+    """Text that represents one symptom entry of a disease."""
+    return " ".join(
+        [
+            record.name,
+            symptom["description"],
+            " ".join(symptom["visual_indicators"]),
+            " ".join(symptom["affected_parts"]),
+        ]
+    )
+
+
+class DiseaseVectorIndex:
+    """Cosine-similarity index over disease symptom documents."""
+
+    def __init__(self, disease_records, cache_dir=DEFAULT_CACHE_DIR, dim=EMBEDDING_DIM):
+        """
+        Args:
+            disease_records (Mapping): {crop: {disease_key: DiseaseRecord}}
+            cache_dir (str): Directory for the persisted .npy matrix (None to keep it in memory)
+            dim (int): Embedding dimensions
+        """
+        self.dim = dim
+        self.cache_dir = cache_dir
+        # Row i of the matrix belongs to self.rows[i]
+        self.rows = []
+        self._documents = []
+        for crop, diseases in disease_records.items():
+            for disease_key, record in diseases.items():
+                for symptom in record.symptoms:
+                    self.rows.append((crop, disease_key, record))
+                    self._documents.append(_symptom_document(record, symptom))
+        self._row_crops = np.array([crop for crop, _, _ in self.rows])
+        self._matrix = None
+        self._lock = threading.Lock()
+
+    def _fingerprint(self):
+        payload = json.dumps([self.dim, self._documents]).encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()[:16]
+
+    @property
+    def matrix(self):
+        """(documents, dim) matrix of unit vectors, built or loaded on first use."""
+        if self._matrix is None:
+            with self._lock:
+                if self._matrix is None:
+                    self._matrix = self._load_or_build()
+        return self._matrix
+
+    def _load_or_build(self):
+        if not self.cache_dir:
+            return embed_texts(self._documents, self.dim)
+
+        path = os.path.join(self.cache_dir, f"disease_vectors_{self._fingerprint()}.npy")
+        if not os.path.exists(path):
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write to a temp file first so concurrent workers never read a partial file
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, embed_texts(self._documents, self.dim))
+            os.replace(tmp_path, path)
+        return np.load(path, mmap_mode="r")
+
+    def search_batch(self, queries, crop=None, top_k=3):
+        """Rank diseases for several symptom queries at once.
+
+        Args:
+            queries (list): Free-text symptom descriptions
+            crop (str, optional): Restrict results to this crop
+            top_k (int): Maximum diseases returned per query
+
+        Returns:
+            list: For each query, a list of (DiseaseRecord, similarity) pairs,
+                best first; a disease scores its best-matching symptom entry
+        """
+        if not queries:
+            return []
+        matrix = self.matrix
+        query_vectors = np.stack([embed_text(q, self.dim) for q in queries])
+        scores = query_vectors @ matrix.T
+
+        if crop:
+            scores[:, self._row_crops != crop.lower()] = -np.inf
+
+        results = []
+        # Extra candidates so several symptom rows of one disease cannot crowd out others
+        candidates = min(len(self.rows), top_k * 4)
+        for row_scores in scores:
+            if candidates < len(self.rows):
+                top = np.argpartition(-row_scores, candidates - 1)[:candidates]
+            else:
+                top = np.arange(len(self.rows))
+            top = top[np.argsort(-row_scores[top])]
+
+            seen = set()
+            ranked = []
+            for row in top:
+                score = float(row_scores[row])
+                if score == -np.inf:
+                    break
+                crop_key, disease_key, record = self.rows[row]
+                if (crop_key, disease_key) in seen:
+                    continue
+                seen.add((crop_key, disease_key))
+                ranked.append((record, score))
+                if len(ranked) == top_k:
+                    break
+            results.append(ranked)
+        return results
+
+    def search(self, symptoms, crop=None, top_k=3):
+        """Rank diseases for one symptom query; see search_batch."""
+        return self.search_batch([symptoms], crop=crop, top_k=top_k)[0]
+
+
+# Shared index; the matrix itself is loaded lazily on the first search
+disease_vector_index = DiseaseVectorIndex(DISEASE_RECORDS)
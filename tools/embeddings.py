@@ -0,0 +1,65 @@
+"""
+Offline text embeddings for local similarity search.
+
+Texts are embedded with feature hashing: word unigrams, word bigrams and
+character trigrams are hashed into a fixed number of dimensions and the vector
+is L2-normalized, so cosine similarity is a plain dot product. No model
+download or network call is needed, and the same text always maps to the same
+vector across processes.
+"""
+
+import re
+import zlib
+
+import numpy as np
+
+EMBEDDING_DIM = 512
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Relative weight of each feature family in the final vector
+_WORD_WEIGHT = 1.0
+_BIGRAM_WEIGHT = 0.5
+_TRIGRAM_WEIGHT = 0.35
+
+
+def _features(text):
+    """Yield (feature string, weight) pairs for a text."""
+    words = _WORD_RE.findall(text.lower())
+    for word in words:
+        yield "w:" + word, _WORD_WEIGHT
+        padded = f"#{word}#"
+        for i in range(len(padded) - 2):
+            yield "c:" + padded[i:i + 3], _TRIGRAM_WEIGHT
+    for first, second in zip(words, words[1:]):
+        yield f"b:{first} {second}", _BIGRAM_WEIGHT
+
+
+def embed_text(text, dim=EMBEDDING_DIM):
+    """Embed one text into a unit-length float32 vector.
+
+    Args:
+        text (str): Text to embed
+        dim (int): Number of hashed dimensions
+
+    Returns:
+        numpy.ndarray: Vector of shape (dim,); all zeros for empty text
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    for feature, weight in _features(text or ""):
+        digest = zlib.crc32(feature.encode("utf-8"))
+        # Signed hashing keeps collisions from always adding up
+        sign = 1.0 if digest & 0x80000000 else -1.0
+        vector[digest % dim] += sign * weight
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
+
+
+def embed_texts(texts, dim=EMBEDDING_DIM):
+    """Embed a batch of texts into a (len(texts), dim) float32 matrix of unit rows."""
+    matrix = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        matrix[row] = embed_text(text, dim)
+    return matrix
@@ -1,3 +1,7 @@
+from .tool_cache import cached_tool
+
+
+@cached_tool(ttl=60 * 60, normalize=("user_profile", "requirements"))
 def search_schemes(user_profile: dict, requirements: str) -> dict:
     """
     Search government agricultural schemes based on user profile and requirements.
@@ -0,0 +1,545 @@
+"""
+Mandi selection by net realisation over a road-distance graph.
+
+``RoadNetwork`` holds villages and mandis as nodes joined by road segments
+(km). On construction it runs one Dijkstra from every mandi and caches the
+result: a (node x mandi) road-distance matrix, which is all-pairs shortest
+paths restricted to the pairs the optimizer needs. Any village-to-mandi
+distance is then a row lookup. A network loaded from ROAD_GRAPH_DIR saves
+its matrix next to the graph CSVs, in a .npy file named after a fingerprint
+of the nodes, edges and haul limit. Later starts with the same graph
+memory-map that file instead of rerunning Dijkstra; an edited graph gets a
+new file.
+
+``MandiSelector`` joins the network with the latest price per mandi from
+the price store. For every mandi it keeps the last modal price and a damped
+14-day price slope. These arrays are cached per (crop, grade) and rebuilt
+when the store merges new rows for the crop. A recommendation is then
+vectorized arithmetic over all mandis.
+
+For each mandi and holding horizon (sell now, in 3 days, in 7 days):
+
+    net = quantity x expected price x (1 - mandi fees)
+          - trucks x (loading cost + cost per km x road km)
+          - quantity x storage cost per day x days held
+
+For an FPO (farmer producer organisation) the members are stacked into a
+(member x mandi) matrix and handled in the same pass. Until a real road
+graph is configured, a mock network of the price store's mock mandis and
+nearby villages is used. Its coordinates are approximate and road km are
+1.3 x the straight-line distance.
+"""
+
+import csv
+import hashlib
+import heapq
+import json
+import os
+import threading
+
+import numpy as np
+
+from .price_store import _MOCK_MANDIS, from_day, get_price_store, normalize_name
+
+# Holding periods compared for timing, in days
+SELL_HORIZONS = (0, 3, 7)
+
+# Days of prices used for the latest price and the trend
+_PRICE_WINDOW_DAYS = 14
+# Projected prices follow half the recent slope, and move at most this fraction
+_SLOPE_DAMPING = 0.5
+_MAX_PROJECTED_CHANGE = 0.10
+
+
+class RoadNetwork:
+    """Villages and mandis joined by roads, with cached mandi road distances."""
+
+    def __init__(self, nodes, edges, max_haul_km=800.0, distances=None):
+        """
+        Args:
+            nodes (list): Dicts with name, kind ("mandi" or "village"), district and state
+            edges (list): (node index, node index, km) road segments, both directions
+            max_haul_km (float): Mandis further than this by road are treated as unreachable
+            distances (ndarray, optional): Precomputed (node x mandi) km matrix (see save)
+        """
+        self.nodes = nodes
+        self.edges = edges
+        self.max_haul_km = max_haul_km
+        self.mandi_nodes = np.array([i for i, n in enumerate(nodes) if n["kind"] == "mandi"], dtype=np.int64)
+        self.mandi_names = [nodes[i]["name"] for i in self.mandi_nodes]
+
+        # normalized name -> node indices (village names repeat across districts)
+        self._by_name = {}
+        self._by_district = {}
+        for i, node in enumerate(nodes):
+            self._by_name.setdefault(normalize_name(node["name"]), []).append(i)
+            self._by_district.setdefault(normalize_name(node.get("district", "")), []).append(i)
+
+        self._adjacency = [[] for _ in nodes]
+        for a, b, km in edges:
+            self._adjacency[a].append((b, float(km)))
+            self._adjacency[b].append((a, float(km)))
+
+        self.distances = distances if distances is not None else self._all_mandi_distances()
+
+    def _dijkstra(self, source):
+        """Road km from one node to every node, up to max_haul_km."""
+        dist = np.full(len(self.nodes), np.inf)
+        dist[source] = 0.0
+        heap = [(0.0, source)]
+        while heap:
+            d, node = heapq.heappop(heap)
+            if d > dist[node]:
+                continue
+            for neighbour, km in self._adjacency[node]:
+                nd = d + km
+                if nd < dist[neighbour] and nd <= self.max_haul_km:
+                    dist[neighbour] = nd
+                    heapq.heappush(heap, (nd, neighbour))
+        return dist
+
+    def _all_mandi_distances(self):
+        matrix = np.empty((len(self.nodes), len(self.mandi_nodes)), dtype=np.float32)
+        for column, mandi in enumerate(self.mandi_nodes.tolist()):
+            matrix[:, column] = self._dijkstra(mandi)
+        return matrix
+
+    def resolve(self, location):
+        """Node of a "Village, District, State" style location, or None.
+
+        The first part is matched against node names, using the district to
+        pick among namesakes. A bare district name falls back to a mandi in
+        that district.
+        """
+        parts = [normalize_name(p) for p in (location or "").split(",") if p.strip()]
+        if not parts:
+            return None
+        candidates = self._by_name.get(parts[0], [])
+        if len(candidates) > 1 and len(parts) > 1:
+            in_district = [i for i in candidates if normalize_name(self.nodes[i].get("district", "")) == parts[1]]
+            candidates = in_district or candidates
+        if candidates:
+            return candidates[0]
+        for part in parts:
+            in_district = self._by_district.get(part)
+            if in_district:
+                mandis = [i for i in in_district if self.nodes[i]["kind"] == "mandi"]
+                return (mandis or in_district)[0]
+        return None
+
+    # ----- persistence -----
+
+    @classmethod
+    def from_directory(cls, directory, max_haul_km=800.0):
+        """Load nodes.csv (name, kind, district, state) and edges.csv (from, to, km).
+
+        Edge endpoints are node names, written "Name, District" where names repeat.
+        A matrix written by save for the same graph and haul limit is memory-mapped.
+        """
+        with open(os.path.join(directory, "nodes.csv"), newline="", encoding="utf-8-sig") as f:
+            nodes = [
+                {"name": row["name"].strip(), "kind": row.get("kind", "village").strip().lower(),
+                 "district": (row.get("district") or "").strip(), "state": (row.get("state") or "").strip()}
+                for row in csv.DictReader(f)
+            ]
+        index = {}
+        for i, node in enumerate(nodes):
+            index.setdefault(normalize_name(node["name"]), i)
+            index[normalize_name(f"{node['name']}, {node['district']}")] = i
+        with open(os.path.join(directory, "edges.csv"), newline="", encoding="utf-8-sig") as f:
+            edges = [
+                (index[normalize_name(row["from"])], index[normalize_name(row["to"])], float(row["km"]))
+                for row in csv.DictReader(f)
+            ]
+
+        cache = os.path.join(directory, _distances_file(nodes, edges, max_haul_km))
+        distances = np.load(cache, mmap_mode="r") if os.path.exists(cache) else None
+        network = cls(nodes, edges, max_haul_km, distances)
+        if distances is None:
+            network.save(directory)
+        return network
+
+    def save(self, directory):
+        """Write the distance matrix so the next load skips the shortest-path runs.
+
+        Returns:
+            str: Path of the written .npy file
+        """
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, _distances_file(self.nodes, self.edges, self.max_haul_km))
+        # Write to a temp file first so concurrent workers never read a partial file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.asarray(self.distances))
+        os.replace(tmp_path, path)
+        return path
+
+
+def _distances_file(nodes, edges, max_haul_km):
+    """Cache file name for the distance matrix of one graph and haul limit."""
+    payload = json.dumps(
+        [[node["name"], node["kind"], node.get("district", "")] for node in nodes]
+        + [[a, b, float(km)] for a, b, km in edges]
+        + [float(max_haul_km)]
+    ).encode("utf-8")
+    return f"distances_{hashlib.sha256(payload).hexdigest()[:16]}.npy"
+
+
+class MandiSelector:
+    """Ranks mandis by net realisation for a seller's quantity, location and timing."""
+
+    def __init__(self, network, store=None, cost_per_km=35.0, loading_cost=500.0,
+                 truck_capacity=100.0, mandi_fee_pct=2.5, storage_cost=1.5):
+        """
+        Args:
+            network (RoadNetwork): Road graph with cached mandi distances
+            store (MandiPriceStore): Price source (default: the process-wide store)
+            cost_per_km (float): Truck hire per km, in Rs
+            loading_cost (float): Fixed loading and unloading cost per truck, in Rs
+            truck_capacity (float): Quintals per truck
+            mandi_fee_pct (float): Market fee and commission, percent of the sale value
+            storage_cost (float): Rs per quintal per day of holding
+        """
+        self.network = network
+        self.store = store if store is not None else get_price_store()
+        self.cost_per_km = cost_per_km
+        self.loading_cost = loading_cost
+        self.truck_capacity = truck_capacity
+        self.mandi_fee_pct = mandi_fee_pct
+        self.storage_cost = storage_cost
+        # Price store mandi code of every network mandi (-1 when the store has no such mandi)
+        self._store_codes = None
+        self._store_size = None
+        self._markets = {}
+        self._lock = threading.Lock()
+
+    def _mandi_codes(self):
+        if self._store_codes is None or len(self.store.mandis) != self._store_size:
+            self._store_size = len(self.store.mandis)
+            nodes = self.network.nodes
+            codes = [
+                self.store.mandis.get(nodes[i]["name"], nodes[i].get("district"), nodes[i].get("state"))
+                for i in self.network.mandi_nodes.tolist()
+            ]
+            self._store_codes = np.array([-1 if c is None else c for c in codes], dtype=np.int64)
+        return self._store_codes
+
+    def market(self, crop, grade=None):
+        """Latest modal price, its day and a daily slope for every network mandi.
+
+        Cached per (crop, grade) until the store merges new rows for the crop.
+
+        Returns:
+            dict: Arrays aligned with network.mandi_names (NaN price where there is no recent quote)
+        """
+        key = (normalize_name(crop), normalize_name(grade or ""))
+        revision = self.store.revision(crop)
+        cached = self._markets.get(key)
+        if cached is not None and cached["revision"] == revision:
+            return cached
+
+        n = len(self.network.mandi_names)
+        price = np.full(n, np.nan)
+        day = np.full(n, -1, np.int64)
+        slope = np.zeros(n)
+        series = self.store.recent(crop, days=_PRICE_WINDOW_DAYS, grade=grade) if revision is not None else None
+        if series is not None and len(series):
+            # Store mandi code -> network mandi column
+            to_column = np.full(len(self.store.mandis), -1, np.int64)
+            codes = self._mandi_codes()
+            to_column[codes[codes >= 0]] = np.flatnonzero(codes >= 0)
+            column = to_column[series.mandi]
+            keep = column >= 0
+            column, days = column[keep], series.day[keep].astype(np.float64)
+            prices = series.modal_price[keep].astype(np.float64)
+
+            # Rows are day-sorted, so the last row per column is its latest quote
+            latest = np.zeros(n, bool)
+            if len(column):
+                last_row = np.full(n, -1, np.int64)
+                np.maximum.at(last_row, column, np.arange(len(column)))
+                latest = last_row >= 0
+                # Several grades can quote on the latest day; average them
+                on_last_day = days == days[last_row[column]]
+                totals = np.bincount(column[on_last_day], prices[on_last_day], minlength=n)
+                counts = np.bincount(column[on_last_day], minlength=n)
+                price[latest] = totals[latest] / counts[latest]
+                day[latest] = days[last_row[latest]].astype(np.int64)
+
+                # Least-squares slope per mandi from grouped sums
+                count = np.bincount(column, minlength=n)
+                sx = np.bincount(column, days, minlength=n)
+                sy = np.bincount(column, prices, minlength=n)
+                sxx = np.bincount(column, days * days, minlength=n)
+                sxy = np.bincount(column, days * prices, minlength=n)
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    fitted = (count * sxy - sx * sy) / (count * sxx - sx * sx)
+                slope = np.where(np.isfinite(fitted), fitted, 0.0)
+
+        cached = {"revision": revision, "price": price, "day": day, "slope": slope * _SLOPE_DAMPING}
+        with self._lock:
+            self._markets[key] = cached
+        return cached
+
+    def _net(self, quantities, distances, market):
+        """Net realisation per (seller, mandi, horizon) and the price used.
+
+        Args:
+            quantities (ndarray): (sellers,) quintals
+            distances (ndarray): (sellers, mandis) road km
+        """
+        horizons = np.asarray(SELL_HORIZONS, dtype=np.float64)
+        price = market["price"]
+        change = np.clip(market["slope"][:, None] * horizons[None, :],
+                         -_MAX_PROJECTED_CHANGE * price[:, None], _MAX_PROJECTED_CHANGE * price[:, None])
+        expected = price[:, None] + change                                      # (mandis, horizons)
+        q = quantities[:, None, None]
+        trucks = np.ceil(quantities / self.truck_capacity)[:, None, None]
+        transport = trucks * (self.loading_cost + self.cost_per_km * distances[:, :, None])
+        net = (q * expected[None] * (1 - self.mandi_fee_pct / 100)
+               - transport
+               - q * self.storage_cost * horizons[None, None, :])
+        reachable = np.isfinite(distances)[:, :, None] & np.isfinite(price)[None, :, None]
+        return np.where(reachable, net, -np.inf), expected, transport
+
+    def _ranked(self, row, net, expected, transport, quantity, distances, market, top):
+        """Top mandis of one seller as dictionaries, best net first."""
+        best_horizon = net.argmax(axis=1)
+        best_net = net[np.arange(len(best_horizon)), best_horizon]
+        candidates = np.flatnonzero(np.isfinite(best_net))
+        if len(candidates) > top:
+            candidates = candidates[np.argpartition(-best_net[candidates], top - 1)[:top]]
+        candidates = candidates[np.argsort(-best_net[candidates])]
+        return [
+            self._entry(column, row, net, expected, transport, quantity, distances, market)
+            for column in candidates.tolist()
+        ]
+
+    def _entry(self, column, row, net, expected, transport, quantity, distances, market):
+        """One mandi of a seller's ranking, at its best selling horizon."""
+        h = int(net[column].argmax())
+        node = self.network.nodes[self.network.mandi_nodes[column]]
+        return {
+            "mandi": node["name"],
+            "district": node.get("district", ""),
+            "state": node.get("state", ""),
+            "distance_km": round(float(distances[column]), 1),
+            "current_price": round(float(market["price"][column]), 2),
+            "price_date": from_day(market["day"][column]).isoformat(),
+            "sell_in_days": SELL_HORIZONS[h],
+            "expected_price": round(float(expected[column, h]), 2),
+            "transport_cost": round(float(transport[row, column, 0]), 2),
+            "net_realisation": round(float(net[column, h]), 2),
+            "net_per_quintal": round(float(net[column, h]) / quantity, 2),
+        }
+
+    def _seller(self, crop, quantity, location, grade):
+        """(net, expected, transport, distances, market) of one seller, or None for an unknown location."""
+        origin = self.network.resolve(location)
+        if origin is None:
+            return None
+        market = self.market(crop, grade)
+        distances = np.asarray(self.network.distances[origin], dtype=np.float64)[None, :]
+        net, expected, transport = self._net(np.array([float(quantity)]), distances, market)
+        return net[0], expected, transport, distances[0], market
+
+    def top_mandis(self, crop, quantity, location, grade=None, top=5):
+        """Best mandis for one seller.
+
+        Args:
+            crop (str): Crop name
+            quantity (float): Quintals to sell
+            location (str): Village or mandi of the seller
+            grade (str, optional): Price grade to use (all grades when None)
+            top (int): Number of mandis returned
+
+        Returns:
+            list: Mandi dictionaries, best net realisation first, or None for an unknown location
+        """
+        seller = self._seller(crop, quantity, location, grade)
+        if seller is None:
+            return None
+        net, expected, transport, distances, market = seller
+        return self._ranked(0, net, expected, transport, float(quantity), distances, market, top)
+
+    def nearest_mandi(self, crop, quantity, location, grade=None):
+        """The closest mandi by road that has a recent price, with the seller's net there.
+
+        Returns:
+            dict: Mandi dictionary like top_mandis entries, or None when the location is
+                unknown or no quoted mandi is within reach
+        """
+        seller = self._seller(crop, quantity, location, grade)
+        if seller is None:
+            return None
+        net, expected, transport, distances, market = seller
+        quoted = np.flatnonzero(np.isfinite(net).any(axis=1))
+        if not len(quoted):
+            return None
+        column = int(quoted[np.argmin(distances[quoted])])
+        return self._entry(column, 0, net, expected, transport, float(quantity), distances, market)
+
+    def plan_batch(self, crop, members, grade=None, top=3):
+        """Best mandis for every member of an FPO in one vectorized pass.
+
+        Args:
+            crop (str): Crop name
+            members (list): Dicts with location and quantity (quintals), optionally member_id
+            grade (str, optional): Price grade to use
+            top (int): Mandis returned per member
+
+        Returns:
+            dict: Per-member rankings, unresolved members and the single mandi that maximises
+                the group's combined net realisation
+        """
+        market = self.market(crop, grade)
+        origins, quantities, resolved, unresolved = [], [], [], []
+        for i, member in enumerate(members):
+            origin = self.network.resolve(member.get("location", ""))
+            try:
+                quantity = float(member.get("quantity") or 0)
+            except (TypeError, ValueError):
+                quantity = 0.0
+            if origin is None or not (np.isfinite(quantity) and quantity > 0):
+                unresolved.append(member.get("member_id", i))
+                continue
+            origins.append(origin)
+            quantities.append(quantity)
+            resolved.append(member)
+        if not resolved:
+            return {"members": [], "unresolved": unresolved, "common_mandi": None}
+
+        distances = np.asarray(self.network.distances[np.array(origins)], dtype=np.float64)
+        net, expected, transport = self._net(np.array(quantities), distances, market)
+
+        plans = []
+        for row, member in enumerate(resolved):
+            plans.append({
+                "member_id": member.get("member_id", row),
+                "location": member.get("location"),
+                "quantity": quantities[row],
+                "mandis": self._ranked(row, net[row], expected, transport, quantities[row],
+                                       distances[row], market, top),
+            })
+
+        # One mandi and day for everyone: best combined net where every member can reach it
+        combined = net.sum(axis=0)
+        common = None
+        if np.isfinite(combined).any():
+            column, h = np.unravel_index(np.argmax(np.where(np.isfinite(combined), combined, -np.inf)),
+                                         combined.shape)
+            common = {
+                "mandi": self.network.mandi_names[column],
+                "sell_in_days": SELL_HORIZONS[h],
+                "expected_price": round(float(expected[column, h]), 2),
+                "net_realisation": round(float(combined[column, h]), 2),
+                "individual_best_total": round(float(net.max(axis=(1, 2)).sum()), 2),
+            }
+        return {"members": plans, "unresolved": unresolved, "common_mandi": common}
+
+
+# ----- mock network -----
+
+# Approximate (lat, lon) of the mock mandis
+_MOCK_MANDI_COORDS = {
+    "Khanna": (30.70, 76.22), "Ludhiana": (30.90, 75.85), "Amritsar": (31.63, 74.87),
+    "Bathinda": (30.21, 74.95), "Jalandhar": (31.33, 75.58), "Rajpura": (30.48, 76.59),
+    "Karnal": (29.69, 76.99), "Hisar": (29.15, 75.72), "Azadpur": (28.71, 77.18),
+    "Narela": (28.85, 77.09), "Agra": (27.18, 78.01), "Lucknow": (26.85, 80.95),
+    "Indore": (22.72, 75.86), "Bhopal": (23.26, 77.41), "Jaipur": (26.91, 75.79),
+    "Kota": (25.21, 75.86), "Pune": (18.52, 73.86), "Lasalgaon": (20.15, 74.23),
+    "Nagpur": (21.15, 79.09), "Latur": (18.40, 76.56), "Bangalore": (12.97, 77.59),
+    "Hubli": (15.36, 75.12), "Mysore": (12.30, 76.64), "Burdwan": (23.23, 87.86),
+    "Kolkata": (22.57, 88.36), "Rajkot": (22.30, 70.80),
+}
+
+# (village, district, state, lat, lon)
+_MOCK_VILLAGES = (
+    ("Samrala", "Ludhiana", "Punjab", 30.84, 76.19), ("Doraha", "Ludhiana", "Punjab", 30.80, 76.02),
+    ("Jagraon", "Ludhiana", "Punjab", 30.79, 75.47), ("Nabha", "Patiala", "Punjab", 30.37, 76.15),
+    ("Sunam", "Sangrur", "Punjab", 30.13, 75.80), ("Moga", "Moga", "Punjab", 30.82, 75.17),
+    ("Tarn Taran", "Tarn Taran", "Punjab", 31.45, 74.93), ("Phagwara", "Kapurthala", "Punjab", 31.22, 75.77),
+    ("Assandh", "Karnal", "Haryana", 29.52, 76.60), ("Gharaunda", "Karnal", "Haryana", 29.54, 76.97),
+    ("Hansi", "Hisar", "Haryana", 29.10, 75.96), ("Kaithal", "Kaithal", "Haryana", 29.80, 76.40),
+    ("Etmadpur", "Agra", "Uttar Pradesh", 27.24, 78.20), ("Barabanki", "Barabanki", "Uttar Pradesh", 26.93, 81.20),
+    ("Sanwer", "Indore", "Madhya Pradesh", 22.97, 75.83), ("Sehore", "Sehore", "Madhya Pradesh", 23.20, 77.08),
+    ("Chomu", "Jaipur", "Rajasthan", 27.17, 75.72), ("Bundi", "Bundi", "Rajasthan", 25.44, 75.64),
+    ("Baramati", "Pune", "Maharashtra", 18.15, 74.58), ("Niphad", "Nashik", "Maharashtra", 20.08, 74.11),
+    ("Katol", "Nagpur", "Maharashtra", 21.27, 78.59), ("Ausa", "Latur", "Maharashtra", 18.25, 76.50),
+    ("Hoskote", "Bengaluru Rural", "Karnataka", 13.07, 77.80), ("Dharwad", "Dharwad", "Karnataka", 15.46, 75.01),
+    ("Mandya", "Mandya", "Karnataka", 12.52, 76.90), ("Kalna", "Bardhaman", "West Bengal", 23.22, 88.37),
+    ("Gondal", "Rajkot", "Gujarat", 21.96, 70.80),
+)
+
+# Road km per straight-line km
+_ROAD_CIRCUITY = 1.3
+
+
+def _haversine_km(lat, lon):
+    """(n x n) great-circle distances between points given in degrees."""
+    lat, lon = np.radians(lat), np.radians(lon)
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlon / 2) ** 2
+    return 2 * 6371.0 * np.arcsin(np.sqrt(a))
+
+
+def generate_mock_network(neighbours=4, max_haul_km=800.0):
+    """Mock road graph: every place joined to its nearest neighbours, plus a spanning tree."""
+    nodes = [{"name": mandi, "kind": "mandi", "district": district, "state": state}
+             for state, district, mandi in _MOCK_MANDIS]
+    coords = [_MOCK_MANDI_COORDS[mandi] for _, _, mandi in _MOCK_MANDIS]
+    for name, district, state, lat, lon in _MOCK_VILLAGES:
+        nodes.append({"name": name, "kind": "village", "district": district, "state": state})
+        coords.append((lat, lon))
+    lat, lon = np.array(coords).T
+    km = _haversine_km(lat, lon) * _ROAD_CIRCUITY
+
+    edges = set()
+    for i in range(len(nodes)):
+        for j in np.argsort(km[i])[1:neighbours + 1].tolist():
+            edges.add((min(i, j), max(i, j)))
+    # Prim's spanning tree keeps every region connected to the rest
+    in_tree = {0}
+    while len(in_tree) < len(nodes):
+        outside = [j for j in range(len(nodes)) if j not in in_tree]
+        i, j = min(((i, j) for i in in_tree for j in outside), key=lambda pair: km[pair])
+        edges.add((min(i, j), max(i, j)))
+        in_tree.add(j)
+    return RoadNetwork(nodes, [(i, j, round(float(km[i, j]), 1)) for i, j in sorted(edges)], max_haul_km)
+
+
+_default_selector = None
+_default_selector_lock = threading.Lock()
+
+
+def get_mandi_selector():
+    """The process-wide selector over the current price store.
+
+    ROAD_GRAPH_DIR (nodes.csv and edges.csv) supplies the road graph; otherwise
+    the mock network is used. Transport costs come from the TRANSPORT_* and
+    MANDI_FEE_PCT / STORAGE_COST_PER_QUINTAL_DAY env vars.
+    """
+    global _default_selector
+    store = get_price_store()
+    if _default_selector is None or _default_selector.store is not store:
+        with _default_selector_lock:
+            if _default_selector is None or _default_selector.store is not store:
+                network = _default_selector.network if _default_selector is not None else None
+                if network is None:
+                    graph_dir = os.getenv("ROAD_GRAPH_DIR")
+                    max_haul_km = float(os.getenv("MAX_HAUL_KM", "800"))
+                    if graph_dir and os.path.exists(os.path.join(graph_dir, "nodes.csv")):
+                        network = RoadNetwork.from_directory(graph_dir, max_haul_km)
+                    else:
+                        network = generate_mock_network(max_haul_km=max_haul_km)
+                _default_selector = MandiSelector(
+                    network,
+                    store,
+                    cost_per_km=float(os.getenv("TRANSPORT_COST_PER_KM", "35")),
+                    loading_cost=float(os.getenv("TRANSPORT_LOADING_COST", "500")),
+                    truck_capacity=float(os.getenv("TRANSPORT_TRUCK_CAPACITY_QUINTALS", "100")),
+                    mandi_fee_pct=float(os.getenv("MANDI_FEE_PCT", "2.5")),
+                    storage_cost=float(os.getenv("STORAGE_COST_PER_QUINTAL_DAY", "1.5")),
+                )
+    return _default_selector
@@ -1,3 +1,36 @@
+import numpy as np
+
+from .mandi_router import get_mandi_selector
+from .price_anomaly import PriceAnomalyDetector, price_anomaly_detector
+from .price_bands import get_reference_bands
+from .price_ledger import get_price_ledger, verify_proof
+from .price_store import from_day, get_price_store, to_day
+from .tool_cache import cached_tool
+
+# Change over the last week (vs the week before) that counts as a trend, in percent
+_TREND_THRESHOLD_PCT = 2.0
+
+
+def _location_filter(store, location):
+    """Query filter for a location and how it was matched (mandi, district, state or all)."""
+    level, code, name = store.resolve_location(location)
+    if level is None:
+        return {}, "all", None
+    # Filter on the code: a mandi name alone can match namesakes in other districts
+    return {level: code}, level, name
+
+
+def _weighted_price(series, rows):
+    """Arrival-weighted modal price of the selected rows (plain mean without arrivals)."""
+    prices = series.modal_price[rows]
+    weights = series.volume[rows]
+    if len(weights) and np.isfinite(weights).all() and weights.sum() > 0:
+        return float(np.average(prices, weights=weights))
+    return float(prices.mean())
+
+
+# Mandi prices move during the trading day, so cache them only briefly
+@cached_tool(ttl=5 * 60)
 def fetch_mandi_prices(crop: str, location: str, quality_grade: str = "A") -> dict:
     """
     Fetch real-time mandi prices from official APIs and government portals.
@@ -10,19 +43,96 @@ def fetch_mandi_prices(crop: str, location: str, quality_grade: str = "A") -> di
     Returns:
         Dictionary containing current mandi prices and market information
     """
-    # TODO: Integrate with government mandi APIs (e-NAM, Agmarknet)
-    return {
+    store = get_price_store()
+    filters, match_level, matched = _location_filter(store, location)
+
+    # Two weeks of history: the latest day for the price, both weeks for the trend
+    series = store.recent(crop, days=14, grade=quality_grade, **filters)
+    grade = quality_grade
+    grade_note = None
+    if not len(series):
+        # Fall back to the most reported grade (FAQ in Agmarknet dumps) rather than
+        # mixing grades, so every mandi has one price per day
+        all_grades = store.recent(crop, days=14, **filters)
+        if len(all_grades):
+            grade = store.grades.names[int(np.bincount(all_grades.grade).argmax())]
+            series = store.recent(crop, days=14, grade=grade, **filters)
+            grade_note = f"No grade {quality_grade} prices; showing grade {grade}"
+    if not len(series):
+        return {
+            "status": "error",
+            "crop": crop,
+            "location": location,
+            "message": f"No mandi price data for {crop} in {location}",
+        }
+
+    day = series.day
+    latest = int(day[-1])
+    today = np.flatnonzero(day == latest)
+    this_week = series.modal_price[day > latest - 7]
+    last_week = series.modal_price[day <= latest - 7]
+    change_pct = 0.0
+    if len(last_week):
+        change_pct = (this_week.mean() / last_week.mean() - 1) * 100
+    if change_pct > _TREND_THRESHOLD_PCT:
+        trend = "increasing"
+    elif change_pct < -_TREND_THRESHOLD_PCT:
+        trend = "decreasing"
+    else:
+        trend = "stable"
+
+    volume_tonnes = float(np.nansum(series.volume[today]))
+    # Count and list each mandi once, averaging its rows
+    mandis, row_mandi = np.unique(series.mandi[today], return_inverse=True)
+    mandi_modal = np.bincount(row_mandi, series.modal_price[today]) / np.bincount(row_mandi)
+    mandi_names = store.mandis.names
+    mandi_prices = sorted(
+        (
+            {"mandi": mandi_names[m], "modal_price": round(p, 2)}
+            for m, p in zip(mandis.tolist(), mandi_modal.tolist())
+        ),
+        key=lambda entry: -entry["modal_price"],
+    )
+
+    result = {
         "status": "success",
         "crop": crop,
         "location": location,
-        "current_price": 2200,
+        "matched_location": matched or "All mandis",
+        "match_level": match_level,
+        "current_price": round(_weighted_price(series, today), 2),
+        "min_price": round(float(series.min_price[today].min()), 2),
+        "max_price": round(float(series.max_price[today].max()), 2),
         "unit": "per quintal",
-        "quality_grade": quality_grade,
-        "price_trend": "increasing",
-        "volume_traded": "5000 quintals",
-        "last_updated": "2024-01-15T09:00:00Z",
-        "source": "Official Mandi API"
+        "quality_grade": grade,
+        "price_trend": trend,
+        "price_change_7d_pct": round(float(change_pct), 2),
+        "volume_traded": f"{volume_tonnes * 10:,.0f} quintals" if volume_tonnes else "Not reported",
+        "mandis_reporting": len(mandis),
+        "mandi_prices": mandi_prices[:10],
+        "last_updated": from_day(latest).isoformat(),
+        "source": store.source,
     }
+    if grade_note:
+        result["note"] = grade_note
+    return result
+
+def _confidence_level(level, samples):
+    """How much a band can be trusted: local, well-sampled bands count most."""
+    if level in ("mandi", "district") and samples >= 20:
+        return "high"
+    if level != "all":
+        return "medium"
+    return "low"
+
+
+def _validation_recommendation(score):
+    if score >= 0.8:
+        return "Accept and reward contributor"
+    if score >= 0.5:
+        return "Accept but spot-check against the next official report"
+    return "Reject: price is outside the official range for this market"
+
 
 def validate_community_price(user_id: str, crop: str, price: float, location: str) -> dict:
     """
@@ -37,41 +147,252 @@ def validate_community_price(user_id: str, crop: str, price: float, location: st
     Returns:
         Dictionary containing validation results and authenticity score
     """
-    # TODO: Implement AI-based validation logic
+    result = get_reference_bands().validate(crop, location, price)
+    band = result["band"]
+    if band is None:
+        return {
+            "status": "success",
+            "user_id": user_id,
+            "validation_score": None,
+            "is_authentic": None,
+            "confidence_level": "none",
+            "cross_reference": f"No official {crop} prices to compare with",
+            "anomaly_detected": False,
+            "recommendation": "Hold for manual review",
+        }
+
+    percentiles = band["percentiles"]
     return {
         "status": "success",
-        "validation_score": 0.92,
-        "is_authentic": True,
-        "confidence_level": "high",
-        "cross_reference": "Official price: ₹2200, Submitted: ₹2180",
-        "anomaly_detected": False,
-        "recommendation": "Accept and reward contributor"
+        "user_id": user_id,
+        "validation_score": result["validation_score"],
+        "is_authentic": result["is_authentic"],
+        "confidence_level": _confidence_level(band["level"], band["samples"]),
+        "cross_reference": (
+            f"Official price ({band['location']}, {band['period_start']} to {band['period_end']}): "
+            f"₹{band['median']:,.0f} median, ₹{percentiles['p05']:,.0f}-₹{percentiles['p95']:,.0f} "
+            f"typical; Submitted: ₹{price:,.0f}"
+        ),
+        "reference_band": band,
+        "anomaly_detected": result["anomaly_detected"],
+        "recommendation": _validation_recommendation(result["validation_score"]),
     }
 
+def validate_community_price_file(file_path: str) -> dict:
+    """
+    Validate a whole uploaded CSV of community price submissions in one pass.
+    
+    Args:
+        file_path: Path to a CSV with crop, location and price columns (optional date and user_id)
+    
+    Returns:
+        Dictionary containing acceptance counts and the submissions that failed validation
+    """
+    try:
+        rows, results = get_reference_bands().validate_csv(file_path)
+    except (OSError, ValueError) as e:
+        return {"status": "error", "file_path": file_path, "message": str(e)}
+
+    scores = results["score"]
+    has_band = ~np.isnan(scores)
+    authentic = results["is_authentic"]
+    flagged = np.flatnonzero(has_band & ~authentic)
+    return {
+        "status": "success",
+        "file_path": file_path,
+        "submissions": len(rows),
+        "accepted": int(authentic.sum()),
+        "rejected": len(flagged),
+        "no_reference": int((~has_band).sum()),
+        "anomalies_detected": int(results["anomaly_detected"].sum()),
+        "average_score": round(float(scores[has_band].mean()), 3) if has_band.any() else None,
+        "flagged_submissions": [
+            {
+                **rows[i],
+                "validation_score": round(float(scores[i]), 3),
+                "official_median": round(float(results["median"][i]), 2),
+                "reference_level": results["level"][i],
+            }
+            for i in flagged[:50].tolist()
+        ],
+    }
+
+# Validation score credited to prices that have no official band to check against
+_NO_REFERENCE_SCORE = 0.5
+
 def submit_price_to_blockchain(user_id: str, crop: str, price: float, location: str) -> dict:
     """
-    Submit validated price data to blockchain ledger and award authenticity points.
+    Validate a community price, record it on the blockchain ledger and award authenticity points.
+    
+    Prices outside the official band are rejected; points scale with the
+    validation score, and prices with no official reference to check
+    against earn half points.
     
     Args:
         user_id: ID of the contributor
         crop: Type of crop
-        price: Validated price
+        price: Price reported by the contributor
         location: Location of the price data
     
     Returns:
         Dictionary containing blockchain transaction details and points awarded
     """
-    # TODO: Integrate with blockchain platform (Hyperledger, Ethereum, etc.)
+    result = get_reference_bands().validate(crop, location, price)
+    if result["is_authentic"] is False:
+        return {
+            "status": "rejected",
+            "user_id": user_id,
+            "validation_score": result["validation_score"],
+            "message": "Price is outside the official range and was not recorded",
+        }
+    score = result["validation_score"]
+    if score is None:
+        score = _NO_REFERENCE_SCORE
+
+    ledger = get_price_ledger()
+    receipt = ledger.submit(user_id, crop, price, location, validation_score=score)
+    leaf = receipt["transaction_hash"]
+    return {
+        "status": "success",
+        "transaction_hash": "0x" + leaf,
+        # Known once the submission's block commits; get_price_submission_proof reports it later
+        "block_number": ledger.block_number(leaf),
+        "block_status": ledger.status(leaf),
+        "validation_score": round(score, 3),
+        "points_awarded": receipt["points_awarded"],
+        "total_points": receipt["total_points"],
+        "reputation_level": receipt["reputation_level"],
+        "timestamp": receipt["submitted_at"],
+    }
+
+def get_price_submission_proof(transaction_hash: str) -> dict:
+    """
+    Get the Merkle inclusion proof of a price submission recorded on the ledger.
+    
+    Args:
+        transaction_hash: Transaction hash returned by submit_price_to_blockchain
+    
+    Returns:
+        Dictionary containing the block, Merkle root and proof path, or the pending status
+    """
+    ledger = get_price_ledger()
+    leaf = transaction_hash[2:] if transaction_hash.startswith("0x") else transaction_hash
+    proof = ledger.proof(leaf)
+    if proof is None:
+        status = ledger.status(leaf)
+        return {
+            "status": "pending" if status == "pending" else "error",
+            "transaction_hash": transaction_hash,
+            "message": "Submission is waiting for the next block" if status == "pending"
+            else "Unknown transaction hash",
+        }
     return {
         "status": "success",
-        "transaction_hash": "0x1234567890abcdef",
-        "block_number": 12345,
-        "points_awarded": 10,
-        "total_points": 150,
-        "reputation_level": "Trusted Contributor",
-        "timestamp": "2024-01-15T10:30:00Z"
+        "transaction_hash": transaction_hash,
+        "block_number": proof["block_number"],
+        "leaf_index": proof["leaf_index"],
+        "merkle_root": proof["merkle_root"],
+        "proof": [{"hash": h, "side": side} for h, side in proof["proof"]],
+        "verified": verify_proof(leaf, proof["proof"], proof["merkle_root"]),
     }
 
+def _price_ticks(price_data):
+    """(prices, dates) from a list of numbers or dicts with price/modal_price and optional date."""
+    prices, dates = [], []
+    for item in price_data or []:
+        if isinstance(item, dict):
+            price = item.get("price", item.get("modal_price"))
+            when = item.get("date")
+        else:
+            price, when = item, None
+        try:
+            prices.append(float(price))
+        except (TypeError, ValueError):
+            continue
+        dates.append(when)
+    if dates and all(d is not None for d in dates):
+        days = [to_day(d) for d in dates]
+        order = np.argsort(days, kind="stable")
+        return np.asarray(prices)[order], [days[i] for i in order]
+    return np.asarray(prices), None
+
+
+def _daily_series(day, modal_price):
+    """One price per day: the mean modal price over the matched mandis."""
+    days, inverse = np.unique(day, return_inverse=True)
+    prices = np.bincount(inverse, weights=modal_price) / np.bincount(inverse)
+    return prices, days.tolist()
+
+
+def _series_location(store, filters):
+    """Live anomaly series name of a location filter: its level and full name, or "all"."""
+    if not filters:
+        return "all"
+    (level, code), = filters.items()
+    if level == "mandi":
+        district = store.districts.names[store.mandi_district[code]]
+        state = store.states.names[store.mandi_state[code]]
+        return f"mandi:{store.mandis.names[code]}, {district}, {state}"
+    names = store.districts.names if level == "district" else store.states.names
+    return f"{level}:{names[code]}"
+
+
+def _series_rows(store, location, mandi):
+    """Mask of the rows (given their mandi codes) that belong to a live series, or None if unknown."""
+    level, _, name = location.partition(":")
+    if level == "all":
+        return np.ones(len(mandi), dtype=bool)
+    if level == "mandi":
+        code = store.mandis.get(*name.rsplit(", ", 2))
+        return None if code is None else mandi == code
+    if level == "district":
+        code = store.districts.get(name)
+        return None if code is None else store.mandi_district[mandi] == code
+    if level == "state":
+        code = store.states.get(name)
+        return None if code is None else store.mandi_state[mandi] == code
+    return None
+
+
+def _feed_price_anomalies(store, crop, rows):
+    """Merge listener: fold newly merged prices into the crop's live anomaly series.
+
+    Each series gets one tick per new day, the mean over its matched rows.
+    Rows for days a series has already scored (late rows, corrections, or a
+    day whose prices arrive in several merges) are not scored again.
+    """
+    for location in price_anomaly_detector.locations(crop):
+        selected = _series_rows(store, location, rows["mandi"])
+        if selected is None or not selected.any():
+            continue
+        prices, days = _daily_series(rows["day"][selected], rows["modal_price"][selected])
+        for day, price in zip(days, prices.tolist()):
+            price_anomaly_detector.update(crop, location, price, day=day, create=False)
+
+
+_ANOMALY_DESCRIPTIONS = {
+    "sudden_spike": "Price rose {change:.1f}% in one step, far above the rolling median",
+    "sudden_drop": "Price fell {change:.1f}% in one step, far below the rolling median",
+    "pump_and_dump": "Price collapsed {change:.1f}% right after a spike (possible manipulation)",
+    "ramping": "Steady run of increases pushed the price well above its trend (possible ramping)",
+    "price_fixing": "Identical prices reported repeatedly (possible price fixing or stale data)",
+}
+
+_ANOMALY_RECOMMENDATIONS = {
+    "sudden_spike": "Cross-validate the spike against neighbouring mandis before acting on it",
+    "sudden_drop": "Hold sales if possible until prices recover or the drop is confirmed",
+    "pump_and_dump": "Investigate the source of the spike and the reporting traders",
+    "ramping": "Watch for a reversal; avoid buying inputs priced off this mandi",
+    "price_fixing": "Verify the reports with the mandi committee or e-NAM",
+}
+
+
+# Rolling window for supplied price lists: half the list, at most this many ticks,
+# so that z-scores are checked on the second half even for short lists
+_SUPPLIED_Z_WINDOW = 30
+_MIN_Z_WINDOW = 7
+
+
 def detect_price_anomalies(price_data: list, crop: str, location: str) -> dict:
     """
     Detect price anomalies and potential manipulation using AI and statistical analysis.
@@ -84,21 +405,106 @@ def detect_price_anomalies(price_data: list, crop: str, location: str) -> dict:
     Returns:
         Dictionary containing anomaly detection results
     """
-    # TODO: Implement ML-based anomaly detection
-    return {
+    prices, days = _price_ticks(price_data)
+    horizon = None
+    z_score_note = None
+    past_year = None
+    if len(prices):
+        # Supplied prices are analysed on their own and never enter the live series,
+        # so the result does not depend on earlier calls
+        source = "submitted price data"
+        window = min(_SUPPLIED_Z_WINDOW, len(prices) // 2)
+        if window < _MIN_Z_WINDOW:
+            # Too few prices for a rolling window: only the pattern checks can run
+            window = len(prices)
+            z_score_note = (
+                f"Spike and drop checks skipped: they need at least {2 * _MIN_Z_WINDOW} prices"
+            )
+        detector = PriceAnomalyDetector(window=window)
+        anomalies = detector.backfill(crop, location, prices, days)
+        stats = detector.series_state(crop, location)
+        ticks = len(prices)
+    else:
+        # No data supplied: read the live series, which the store feeds as prices are merged
+        store = get_price_store()
+        store.add_merge_listener(_feed_price_anomalies)
+        filters, _, _ = _location_filter(store, location)
+        series_location = _series_location(store, filters)
+        # Merges anything staged, so the series is up to date
+        store.latest_day(crop)
+        live = price_anomaly_detector.snapshot(crop, series_location)
+        if live is None:
+            # First request for this series: backfill a year of stored history in one batch pass
+            series = store.recent(crop, days=365, **filters)
+            if not len(series):
+                return {
+                    "status": "error",
+                    "crop": crop,
+                    "location": location,
+                    "message": f"No price history for {crop} in {location}",
+                }
+            prices, days = _daily_series(series.day, series.modal_price)
+            price_anomaly_detector.backfill(crop, series_location, prices, days)
+            live = price_anomaly_detector.snapshot(crop, series_location)
+        source = store.source
+        anomalies = live["anomalies"]
+        stats = live["stats"]
+        ticks = stats["ticks"]
+        horizon = live["last_day"] - 30
+        past_year = sum(1 for a in anomalies if a["day"] > live["last_day"] - 365)
+
+    recent = [a for a in anomalies if horizon is None or a.get("day", horizon + 1) > horizon]
+    details = []
+    for anomaly in recent[-10:]:
+        detail = {
+            "type": anomaly["type"],
+            "severity": anomaly["severity"],
+            "description": _ANOMALY_DESCRIPTIONS[anomaly["type"]].format(
+                change=abs(anomaly.get("change_pct", 0.0))
+            ),
+            "price": anomaly["price"],
+        }
+        if "confidence" in anomaly:
+            detail["confidence"] = anomaly["confidence"]
+        if anomaly.get("day") is not None:
+            detail["date"] = from_day(anomaly["day"]).isoformat()
+        details.append(detail)
+
+    types = {a["type"] for a in recent}
+    if any(a["severity"] == "high" for a in recent) or types & {"pump_and_dump", "ramping"}:
+        risk_level = "high"
+    elif recent:
+        risk_level = "medium"
+    else:
+        risk_level = "low"
+
+    result = {
         "status": "success",
-        "anomalies_detected": 2,
-        "anomaly_details": [
-            {
-                "type": "sudden_spike",
-                "severity": "high",
-                "description": "Price increased by 25% in 24 hours",
-                "confidence": 0.95
-            }
-        ],
-        "risk_level": "medium",
-        "recommendations": ["Investigate source", "Cross-validate data"]
+        "crop": crop,
+        "location": location,
+        "ticks_analyzed": ticks,
+        "source": source,
+        "anomalies_detected": len(recent),
+        "anomaly_details": details,
+        "risk_level": risk_level,
+        "rolling_stats": {k: round(v, 2) if isinstance(v, float) else v for k, v in (stats or {}).items()},
+        "recommendations": [_ANOMALY_RECOMMENDATIONS[t] for t in sorted(types)]
+        or ["No unusual price movement; prices are consistent with recent history"],
     }
+    if z_score_note:
+        result["note"] = z_score_note
+    if horizon is not None:
+        result["analysis_window"] = "last 30 days of the live series"
+        result["anomalies_past_year"] = past_year
+    return result
+
+def _selection_market(selector, crop, quality):
+    """Grade to price with: the requested one, or all grades when it has no quotes."""
+    market = selector.market(crop, quality)
+    if np.isfinite(market["price"]).any():
+        return quality, None
+    return None, f"No grade {quality} prices; using all grades"
+
 
 def calculate_selling_recommendations(crop: str, quantity: float, location: str, quality: str) -> dict:
     """
@@ -106,26 +512,100 @@ def calculate_selling_recommendations(crop: str, quantity: float, location: str,
     
     Args:
         crop: Type of crop to sell
-        quantity: Quantity available for sale
-        location: Seller's location
+        quantity: Quantity available for sale, in quintals
+        location: Seller's location (village or mandi)
         quality: Quality grade of the crop
     
     Returns:
         Dictionary containing selling recommendations and market analysis
     """
-    # TODO: Implement ML-based recommendation engine
+    try:
+        quantity = float(quantity)
+    except (TypeError, ValueError):
+        quantity = float("nan")
+    if not (np.isfinite(quantity) and quantity > 0):
+        return {
+            "status": "error",
+            "crop": crop,
+            "location": location,
+            "message": "Quantity must be a positive number of quintals",
+        }
+
+    selector = get_mandi_selector()
+    grade, grade_note = _selection_market(selector, crop, quality)
+    mandis = selector.top_mandis(crop, quantity, location, grade=grade, top=5)
+    if mandis is None:
+        return {
+            "status": "error",
+            "crop": crop,
+            "location": location,
+            "message": f"Location {location} is not on the road network",
+        }
+    if not mandis:
+        return {
+            "status": "error",
+            "crop": crop,
+            "location": location,
+            "message": f"No recent {crop} prices at mandis within {selector.network.max_haul_km:.0f} km of {location}",
+        }
+
+    best = mandis[0]
+    # The nearest quoted mandi may be outside the top five, so it is looked up separately
+    nearest = selector.nearest_mandi(crop, quantity, location, grade=grade) or best
+    timing = "Sell now" if best["sell_in_days"] == 0 else f"Hold about {best['sell_in_days']} days"
+    recommendations = [
+        f"Sell at {best['mandi']} ({best['distance_km']:.0f} km) for about "
+        f"₹{best['net_per_quintal']:,.0f} per quintal after transport and mandi fees",
+    ]
+    if best["sell_in_days"]:
+        recommendations.append(
+            f"Prices at {best['mandi']} are rising; holding {best['sell_in_days']} days beats storage costs"
+        )
+    if nearest["mandi"] != best["mandi"]:
+        gain = best["net_realisation"] - nearest["net_realisation"]
+        recommendations.append(
+            f"Travelling beyond the nearest mandi ({nearest['mandi']}) adds about ₹{gain:,.0f} overall"
+        )
+    if grade_note:
+        recommendations.append(grade_note)
+
+    prices = [m["expected_price"] for m in mandis]
     return {
         "status": "success",
-        "optimal_price": 2250,
-        "price_range": "₹2200-2300",
-        "best_mandi": "Central Mandi, Delhi",
-        "optimal_timing": "Next 2-3 days",
-        "expected_profit": "₹5000-8000",
-        "market_demand": "High",
-        "competition": "Low",
-        "recommendations": [
-            "Sell in next 3 days",
-            "Target premium quality buyers",
-            "Consider bulk sale for better price"
-        ]
-    } 
\ No newline at end of file
+        "crop": crop,
+        "quantity": f"{quantity} quintals",
+        "optimal_price": best["expected_price"],
+        "price_range": f"₹{min(prices):,.0f}-{max(prices):,.0f}",
+        "best_mandi": f"{best['mandi']}, {best['state']}",
+        "optimal_timing": timing,
+        "expected_net_realisation": best["net_realisation"],
+        "top_mandis": mandis,
+        "recommendations": recommendations,
+    }
+
+def plan_fpo_sales(crop: str, members: list, quality: str) -> dict:
+    """
+    Plan where and when every member of a farmer producer organisation should sell.
+    
+    Args:
+        crop: Type of crop to sell
+        members: List of members, each with location, quantity (quintals) and optional member_id
+        quality: Quality grade of the crop
+    
+    Returns:
+        Dictionary containing the best mandis per member and the best common mandi for the group
+    """
+    selector = get_mandi_selector()
+    grade, grade_note = _selection_market(selector, crop, quality)
+    plan = selector.plan_batch(crop, members, grade=grade, top=3)
+    result = {
+        "status": "success" if plan["members"] else "error",
+        "crop": crop,
+        "members_planned": len(plan["members"]),
+        "members_unresolved": plan["unresolved"],
+        "common_mandi": plan["common_mandi"],
+        "member_plans": plan["members"],
+    }
+    if grade_note:
+        result["note"] = grade_note
+    return result
@@ -0,0 +1,483 @@
+"""
+Streaming price anomaly detection.
+
+Every (crop, location) series keeps constant-size state: a window of the
+last ``window`` prices with its running sum and sum of squares (rolling
+mean and variance), the same window kept sorted (rolling median and median
+absolute deviation), an EWMA, a few run counters and the last ``max_flags`` anomalies. A new tick
+is checked against the state and then folded in. Keeping the window sorted
+costs an insert and a delete in a ``window``-long list, and the MAD sorts the
+window's deviations, so a tick is O(window log window) work, independent of
+history length, and history is never rescanned.
+
+The shared detector is fed by the price store as new prices are merged (see
+``tools.market_tools``), for the series that have been asked about once.
+
+Each tick gets at most one flag, in priority order:
+
+- pump_and_dump: a sudden drop within ``revert_window`` ticks of a spike
+- sudden_spike / sudden_drop: robust z-score (median/MAD) beyond
+  ``z_threshold`` together with a tick-over-tick move of ``min_change_pct``
+- ramping: ``ramp_ticks`` consecutive increases ending ``ramp_pct`` above the
+  EWMA, which catches gradual price pushing that never trips the z-score
+- price_fixing: ``flat_ticks`` identical consecutive prices
+
+Z-score flags need a full window. ``detect_batch`` applies the same rules to a
+whole (series x time) array with sliding windows and cumulative run counts.
+It produces the same flags as feeding the ticks one by one, so a year of
+history can be backfilled in one NumPy pass.
+"""
+
+import bisect
+import math
+import threading
+from collections import OrderedDict, deque
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .soil_profiles import normalize_location
+
+# Flag codes used by detect_batch; 0 means no anomaly
+NO_ANOMALY, SUDDEN_SPIKE, SUDDEN_DROP, PUMP_AND_DUMP, RAMPING, PRICE_FIXING = range(6)
+
+ANOMALY_TYPES = {
+    SUDDEN_SPIKE: "sudden_spike",
+    SUDDEN_DROP: "sudden_drop",
+    PUMP_AND_DUMP: "pump_and_dump",
+    RAMPING: "ramping",
+    PRICE_FIXING: "price_fixing",
+}
+
+# Scales a MAD to a standard deviation for normally distributed prices
+_MAD_SCALE = 1.4826
+
+
+def _robust_scale(median, mad):
+    """Denominator of the robust z-score, floored so flat windows do not divide by zero."""
+    return np.maximum(_MAD_SCALE * mad, np.maximum(np.abs(median) * 1e-3, 1e-9))
+
+
+def _ewma(x, alpha):
+    """EWMA along the last axis (y0 = x0), vectorized in blocks that cannot overflow."""
+    beta = 1.0 - alpha
+    out = np.empty_like(x)
+    out[..., 0] = x[..., 0]
+    if x.shape[-1] == 1:
+        return out
+    # beta ** -block stays below 1e150
+    block = max(1, int(150 / -math.log10(beta))) if beta > 0 else 1
+    prev = x[..., 0]
+    for start in range(1, x.shape[-1], block):
+        segment = x[..., start:start + block]
+        k = np.arange(1, segment.shape[-1] + 1)
+        y = beta ** k * (prev[..., None] + alpha * np.cumsum(segment * beta ** -k, axis=-1))
+        out[..., start:start + block] = y
+        prev = y[..., -1]
+    return out
+
+
+def _run_lengths(condition):
+    """Length of the run of True values ending at each position, along the last axis."""
+    idx = np.arange(condition.shape[-1])
+    last_false = np.maximum.accumulate(np.where(condition, -1, idx), axis=-1)
+    return idx - last_false, last_false
+
+
+def _first_in_run(condition, last_false):
+    """True where `condition` holds for the first time since the run started at last_false."""
+    counts = np.cumsum(condition, axis=-1)
+    before = np.where(last_false >= 0, np.take_along_axis(counts, np.maximum(last_false, 0), axis=-1), 0)
+    return condition & (counts - before == 1)
+
+
+class _SeriesState:
+    """Constant-size streaming state of one (crop, location) series."""
+
+    __slots__ = (
+        "window", "sorted_window", "total", "total_sq", "ewma", "last_price", "last_day",
+        "ticks", "flat_run", "ramp_run", "ramp_flagged", "last_spike_tick", "flags",
+    )
+
+    def __init__(self, window, max_flags):
+        self.window = deque(maxlen=window)
+        self.sorted_window = []
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.ewma = None
+        self.last_price = None
+        self.last_day = None
+        self.ticks = 0
+        self.flat_run = 0
+        self.ramp_run = 0
+        self.ramp_flagged = False
+        self.last_spike_tick = None
+        # Most recent anomalies, oldest first
+        self.flags = deque(maxlen=max_flags)
+
+    def push(self, price):
+        """Add a price to the rolling window, evicting the oldest when full."""
+        if len(self.window) == self.window.maxlen:
+            old = self.window[0]
+            self.total -= old
+            self.total_sq -= old * old
+            del self.sorted_window[bisect.bisect_left(self.sorted_window, old)]
+        self.window.append(price)
+        self.total += price
+        self.total_sq += price * price
+        bisect.insort(self.sorted_window, price)
+
+    def median(self):
+        values = self.sorted_window
+        n = len(values)
+        mid = n // 2
+        return values[mid] if n % 2 else (values[mid - 1] + values[mid]) / 2
+
+    def summary(self):
+        """Current rolling statistics."""
+        n = len(self.window)
+        if not n:
+            return {"ticks": self.ticks}
+        mean = self.total / n
+        median = self.median()
+        deviations = sorted(abs(v - median) for v in self.sorted_window)
+        mid = n // 2
+        mad = deviations[mid] if n % 2 else (deviations[mid - 1] + deviations[mid]) / 2
+        return {
+            "ticks": self.ticks,
+            "window": n,
+            "mean": mean,
+            "std": math.sqrt(max(self.total_sq / n - mean * mean, 0.0)),
+            "median": median,
+            "mad": mad,
+            "ewma": self.ewma,
+            "last_price": self.last_price,
+        }
+
+
+class PriceAnomalyDetector:
+    """Per-(crop, location) streaming detector for spikes, drops and manipulation patterns."""
+
+    def __init__(
+        self,
+        window=30,
+        z_threshold=3.5,
+        min_change_pct=8.0,
+        ewma_alpha=0.2,
+        revert_window=5,
+        ramp_ticks=5,
+        ramp_pct=10.0,
+        flat_ticks=7,
+        max_series=100_000,
+        max_flags=128,
+    ):
+        """
+        Args:
+            window (int): Ticks in the rolling window (z-score flags need a full window)
+            z_threshold (float): Robust z-score that counts as a spike or drop
+            min_change_pct (float): Tick-over-tick move a spike or drop also needs
+            ewma_alpha (float): Weight of the newest tick in the EWMA
+            revert_window (int): Ticks after a spike in which a drop is a pump_and_dump
+            ramp_ticks (int): Consecutive increases that make a ramp
+            ramp_pct (float): How far above the EWMA a ramp must end
+            flat_ticks (int): Identical consecutive prices flagged as price fixing
+            max_series (int): Series kept before the least recently updated is dropped
+            max_flags (int): Most recent anomalies kept per series for reporting
+        """
+        self.window = window
+        self.z_threshold = z_threshold
+        self.min_change_pct = min_change_pct
+        self.ewma_alpha = ewma_alpha
+        self.revert_window = revert_window
+        self.ramp_ticks = ramp_ticks
+        self.ramp_pct = ramp_pct
+        self.flat_ticks = flat_ticks
+        self.max_series = max_series
+        self.max_flags = max_flags
+        self._series = OrderedDict()
+        self._lock = threading.Lock()
+        self.ticks = 0
+        self.anomalies = 0
+
+    @staticmethod
+    def series_key(crop, location):
+        return normalize_location(crop), normalize_location(location)
+
+    def _state(self, key):
+        state = self._series.get(key)
+        if state is None:
+            state = self._series[key] = _SeriesState(self.window, self.max_flags)
+            while len(self._series) > self.max_series:
+                self._series.popitem(last=False)
+        self._series.move_to_end(key)
+        return state
+
+    def _anomaly(self, code, price, robust_z=None, change_pct=None, ewma=None, day=None):
+        if code in (RAMPING, PRICE_FIXING):
+            # Pattern flags are not about the size of a single deviation
+            robust_z = None
+        if robust_z is not None and abs(robust_z) >= 2 * self.z_threshold:
+            severity = "high"
+        elif robust_z is not None and abs(robust_z) < 1.5 * self.z_threshold:
+            severity = "low"
+        else:
+            severity = "medium"
+        anomaly = {"type": ANOMALY_TYPES[code], "severity": severity, "price": price}
+        if day is not None:
+            anomaly["day"] = day
+        if robust_z is not None:
+            anomaly["robust_z"] = round(float(robust_z), 2)
+            anomaly["confidence"] = round(min(0.99, 1 - math.exp(-abs(robust_z) / self.z_threshold)), 2)
+        if change_pct is not None:
+            anomaly["change_pct"] = round(float(change_pct), 2)
+        if ewma is not None:
+            anomaly["ewma"] = round(float(ewma), 2)
+        return anomaly
+
+    def update(self, crop, location, price, day=None, create=True):
+        """Fold one price tick into its series and check it.
+
+        Args:
+            crop (str): Crop name
+            location (str): Mandi or region
+            price (float): Price per quintal (non-positive or NaN ticks are ignored)
+            day: Optional tick date/ordinal; ticks not after the last seen day are ignored
+            create (bool): Start a new series for an unseen (crop, location); when
+                False such ticks are ignored
+
+        Returns:
+            dict: The anomaly flagged for this tick, or None
+        """
+        price = float(price)
+        if not price > 0:
+            return None
+        key = self.series_key(crop, location)
+        with self._lock:
+            if not create and key not in self._series:
+                return None
+            state = self._state(key)
+            if day is not None:
+                if state.last_day is not None and day <= state.last_day:
+                    return None
+                state.last_day = day
+            code, details = self._check(state, price)
+            self._fold(state, price)
+            self.ticks += 1
+            if code == NO_ANOMALY:
+                return None
+            self.anomalies += 1
+            anomaly = self._anomaly(code, price, day=day, **details)
+            state.flags.append(anomaly)
+        return anomaly
+
+    def _check(self, state, price):
+        """Flag for a tick against the state before the tick is folded in."""
+        last = state.last_price
+        change_pct = 0.0 if last is None else (price / last - 1) * 100
+        details = {"change_pct": change_pct, "ewma": state.ewma}
+
+        # Run counters describe the series including this tick
+        state.flat_run = state.flat_run + 1 if price == last else 0
+        if change_pct > 0:
+            state.ramp_run += 1
+        else:
+            state.ramp_run = 0
+            state.ramp_flagged = False
+
+        code = NO_ANOMALY
+        if len(state.window) == self.window:
+            median = state.median()
+            mad = state.summary()["mad"]
+            robust_z = (price - median) / float(_robust_scale(median, mad))
+            details["robust_z"] = robust_z
+            spike = robust_z >= self.z_threshold and change_pct >= self.min_change_pct
+            drop = robust_z <= -self.z_threshold and change_pct <= -self.min_change_pct
+            if drop and state.last_spike_tick is not None and \
+                    state.ticks - state.last_spike_tick <= self.revert_window:
+                code = PUMP_AND_DUMP
+            elif spike:
+                code = SUDDEN_SPIKE
+            elif drop:
+                code = SUDDEN_DROP
+            if spike:
+                state.last_spike_tick = state.ticks
+
+        if code == NO_ANOMALY and state.ramp_run >= self.ramp_ticks and not state.ramp_flagged \
+                and state.ewma is not None and price > state.ewma * (1 + self.ramp_pct / 100):
+            code = RAMPING
+        if state.ramp_run >= self.ramp_ticks and state.ewma is not None \
+                and price > state.ewma * (1 + self.ramp_pct / 100):
+            state.ramp_flagged = True
+        if code == NO_ANOMALY and state.flat_run == self.flat_ticks - 1:
+            code = PRICE_FIXING
+        return code, details
+
+    def _fold(self, state, price):
+        state.push(price)
+        state.ewma = price if state.ewma is None else (
+            self.ewma_alpha * price + (1 - self.ewma_alpha) * state.ewma
+        )
+        state.last_price = price
+        state.ticks += 1
+
+    def detect_batch(self, prices):
+        """Apply the streaming rules to whole series at once.
+
+        Args:
+            prices (array): (T,) or (S, T) prices, oldest first, all positive
+
+        Returns:
+            dict: Arrays shaped like `prices`: "flags" (anomaly codes),
+                "robust_z" (NaN until the window is full), "change_pct" and
+                "ewma" (EWMA before each tick)
+        """
+        x = np.asarray(prices, dtype=np.float64)
+        squeeze = x.ndim == 1
+        x = np.atleast_2d(x)
+        S, T = x.shape
+        W = self.window
+        idx = np.arange(T)
+
+        change_pct = np.zeros_like(x)
+        change_pct[:, 1:] = (x[:, 1:] / x[:, :-1] - 1) * 100
+        ewma = _ewma(x, self.ewma_alpha)
+        ewma_before = np.full_like(x, np.nan)
+        ewma_before[:, 1:] = ewma[:, :-1]
+
+        # Rolling median/MAD of the W ticks before each tick t >= W
+        robust_z = np.full_like(x, np.nan)
+        if T > W:
+            windows = sliding_window_view(x, W, axis=-1)[:, :-1]
+            median = np.median(windows, axis=-1)
+            mad = np.median(np.abs(windows - median[..., None]), axis=-1)
+            robust_z[:, W:] = (x[:, W:] - median) / _robust_scale(median, mad)
+
+        with np.errstate(invalid="ignore"):
+            spike = (robust_z >= self.z_threshold) & (change_pct >= self.min_change_pct)
+            drop = (robust_z <= -self.z_threshold) & (change_pct <= -self.min_change_pct)
+
+        # Most recent spike strictly before each tick
+        last_spike = np.maximum.accumulate(np.where(spike, idx, -(10 ** 9)), axis=-1)
+        prior_spike = np.full_like(last_spike, -(10 ** 9))
+        prior_spike[:, 1:] = last_spike[:, :-1]
+        pump = drop & (idx - prior_spike <= self.revert_window)
+
+        rising = change_pct > 0
+        ramp_run, ramp_start = _run_lengths(rising)
+        with np.errstate(invalid="ignore"):
+            ramp_ready = (ramp_run >= self.ramp_ticks) & (x > ewma_before * (1 + self.ramp_pct / 100))
+        ramp = _first_in_run(ramp_ready, ramp_start)
+
+        same = np.zeros_like(rising)
+        same[:, 1:] = x[:, 1:] == x[:, :-1]
+        flat_run, _ = _run_lengths(same)
+        fixing = flat_run == self.flat_ticks - 1
+
+        flags = np.select(
+            [pump, spike, drop, ramp, fixing],
+            [PUMP_AND_DUMP, SUDDEN_SPIKE, SUDDEN_DROP, RAMPING, PRICE_FIXING],
+            default=NO_ANOMALY,
+        ).astype(np.int8)
+
+        result = {"flags": flags, "robust_z": robust_z, "change_pct": change_pct, "ewma": ewma_before}
+        if squeeze:
+            result = {name: values[0] for name, values in result.items()}
+        return result
+
+    def backfill(self, crop, location, prices, days=None):
+        """Detect anomalies over a history in one batch pass and seed the streaming state.
+
+        Args:
+            crop (str): Crop name
+            location (str): Mandi or region
+            prices (array): (T,) positive prices, oldest first
+            days (array, optional): Tick dates/ordinals, reported with each anomaly
+
+        Returns:
+            list: Anomaly dicts in time order
+        """
+        x = np.asarray(prices, dtype=np.float64)
+        if not len(x):
+            return []
+        batch = self.detect_batch(x)
+        flags = batch["flags"]
+
+        anomalies = []
+        for t in np.flatnonzero(flags).tolist():
+            z = batch["robust_z"][t]
+            ewma = batch["ewma"][t]
+            anomalies.append(self._anomaly(
+                int(flags[t]), float(x[t]),
+                robust_z=None if np.isnan(z) else z,
+                change_pct=batch["change_pct"][t],
+                ewma=None if np.isnan(ewma) else ewma,
+                day=None if days is None else days[t],
+            ))
+
+        # Continue streaming exactly where the batch ended
+        state = _SeriesState(self.window, self.max_flags)
+        state.flags.extend(anomalies)
+        for price in x[-self.window:].tolist():
+            state.push(price)
+        state.ewma = float(_ewma(x[None, :], self.ewma_alpha)[0, -1])
+        state.last_price = float(x[-1])
+        state.ticks = len(x)
+        if days is not None:
+            state.last_day = days[-1]
+        rising = batch["change_pct"] > 0
+        state.ramp_run = int(_run_lengths(rising[None, :])[0][0, -1])
+        if state.ramp_run:
+            # A ramp flags once per rising run, even if a higher-priority flag took the tick
+            run = slice(len(x) - state.ramp_run, None)
+            with np.errstate(invalid="ignore"):
+                ready = (np.arange(1, state.ramp_run + 1) >= self.ramp_ticks) & (
+                    x[run] > batch["ewma"][run] * (1 + self.ramp_pct / 100)
+                )
+            state.ramp_flagged = bool(ready.any())
+        same = np.zeros(len(x), dtype=bool)
+        same[1:] = x[1:] == x[:-1]
+        state.flat_run = int(_run_lengths(same[None, :])[0][0, -1])
+        spikes = np.flatnonzero(
+            (batch["robust_z"] >= self.z_threshold) & (batch["change_pct"] >= self.min_change_pct)
+        )
+        state.last_spike_tick = int(spikes[-1]) if len(spikes) else None
+
+        with self._lock:
+            self._series[self.series_key(crop, location)] = state
+            self._series.move_to_end(self.series_key(crop, location))
+            self.ticks += len(x)
+            self.anomalies += len(anomalies)
+        return anomalies
+
+    def locations(self, crop):
+        """Normalized locations with a live series for the crop."""
+        crop_key = self.series_key(crop, None)[0]
+        with self._lock:
+            return [location for crop_name, location in self._series if crop_name == crop_key]
+
+    def snapshot(self, crop, location):
+        """Rolling statistics, last day and recent anomalies of a series, or None if it is unseen.
+
+        Returns:
+            dict: "stats" (see series_state), "last_day" and "anomalies" (the
+                last max_flags anomaly dicts, oldest first)
+        """
+        with self._lock:
+            state = self._series.get(self.series_key(crop, location))
+            if state is None:
+                return None
+            return {"stats": state.summary(), "last_day": state.last_day, "anomalies": list(state.flags)}
+
+    def series_state(self, crop, location):
+        """Rolling statistics of a series, or None if it has no ticks."""
+        with self._lock:
+            state = self._series.get(self.series_key(crop, location))
+            return None if state is None else state.summary()
+
+    def stats(self):
+        with self._lock:
+            return {"series": len(self._series), "ticks": self.ticks, "anomalies": self.anomalies}
+
+
+# Shared by the market tools
+price_anomaly_detector = PriceAnomalyDetector()
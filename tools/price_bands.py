@@ -0,0 +1,517 @@
+"""
+Reference price bands for validating community price submissions.
+
+For every (crop, location, date bucket) the index holds quantiles of the
+official modal prices (5th, 25th, 50th, 75th and 95th percentile), the
+traded envelope (lowest min_price and highest max_price) and the sample
+count. Bands exist at four levels: mandi, district, state and a national
+"all" level. Buckets are ``bucket_days`` long and aligned to the epoch.
+
+Each level is a sparse table sorted by key = (bucket << 32) | location code.
+A lookup is one binary search. A refresh only recomputes buckets from the
+last indexed bucket onward: it truncates the table there and appends the
+new rows, which stay sorted because their buckets are the newest. The
+index checks the price store's merge revision for the crop, so new
+official prices are picked up on the next lookup.
+
+A submission is checked against the most specific band that has at least
+``min_samples`` prices. The search tries the submission's bucket and the
+``max_lag_buckets`` before it, then moves up from mandi to district to
+state to all. ``validate_batch`` does the same for a whole upload in
+vectorized passes: at most one per (level, lag) pair.
+"""
+
+import csv
+import os
+import threading
+from datetime import date
+
+import numpy as np
+
+from .price_store import from_day, get_price_store, normalize_name, to_day
+
+# Quantiles kept per band, low to high; the middle one is the median
+BAND_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+# Band levels, most specific first
+LEVELS = ("mandi", "district", "state", "all")
+
+_CODE_BITS = 32
+_CODE_MASK = (1 << _CODE_BITS) - 1
+
+# Score at the 5th/95th percentile; prices between there and the interquartile range interpolate to 1
+_EDGE_SCORE = 0.7
+# Scores below this are not treated as authentic
+_AUTHENTIC_SCORE = 0.5
+
+
+def _group_bands(keys, modal, low, high, quantiles):
+    """Quantiles of `modal` and the min/max envelope for every distinct key.
+
+    Returns:
+        tuple: (sorted unique keys, quantiles (n, q), low (n,), high (n,), counts (n,))
+    """
+    order = np.lexsort((modal, keys))
+    keys, modal = keys[order], modal[order]
+    starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+    counts = np.diff(np.append(starts, len(keys)))
+
+    # Linear interpolation between order statistics, like np.quantile
+    position = starts[:, None] + np.asarray(quantiles)[None, :] * (counts[:, None] - 1)
+    below = np.floor(position).astype(np.int64)
+    above = np.minimum(below + 1, starts[:, None] + counts[:, None] - 1)
+    fraction = position - below
+    bands = modal[below] * (1 - fraction) + modal[above] * fraction
+
+    envelope_low = np.minimum.reduceat(low[order], starts)
+    envelope_high = np.maximum.reduceat(high[order], starts)
+    return (keys[starts], bands.astype(np.float32), envelope_low.astype(np.float32),
+            envelope_high.astype(np.float32), counts.astype(np.int32))
+
+
+def band_scores(prices, bands, low, high):
+    """Validation score in [0, 1] of each price against its band.
+
+    Prices inside the interquartile range score 1. Between the quartiles and
+    the 5th/95th percentiles the score falls linearly to 0.7. Beyond those
+    percentiles it halves for every envelope-gap of distance: the gap is the
+    space between the percentile and the lowest/highest traded price, and
+    is at least 2% of the median. Prices without a band (NaN) score NaN.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    bands = np.asarray(bands, dtype=np.float64)
+    p05, p25, p50, p75, p95 = (bands[..., i] for i in range(len(BAND_QUANTILES)))
+    low = np.asarray(low, dtype=np.float64)
+    high = np.asarray(high, dtype=np.float64)
+    min_gap = 0.02 * p50
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lower_tail = _EDGE_SCORE + (1 - _EDGE_SCORE) * (prices - p05) / np.maximum(p25 - p05, 1e-9)
+        upper_tail = _EDGE_SCORE + (1 - _EDGE_SCORE) * (p95 - prices) / np.maximum(p95 - p75, 1e-9)
+        below = _EDGE_SCORE * 0.5 ** ((p05 - prices) / np.maximum(p05 - low, min_gap))
+        above = _EDGE_SCORE * 0.5 ** ((prices - p95) / np.maximum(high - p95, min_gap))
+    return np.select(
+        [prices < p05, prices < p25, prices <= p75, prices <= p95],
+        [below, lower_tail, np.ones_like(prices), upper_tail],
+        above,
+    )
+
+
+def _score_one(price, quantiles, low, high):
+    """band_scores for a single price, without the array overhead."""
+    p05, p25, p50, p75, p95 = quantiles
+    min_gap = 0.02 * p50
+    if price < p05:
+        return _EDGE_SCORE * 0.5 ** ((p05 - price) / max(p05 - low, min_gap))
+    if price < p25:
+        return _EDGE_SCORE + (1 - _EDGE_SCORE) * (price - p05) / max(p25 - p05, 1e-9)
+    if price <= p75:
+        return 1.0
+    if price <= p95:
+        return _EDGE_SCORE + (1 - _EDGE_SCORE) * (p95 - price) / max(p95 - p75, 1e-9)
+    return _EDGE_SCORE * 0.5 ** ((price - p95) / max(high - p95, min_gap))
+
+
+class _LevelBands:
+    """Sparse band table of one level: rows sorted by (bucket << 32) | location code."""
+
+    __slots__ = ("keys", "quantiles", "low", "high", "counts")
+
+    def __init__(self, keys=None, quantiles=None, low=None, high=None, counts=None):
+        self.keys = np.empty(0, np.int64) if keys is None else keys
+        self.quantiles = np.empty((0, len(BAND_QUANTILES)), np.float32) if quantiles is None else quantiles
+        self.low = np.empty(0, np.float32) if low is None else low
+        self.high = np.empty(0, np.float32) if high is None else high
+        self.counts = np.empty(0, np.int32) if counts is None else counts
+
+    def truncated(self, first_bucket):
+        """Copy without the rows of `first_bucket` and later buckets."""
+        end = int(np.searchsorted(self.keys, np.int64(first_bucket) << _CODE_BITS))
+        return _LevelBands(self.keys[:end], self.quantiles[:end], self.low[:end],
+                           self.high[:end], self.counts[:end])
+
+    def extended(self, other):
+        return _LevelBands(*(np.concatenate([getattr(self, name), getattr(other, name)])
+                             for name in self.__slots__))
+
+    def find(self, keys):
+        """Row of each key, or -1 where there is no band."""
+        keys = np.asarray(keys, dtype=np.int64)
+        rows = np.searchsorted(self.keys, keys)
+        rows = np.minimum(rows, max(len(self.keys) - 1, 0))
+        hit = (self.keys[rows] == keys) if len(self.keys) else np.zeros(keys.shape, bool)
+        return np.where(hit, rows, -1)
+
+
+class _CropBands:
+    """Band tables of one crop and the store revision they were built from."""
+
+    __slots__ = ("levels", "first_bucket", "last_bucket", "latest_day", "revision")
+
+    def __init__(self, levels, first_bucket, last_bucket, latest_day, revision):
+        self.levels = levels
+        self.first_bucket = first_bucket
+        self.last_bucket = last_bucket
+        self.latest_day = latest_day
+        self.revision = revision
+
+
+class ReferenceBandIndex:
+    """Precomputed official price bands per (crop, location, date bucket)."""
+
+    def __init__(self, store=None, bucket_days=7, history_days=365, min_samples=5, max_lag_buckets=2):
+        """
+        Args:
+            store (MandiPriceStore): Price store to index (default: the process-wide store)
+            bucket_days (int): Length of a date bucket in days
+            history_days (int): Days of history indexed when a crop is first built
+            min_samples (int): Prices a band needs before it is used
+            max_lag_buckets (int): Earlier buckets tried when a submission's own bucket has no band
+        """
+        self.store = store if store is not None else get_price_store()
+        self.bucket_days = bucket_days
+        self.history_days = history_days
+        self.min_samples = min_samples
+        self.max_lag_buckets = max_lag_buckets
+        self._crops = {}
+        # location string -> level codes, valid while the store's name dictionaries keep their size
+        self._chains = {}
+        self._chains_size = None
+        self._lock = threading.Lock()
+        self._refreshes = 0
+
+    # ----- building -----
+
+    def _location_codes(self, mandi):
+        """Location code of every row at each level."""
+        return (mandi, self.store.mandi_district[mandi], self.store.mandi_state[mandi],
+                np.zeros(len(mandi), np.int32))
+
+    def refresh(self, crop, since=None):
+        """Rebuild the bands of a crop from the bucket of `since` (default: last indexed bucket) on.
+
+        Args:
+            crop (str): Crop name
+            since: Earliest date whose prices changed (for late corrections to older buckets)
+
+        Returns:
+            int: Number of buckets recomputed
+        """
+        key = normalize_name(crop)
+        with self._lock:
+            revision = self.store.revision(crop)
+            latest = self.store.latest_day(crop)
+            if latest is None:
+                self._crops.pop(key, None)
+                return 0
+            current = self._crops.get(key)
+            oldest = (latest - self.history_days + 1) // self.bucket_days
+            if current is None:
+                start_bucket = oldest
+            else:
+                start_bucket = current.last_bucket
+                if since is not None:
+                    start_bucket = min(start_bucket, to_day(since) // self.bucket_days)
+                start_bucket = max(start_bucket, current.first_bucket)
+
+            series = self.store.query(crop, start=start_bucket * self.bucket_days, end=latest)
+            bucket = (series.day // self.bucket_days).astype(np.int64)
+            new_levels = []
+            for codes in self._location_codes(series.mandi):
+                keys = (bucket << _CODE_BITS) | codes.astype(np.int64)
+                if len(keys):
+                    new_levels.append(_LevelBands(*_group_bands(
+                        keys, series.modal_price, series.min_price, series.max_price, BAND_QUANTILES)))
+                else:
+                    new_levels.append(_LevelBands())
+
+            if current is None:
+                levels = new_levels
+                first_bucket = start_bucket
+            else:
+                levels = [old.truncated(start_bucket).extended(new)
+                          for old, new in zip(current.levels, new_levels)]
+                first_bucket = current.first_bucket
+            last_bucket = latest // self.bucket_days
+            self._crops[key] = _CropBands(levels, first_bucket, last_bucket, latest, revision)
+            self._refreshes += 1
+            return last_bucket - start_bucket + 1
+
+    def _bands(self, crop):
+        """Bands of a crop, refreshed first if the store has new prices for it."""
+        current = self._crops.get(normalize_name(crop))
+        if current is None or current.revision != self.store.revision(crop):
+            self.refresh(crop)
+            current = self._crops.get(normalize_name(crop))
+        return current
+
+    # ----- lookups -----
+
+    def _location_chain(self, location):
+        """(mandi, district, state, all) codes of a location; -1 for levels it does not pin down."""
+        store = self.store
+        size = (len(store.mandis), len(store.districts), len(store.states))
+        if size != self._chains_size:
+            self._chains, self._chains_size = {}, size
+        chain = self._chains.get(location)
+        if chain is None:
+            chain = self._chains[location] = self._resolve_chain(location)
+        return chain
+
+    def _resolve_chain(self, location):
+        store = self.store
+        level, code, _ = store.resolve_location(location) if location else (None, None, None)
+        if level == "mandi":
+            return (code, int(store.mandi_district[code]), int(store.mandi_state[code]), 0)
+        if level == "district":
+            mandis = np.flatnonzero(store.mandi_district == code)
+            state = int(store.mandi_state[mandis[0]]) if len(mandis) else -1
+            return (-1, code, state, 0)
+        if level == "state":
+            return (-1, -1, code, 0)
+        return (-1, -1, -1, 0)
+
+    def _lookup(self, bands, chains, buckets):
+        """Level and row of the band used for each submission (-1 where none qualifies)."""
+        n = len(buckets)
+        found_level = np.full(n, -1, np.int8)
+        found_row = np.full(n, -1, np.int64)
+        # A submission dated after the newest official prices uses the newest bands
+        buckets = np.minimum(buckets, bands.last_bucket)
+        for level, table in enumerate(bands.levels):
+            codes = chains[:, level]
+            for lag in range(self.max_lag_buckets + 1):
+                open_ = (found_level < 0) & (codes >= 0)
+                if not open_.any():
+                    break
+                keys = ((buckets[open_] - lag) << _CODE_BITS) | codes[open_]
+                rows = table.find(keys)
+                usable = rows >= 0
+                usable[usable] = table.counts[rows[usable]] >= self.min_samples
+                index = np.flatnonzero(open_)[usable]
+                found_level[index] = level
+                found_row[index] = rows[usable]
+        return found_level, found_row
+
+    def _lookup_one(self, bands, chain, bucket):
+        """Scalar version of _lookup for a single submission: (level, row) or (-1, -1)."""
+        bucket = min(bucket, bands.last_bucket)
+        for level, table in enumerate(bands.levels):
+            code = chain[level]
+            if code < 0:
+                continue
+            for lag in range(self.max_lag_buckets + 1):
+                key = ((bucket - lag) << _CODE_BITS) | code
+                row = int(table.keys.searchsorted(key))
+                if row < len(table.keys) and table.keys[row] == key and table.counts[row] >= self.min_samples:
+                    return level, row
+        return -1, -1
+
+    def band(self, crop, location, when=None):
+        """Reference band for one crop and location on a date (default today).
+
+        Returns:
+            dict: Level, location, bucket dates, quantiles, envelope and sample count,
+                or None when there are no official prices to compare with
+        """
+        bands = self._bands(crop)
+        if bands is None:
+            return None
+        bucket = to_day(date.today() if when is None else when) // self.bucket_days
+        level, row = self._lookup_one(bands, self._location_chain(location), bucket)
+        if level < 0:
+            return None
+        return self._describe(bands, level, row)
+
+    def _describe(self, bands, level, row):
+        table = bands.levels[level]
+        key = int(table.keys[row])
+        bucket, code = key >> _CODE_BITS, key & _CODE_MASK
+        names = (self.store.mandis, self.store.districts, self.store.states)
+        quantiles = table.quantiles[row].tolist()
+        return {
+            "level": LEVELS[level],
+            "location": names[level].names[code] if level < 3 else "All India",
+            "period_start": from_day(bucket * self.bucket_days).isoformat(),
+            "period_end": from_day((bucket + 1) * self.bucket_days - 1).isoformat(),
+            "percentiles": {f"p{round(q * 100):02d}": round(v, 2) for q, v in zip(BAND_QUANTILES, quantiles)},
+            "median": round(quantiles[len(quantiles) // 2], 2),
+            "lowest_traded": round(float(table.low[row]), 2),
+            "highest_traded": round(float(table.high[row]), 2),
+            "samples": int(table.counts[row]),
+        }
+
+    # ----- validation -----
+
+    def validate(self, crop, location, price, when=None):
+        """Score one submitted price against its reference band.
+
+        Returns:
+            dict: validation_score, is_authentic, anomaly_detected and the band used
+                (band is None and the score None when no official prices exist)
+        """
+        band = self.band(crop, location, when)
+        if band is None:
+            return {"validation_score": None, "is_authentic": None, "anomaly_detected": None, "band": None}
+        quantiles = list(band["percentiles"].values())
+        score = _score_one(float(price), quantiles, band["lowest_traded"], band["highest_traded"])
+        return {
+            "validation_score": round(score, 3),
+            "is_authentic": score >= _AUTHENTIC_SCORE,
+            "anomaly_detected": not band["lowest_traded"] <= price <= band["highest_traded"],
+            "band": band,
+        }
+
+    def validate_batch(self, crops, locations, prices, dates=None):
+        """Score many submissions at once.
+
+        Every distinct crop, location and date string is resolved once. Band
+        lookups and scoring are vectorized per crop.
+
+        Args:
+            crops: Crop name of each submission (or one name for all)
+            locations: Location of each submission
+            prices: Submitted prices
+            dates: Dates (strings, dates or days since epoch); default today
+
+        Returns:
+            dict: Arrays aligned with the input: score (NaN without a band),
+                is_authentic, anomaly_detected, level (band level name or None),
+                median, p05, p95 and samples
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        n = len(prices)
+        crops = np.broadcast_to(np.asarray(crops, dtype=object), (n,))
+        locations = np.asarray(locations, dtype=object)
+        unique_locations, location_index = np.unique(locations.astype(str), return_inverse=True)
+        chains = np.array([self._location_chain(loc) for loc in unique_locations],
+                          dtype=np.int64).reshape(-1, len(LEVELS))[location_index]
+        today = to_day(date.today())
+        if dates is None:
+            days = np.full(n, today, np.int64)
+        else:
+            unique_dates, date_index = np.unique(np.asarray(dates, dtype=object).astype(str),
+                                                 return_inverse=True)
+            days = np.array([_parse_day(d, today) for d in unique_dates], dtype=np.int64)[date_index]
+            # Rows with an unreadable date get no band
+            chains[days < 0] = -1
+        buckets = days // self.bucket_days
+
+        quantiles = np.full((n, len(BAND_QUANTILES)), np.nan)
+        low = np.full(n, np.nan)
+        high = np.full(n, np.nan)
+        samples = np.zeros(n, np.int32)
+        levels = np.full(n, -1, np.int8)
+        crop_names, crop_index = np.unique(crops.astype(str), return_inverse=True)
+        for i, crop in enumerate(crop_names):
+            bands = self._bands(crop)
+            if bands is None:
+                continue
+            rows_of_crop = np.flatnonzero(crop_index == i)
+            found_level, found_row = self._lookup(bands, chains[rows_of_crop], buckets[rows_of_crop])
+            for level, table in enumerate(bands.levels):
+                hit = found_level == level
+                if not hit.any():
+                    continue
+                target, row = rows_of_crop[hit], found_row[hit]
+                quantiles[target] = table.quantiles[row]
+                low[target] = table.low[row]
+                high[target] = table.high[row]
+                samples[target] = table.counts[row]
+                levels[target] = level
+
+        scores = band_scores(prices, quantiles, low, high)
+        has_band = levels >= 0
+        median = len(BAND_QUANTILES) // 2
+        return {
+            "score": scores,
+            "is_authentic": has_band & (scores >= _AUTHENTIC_SCORE),
+            "anomaly_detected": has_band & ((prices < low) | (prices > high)),
+            "level": np.array([LEVELS[l] if l >= 0 else None for l in levels.tolist()], dtype=object),
+            "median": quantiles[:, median],
+            "p05": quantiles[:, 0],
+            "p95": quantiles[:, -1],
+            "samples": samples,
+        }
+
+    def validate_csv(self, path_or_file):
+        """Validate an uploaded CSV of submissions in one vectorized call.
+
+        Recognized columns (case ignored): crop/commodity, location/mandi/market,
+        price/modal_price and an optional date/arrival_date. Other columns,
+        such as user_id, are carried through to the results.
+
+        Returns:
+            tuple: (rows as dictionaries, validate_batch result arrays)
+        """
+        if isinstance(path_or_file, (str, os.PathLike)):
+            with open(path_or_file, newline="", encoding="utf-8-sig") as f:
+                return self.validate_csv(f)
+        rows = list(csv.DictReader(path_or_file))
+
+        def column(*names):
+            for row in rows[:1]:
+                for field in row:
+                    if field and field.strip().lower() in names:
+                        return [r[field] for r in rows]
+            return None
+
+        crops = column("crop", "commodity")
+        locations = column("location", "mandi", "market")
+        prices = column("price", "modal_price")
+        if crops is None or locations is None or prices is None:
+            if not rows:
+                return [], self.validate_batch([], [], [])
+            raise ValueError("Upload needs crop, location and price columns")
+        dates = column("date", "arrival_date")
+        numeric = np.array([_to_float(p) for p in prices], dtype=np.float64)
+        return rows, self.validate_batch(crops, locations, numeric, dates)
+
+    def stats(self):
+        """Indexed crops with their band counts per level."""
+        with self._lock:
+            crops = {
+                key: {
+                    "bands": {level: len(table.keys) for level, table in zip(LEVELS, bands.levels)},
+                    "indexed_through": from_day(bands.latest_day).isoformat(),
+                }
+                for key, bands in self._crops.items()
+            }
+        return {"bucket_days": self.bucket_days, "refreshes": self._refreshes, "crops": crops}
+
+
+def _parse_day(text, default):
+    """Days since epoch of an uploaded date; blank means `default`, unreadable means -1."""
+    if not text.strip() or text == "None":
+        return default
+    try:
+        return to_day(text)
+    except ValueError:
+        return -1
+
+
+def _to_float(text):
+    try:
+        return float(str(text).replace(",", "").replace("₹", "").strip())
+    except ValueError:
+        return float("nan")
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def get_reference_bands():
+    """The process-wide band index over the current price store (PRICE_BAND_* env vars)."""
+    global _default_index
+    store = get_price_store()
+    if _default_index is None or _default_index.store is not store:
+        with _default_index_lock:
+            if _default_index is None or _default_index.store is not store:
+                _default_index = ReferenceBandIndex(
+                    store,
+                    bucket_days=int(os.getenv("PRICE_BAND_BUCKET_DAYS", "7")),
+                    history_days=int(os.getenv("PRICE_BAND_HISTORY_DAYS", "365")),
+                    min_samples=int(os.getenv("PRICE_BAND_MIN_SAMPLES", "5")),
+                )
+    return _default_index
@@ -0,0 +1,439 @@
+"""
+Batched, hash-chained ledger for community price submissions.
+
+Writing every submission as its own durable transaction cannot keep up with
+harvest-season volume, so submissions are buffered and committed in blocks:
+
+- a block holds up to ``block_size`` submissions (or whatever is buffered
+  after ``flush_interval`` seconds) and is one JSON line in an append-only file
+- each block stores the Merkle root of its submissions and the hash of the
+  previous block, so altering any recorded submission breaks the chain
+- the file is fsynced once per block, not once per submission
+
+Each submission is identified by its leaf hash. Its inclusion proof is the
+log2(block size) sibling hashes on the path to the block's Merkle root;
+``verify_proof`` checks one without the ledger. Contributor point totals
+are an index updated as blocks commit and rebuilt in one pass when the file
+is reopened.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+GENESIS_HASH = "0" * 64
+
+# Base points per accepted submission, scaled by its validation score
+POINTS_PER_SUBMISSION = 10
+
+# (minimum total points, level), highest first
+REPUTATION_LEVELS = (
+    (1000, "Expert Contributor"),
+    (200, "Trusted Contributor"),
+    (50, "Active Contributor"),
+    (0, "New Contributor"),
+)
+
+
+def reputation_level(points):
+    """Reputation level for a contributor's total points."""
+    for threshold, level in REPUTATION_LEVELS:
+        if points >= threshold:
+            return level
+    return REPUTATION_LEVELS[-1][1]
+
+
+def _canonical(obj):
+    return json.dumps(obj, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def leaf_hash(entry):
+    """Hash of one submission (domain-separated from interior nodes)."""
+    return hashlib.sha256(b"\x00" + _canonical(entry)).hexdigest()
+
+
+def _node_hash(left, right):
+    return hashlib.sha256(b"\x01" + bytes.fromhex(left) + bytes.fromhex(right)).hexdigest()
+
+
+def merkle_levels(leaves):
+    """All levels of a Merkle tree, leaves first; an odd node is promoted unchanged."""
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [_node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+
+def merkle_proof(levels, index):
+    """Sibling path for leaf `index`: [(sibling hash, "left" | "right"), ...]."""
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append((level[sibling], "left" if sibling < index else "right"))
+        index //= 2
+    return proof
+
+
+def verify_proof(leaf, proof, merkle_root):
+    """Check that a leaf hash is included under a Merkle root."""
+    node = leaf
+    for sibling, side in proof:
+        node = _node_hash(sibling, node) if side == "left" else _node_hash(node, sibling)
+    return node == merkle_root
+
+
+def _block_hash(header):
+    return hashlib.sha256(_canonical(header)).hexdigest()
+
+
+class PriceLedger:
+    """Append-only block file of price submissions with Merkle roots and a points index."""
+
+    def __init__(self, path="./price_ledger.jsonl", block_size=256, flush_interval=2.0,
+                 cached_blocks=64):
+        """
+        Args:
+            path (str): Ledger file, created if missing
+            block_size (int): Submissions per block
+            flush_interval (float): Seconds a partial block may wait before it is committed
+                (0 disables the background flusher; call flush())
+            cached_blocks (int): Blocks whose Merkle trees are kept in memory for proofs
+        """
+        self.path = path
+        self.block_size = block_size
+        self.flush_interval = flush_interval
+        self.cached_blocks = cached_blocks
+
+        self._buffer = []
+        # Leaf hashes of the block being written, so status() never reports them unknown
+        self._writing = set()
+        self._buffer_lock = threading.Lock()
+        # Serializes block writes so heights and the chain stay ordered
+        self._commit_lock = threading.Lock()
+
+        self.height = 0
+        self.tip_hash = GENESIS_HASH
+        # leaf hash -> (block height, index in block)
+        self._locations = {}
+        # block height -> byte offset of its line in the file
+        self._offsets = []
+        # user_id -> {"points", "submissions"}
+        self._points = {}
+        # user_id -> points of buffered, not yet committed submissions
+        self._pending_points = {}
+        self._trees = OrderedDict()
+
+        self._load()
+        # Unbuffered, so a failed write leaves nothing queued to land after a truncate
+        self._file = open(self.path, "ab", buffering=0)
+
+        self._closed = threading.Event()
+        self._flusher = None
+        if flush_interval:
+            self._flusher = threading.Thread(target=self._flush_loop, name="ledger-flush", daemon=True)
+            self._flusher.start()
+
+    # ----- recovery -----
+
+    def _load(self):
+        """Replay the block file to rebuild the chain tip, submission index and points."""
+        if not os.path.exists(self.path):
+            return
+        valid_bytes = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # torn final write; everything before it is intact
+                try:
+                    block = json.loads(line)
+                except ValueError:
+                    raise ValueError(f"Ledger block {self.height} is not valid JSON") from None
+                header = block["header"]
+                if header["prev_hash"] != self.tip_hash or _block_hash(header) != block["hash"]:
+                    raise ValueError(f"Ledger chain broken at block {header['height']}")
+                self._index_block(block, valid_bytes)
+                valid_bytes += len(line)
+        if valid_bytes != os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_bytes)
+
+    def _index_block(self, block, offset):
+        header = block["header"]
+        height = header["height"]
+        for index, (leaf, entry) in enumerate(zip(block["leaves"], block["entries"])):
+            self._locations[leaf] = (height, index)
+            totals = self._points.setdefault(entry["user_id"], {"points": 0, "submissions": 0})
+            totals["points"] += entry["points"]
+            totals["submissions"] += 1
+        self._offsets.append(offset)
+        self.height = height + 1
+        self.tip_hash = block["hash"]
+
+    # ----- writes -----
+
+    def submit(self, user_id, crop, price, location, validation_score=1.0, **extra):
+        """Buffer a validated submission for the next block.
+
+        Its block number is only known once the block commits; use ``status``
+        and ``proof`` to follow it.
+
+        Returns:
+            dict: Receipt with the submission's leaf hash and the contributor's points
+        """
+        points = max(1, round(POINTS_PER_SUBMISSION * float(validation_score)))
+        entry = {
+            "submission_id": uuid.uuid4().hex,
+            "user_id": user_id,
+            "crop": crop,
+            "price": float(price),
+            "location": location,
+            "validation_score": round(float(validation_score), 4),
+            "points": points,
+            "submitted_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            **extra,
+        }
+        leaf = leaf_hash(entry)
+        with self._buffer_lock:
+            self._buffer.append((leaf, entry))
+            self._pending_points[user_id] = self._pending_points.get(user_id, 0) + points
+            full = len(self._buffer) >= self.block_size
+        if full:
+            self.flush(partial=False)
+        total = self.contributor_points(user_id)
+        return {
+            "transaction_hash": leaf,
+            "points_awarded": points,
+            "total_points": total,
+            "reputation_level": reputation_level(total),
+            "submitted_at": entry["submitted_at"],
+        }
+
+    def flush(self, partial=True):
+        """Commit buffered submissions, one block per block_size submissions.
+
+        Args:
+            partial (bool): Also commit a final block smaller than block_size
+
+        Returns:
+            int: Number of blocks written
+        """
+        blocks = 0
+        with self._commit_lock:
+            # Only submissions buffered before this call may go into a partial block;
+            # ones arriving while blocks are written wait to fill the next block
+            with self._buffer_lock:
+                owed = len(self._buffer) if partial else 0
+            while True:
+                with self._buffer_lock:
+                    if len(self._buffer) < self.block_size and (owed <= 0 or not self._buffer):
+                        return blocks
+                    batch = self._buffer[:self.block_size]
+                    del self._buffer[:self.block_size]
+                    owed -= len(batch)
+                    self._writing = {leaf for leaf, _ in batch}
+                try:
+                    self._write_block(batch)
+                except Exception:
+                    with self._buffer_lock:
+                        self._buffer[:0] = batch
+                        self._writing = set()
+                    raise
+                blocks += 1
+
+    def _write_block(self, batch):
+        """Append one block and fsync it (commit lock must be held)."""
+        leaves = [leaf for leaf, _ in batch]
+        entries = [entry for _, entry in batch]
+        levels = merkle_levels(leaves)
+        header = {
+            "height": self.height,
+            "prev_hash": self.tip_hash,
+            "merkle_root": levels[-1][0],
+            "count": len(batch),
+            "timestamp": time.time(),
+        }
+        block = {"header": header, "hash": _block_hash(header), "leaves": leaves, "entries": entries}
+        line = json.dumps(block, separators=(",", ":")).encode("utf-8") + b"\n"
+
+        offset = self._file.tell()
+        try:
+            view = memoryview(line)
+            while view:
+                view = view[self._file.write(view):]
+            os.fsync(self._file.fileno())
+        except BaseException:
+            # Drop the partial line so the next block starts on a clean boundary
+            os.ftruncate(self._file.fileno(), offset)
+            self._file.seek(offset)
+            raise
+
+        with self._buffer_lock:
+            self._index_block(block, offset)
+            for entry in entries:
+                user_id = entry["user_id"]
+                remaining = self._pending_points.get(user_id, 0) - entry["points"]
+                if remaining > 0:
+                    self._pending_points[user_id] = remaining
+                else:
+                    self._pending_points.pop(user_id, None)
+            self._cache_tree(header["height"], levels)
+            self._writing = set()
+
+    def _flush_loop(self):
+        while not self._closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                # The batch went back to the buffer; the next tick retries
+                pass
+
+    # ----- reads -----
+
+    def _cache_tree(self, height, levels):
+        self._trees[height] = levels
+        self._trees.move_to_end(height)
+        while len(self._trees) > self.cached_blocks:
+            self._trees.popitem(last=False)
+
+    def _read_block(self, height):
+        with open(self.path, "rb") as f:
+            f.seek(self._offsets[height])
+            return json.loads(f.readline())
+
+    def block(self, height):
+        """A committed block: header, hash, leaf hashes and entries."""
+        return self._read_block(height)
+
+    def proof(self, transaction_hash):
+        """Inclusion proof for a committed submission, or None if unknown or still buffered.
+
+        Returns:
+            dict: block height, block hash, Merkle root, leaf index and the sibling path
+        """
+        with self._buffer_lock:
+            location = self._locations.get(transaction_hash)
+            if location is None:
+                return None
+            height, index = location
+            levels = self._trees.get(height)
+            if levels is not None:
+                self._trees.move_to_end(height)
+        if levels is None:
+            block = self._read_block(height)
+            levels = merkle_levels(block["leaves"])
+            with self._buffer_lock:
+                self._cache_tree(height, levels)
+        return {
+            "transaction_hash": transaction_hash,
+            "block_number": height,
+            "leaf_index": index,
+            "merkle_root": levels[-1][0],
+            "proof": merkle_proof(levels, index),
+        }
+
+    def block_number(self, transaction_hash):
+        """Height of the block holding a submission, or None until it commits."""
+        with self._buffer_lock:
+            location = self._locations.get(transaction_hash)
+        return None if location is None else location[0]
+
+    def status(self, transaction_hash):
+        """"committed", "pending" or "unknown" for a submission."""
+        with self._buffer_lock:
+            if transaction_hash in self._locations:
+                return "committed"
+            if transaction_hash in self._writing or any(leaf == transaction_hash for leaf, _ in self._buffer):
+                return "pending"
+        return "unknown"
+
+    def contributor_points(self, user_id):
+        """Total points of a contributor, including buffered submissions."""
+        with self._buffer_lock:
+            committed = self._points.get(user_id, {}).get("points", 0)
+            return committed + self._pending_points.get(user_id, 0)
+
+    def contributor(self, user_id):
+        """Committed points, submission count and reputation level of a contributor."""
+        with self._buffer_lock:
+            totals = dict(self._points.get(user_id, {"points": 0, "submissions": 0}))
+            totals["pending_points"] = self._pending_points.get(user_id, 0)
+        totals["reputation_level"] = reputation_level(totals["points"] + totals["pending_points"])
+        return totals
+
+    def verify(self):
+        """Audit the whole file: every leaf, Merkle root and chain link is recomputed.
+
+        Returns:
+            int: Number of blocks verified (raises ValueError on the first mismatch)
+        """
+        prev_hash = GENESIS_HASH
+        blocks = 0
+        with self._commit_lock, open(self.path, "rb") as f:
+            for line in f:
+                block = json.loads(line)
+                header = block["header"]
+                leaves = [leaf_hash(entry) for entry in block["entries"]]
+                if leaves != block["leaves"]:
+                    raise ValueError(f"Submission altered in block {header['height']}")
+                if merkle_levels(leaves)[-1][0] != header["merkle_root"]:
+                    raise ValueError(f"Merkle root mismatch in block {header['height']}")
+                if header["prev_hash"] != prev_hash or _block_hash(header) != block["hash"]:
+                    raise ValueError(f"Ledger chain broken at block {header['height']}")
+                prev_hash = block["hash"]
+                blocks += 1
+        return blocks
+
+    def stats(self):
+        with self._buffer_lock:
+            return {
+                "blocks": self.height,
+                "submissions": len(self._locations),
+                "buffered": len(self._buffer),
+                "contributors": len(self._points),
+                "tip_hash": self.tip_hash,
+            }
+
+    def close(self):
+        """Stop the flusher, commit what is buffered and close the file."""
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+        self._file.close()
+
+
+_default_ledger = None
+_default_ledger_lock = threading.Lock()
+
+
+def get_price_ledger():
+    """The process-wide ledger, opened on first use (PRICE_LEDGER_* env vars)."""
+    global _default_ledger
+    if _default_ledger is None:
+        with _default_ledger_lock:
+            if _default_ledger is None:
+                _default_ledger = PriceLedger(
+                    path=os.getenv("PRICE_LEDGER_PATH", "./price_ledger.jsonl"),
+                    block_size=int(os.getenv("PRICE_LEDGER_BLOCK_SIZE", "256")),
+                    flush_interval=float(os.getenv("PRICE_LEDGER_FLUSH_SECONDS", "2")),
+                )
+    return _default_ledger
+
+
+def close_price_ledger():
+    """Commit and close the process-wide ledger if it was opened."""
+    global _default_ledger
+    with _default_ledger_lock:
+        ledger, _default_ledger = _default_ledger, None
+    if ledger is not None:
+        ledger.close()
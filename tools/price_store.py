@@ -0,0 +1,825 @@
+"""
+Columnar mandi price time-series store.
+
+Prices are keyed by (crop, mandi, grade, date) and hold min/max/modal price
+per quintal and arrivals. Each crop is one partition of parallel NumPy
+columns sorted by (day, mandi, grade). Its month partitions are contiguous
+row ranges indexed by month. A date-range query is two binary searches,
+so an unfiltered range comes back as views of the stored columns. Mandi,
+district, state and grade filters are one vectorized mask over that range.
+Names are dictionary-encoded: a row stores int codes, and each mandi's
+district and state live in small lookup arrays. Mandis are keyed on
+(name, district, state), since market names repeat across districts.
+
+Rows come from bulk Agmarknet-style CSV dumps (``ingest_csv``) or from
+column arrays (``append_columns``). New rows are staged and merged into
+the sorted columns on the next query. A later row with the same
+(mandi, grade, date) key replaces the earlier one. A merge sorts only the
+staged rows: new days are appended into spare capacity, and late rows only
+re-sort the stored rows from their first day on. Merge listeners
+(``add_merge_listener``) see the rows of every merge, so derived state such
+as live anomaly series can follow new prices without rescanning history. A
+store can be saved as .npy files and reopened memory-mapped.
+
+Until real data is configured (MANDI_PRICE_STORE_DIR or MANDI_PRICE_CSV),
+``get_price_store`` serves a year of seeded mock history so the market tools
+have series to work on.
+"""
+
+import csv
+import json
+import os
+import re
+import threading
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from .soil_profiles import normalize_location
+
+# Column name -> dtype; every crop partition stores exactly these
+PRICE_COLUMNS = {
+    "day": np.int32,          # days since 1970-01-01
+    "mandi": np.int32,        # mandi code
+    "grade": np.int16,        # grade code
+    "min_price": np.float32,  # Rs per quintal
+    "max_price": np.float32,
+    "modal_price": np.float32,
+    "volume": np.float32,     # arrivals in tonnes (NaN when not reported)
+}
+
+DEFAULT_GRADE = "FAQ"
+
+# Normalized CSV header prefixes for each field, covering Agmarknet exports
+_CSV_FIELDS = {
+    "crop": ("commodity", "crop"),
+    "state": ("state",),
+    "district": ("district",),
+    "mandi": ("market", "mandi", "apmc"),
+    "grade": ("grade",),
+    "date": ("arrival_date", "price_date", "reported_date", "date"),
+    "min_price": ("min_price", "minimum_price"),
+    "max_price": ("max_price", "maximum_price"),
+    "modal_price": ("modal_price",),
+    "volume": ("arrivals", "arrival_quantity", "volume"),
+}
+
+_DATE_FORMATS = ("%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y", "%d-%b-%Y", "%d %b %Y")
+
+_EPOCH = date(1970, 1, 1)
+
+
+def normalize_name(name):
+    """Dictionary key for crop, mandi, district, state and grade names."""
+    return normalize_location(name)
+
+
+def to_day(value):
+    """Convert a date, datetime, numpy datetime64 or date string to days since epoch."""
+    if value is None:
+        return None
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, np.datetime64):
+        return int(value.astype("datetime64[D]").astype(np.int64))
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        return (value - _EPOCH).days
+    return _parse_date(str(value))
+
+
+def from_day(day):
+    """Convert days since epoch to a datetime.date."""
+    return _EPOCH + timedelta(days=int(day))
+
+
+def _parse_date(text):
+    text = text.strip()
+    for fmt in _DATE_FORMATS:
+        try:
+            return (datetime.strptime(text, fmt).date() - _EPOCH).days
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized date: {text!r}")
+
+
+def _normalize_header(header):
+    header = header.replace("_x0020_", "_").lower()
+    return re.sub(r"[^a-z0-9]+", "_", header).strip("_")
+
+
+def _map_csv_header(header):
+    """Return {field: column index} for a CSV header row."""
+    normalized = [_normalize_header(h) for h in header]
+    mapping = {}
+    for field, prefixes in _CSV_FIELDS.items():
+        for prefix in prefixes:
+            match = next((i for i, h in enumerate(normalized) if h.startswith(prefix)), None)
+            if match is not None:
+                mapping[field] = match
+                break
+    missing = {"crop", "mandi", "date", "modal_price"} - mapping.keys()
+    if missing:
+        raise ValueError(f"CSV is missing required columns: {', '.join(sorted(missing))}")
+    return mapping
+
+
+def _read_only(array):
+    array.setflags(write=False)
+    return array
+
+
+class _Dictionary:
+    """Bidirectional name <-> int code mapping that only grows."""
+
+    def __init__(self, names=()):
+        self.names = []
+        self.codes = {}
+        for name in names:
+            self.code(name)
+
+    def code(self, name):
+        key = normalize_name(name)
+        code = self.codes.get(key)
+        if code is None:
+            code = self.codes[key] = len(self.names)
+            self.names.append(" ".join(str(name).split()))
+        return code
+
+    def get(self, name):
+        return self.codes.get(normalize_name(name))
+
+    def __len__(self):
+        return len(self.names)
+
+
+class _MandiDictionary:
+    """Mandi codes keyed on (name, district, state), so namesake markets stay apart.
+
+    ``names`` holds the display name of every code and may repeat. Name-only
+    lookups pick the first registered namesake unless a district or state
+    is given to choose between them.
+    """
+
+    def __init__(self):
+        self.names = []
+        self._keys = {}
+        # normalized name -> codes, in registration order
+        self._by_name = {}
+        # code -> (normalized district, normalized state)
+        self._places = []
+
+    def code(self, name, district, state):
+        key = (normalize_name(name), normalize_name(district), normalize_name(state))
+        code = self._keys.get(key)
+        if code is None:
+            code = self._keys[key] = len(self.names)
+            self.names.append(" ".join(str(name).split()))
+            self._by_name.setdefault(key[0], []).append(code)
+            self._places.append(key[1:])
+        return code
+
+    def get(self, name, *places):
+        """Code of the mandi called `name`; district or state names pick among namesakes."""
+        candidates = self._by_name.get(normalize_name(name))
+        if not candidates:
+            return None
+        wanted = {normalize_name(place) for place in places if place}
+        if len(candidates) == 1 or not wanted:
+            return candidates[0]
+        return max(candidates, key=lambda code: len(wanted.intersection(self._places[code])))
+
+    def __len__(self):
+        return len(self.names)
+
+
+class PriceSeries:
+    """Result of a range query: parallel columns for one crop, oldest day first.
+
+    Columns of an unfiltered query are read-only views of the store; filtered
+    queries hold compact copies of the matching rows only.
+    """
+
+    __slots__ = ("crop", "columns", "_store")
+
+    def __init__(self, crop, columns, store):
+        self.crop = crop
+        self.columns = columns
+        self._store = store
+
+    def __len__(self):
+        return len(self.columns["day"])
+
+    def __getattr__(self, name):
+        try:
+            return self.columns[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def dates(self):
+        """Row dates as a datetime64[D] array."""
+        return self.columns["day"].astype("datetime64[D]")
+
+    def mandi_names(self):
+        """Mandi name of every row."""
+        names = self._store.mandis.names
+        return [names[code] for code in self.columns["mandi"].tolist()]
+
+    def to_records(self, limit=None):
+        """Convert the last `limit` rows (default all) to dictionaries."""
+        rows = slice(-limit, None) if limit else slice(None)
+        store = self._store
+        records = []
+        for day, mandi, grade, low, high, modal, volume in zip(
+            *(self.columns[name][rows].tolist() for name in PRICE_COLUMNS)
+        ):
+            records.append({
+                "date": from_day(day).isoformat(),
+                "mandi": store.mandis.names[mandi],
+                "district": store.districts.names[store.mandi_district[mandi]],
+                "state": store.states.names[store.mandi_state[mandi]],
+                "grade": store.grades.names[grade],
+                "min_price": round(low, 2),
+                "max_price": round(high, 2),
+                "modal_price": round(modal, 2),
+                "volume": None if volume != volume else round(volume, 2),
+            })
+        return records
+
+
+def _sort_and_dedup(columns):
+    """Sort rows by (day, mandi, grade), keeping the last of rows with the same key."""
+    # Stable sort keeps ingestion order within a key, so the last row wins
+    order = np.lexsort((columns["grade"], columns["mandi"], columns["day"]))
+    columns = {name: column[order] for name, column in columns.items()}
+    if len(order) > 1:
+        same_as_next = (
+            (columns["day"][:-1] == columns["day"][1:])
+            & (columns["mandi"][:-1] == columns["mandi"][1:])
+            & (columns["grade"][:-1] == columns["grade"][1:])
+        )
+        if same_as_next.any():
+            keep = np.append(~same_as_next, True)
+            columns = {name: column[keep] for name, column in columns.items()}
+    return columns
+
+
+def _row_key(columns, row):
+    return (int(columns["day"][row]), int(columns["mandi"][row]), int(columns["grade"][row]))
+
+
+class _CropPartition:
+    """Sorted columns for one crop plus rows staged for the next merge."""
+
+    # Spare capacity kept after a reallocation, as a fraction of the rows
+    _GROWTH = 0.5
+
+    def __init__(self, columns=None):
+        self.columns = columns or {name: np.empty(0, dtype) for name, dtype in PRICE_COLUMNS.items()}
+        # Writable arrays behind self.columns with room to append (None until the first merge)
+        self._buffers = None
+        self.pending = []
+        self.month_index = {}
+        # Bumped on every merge so derived indexes can tell the columns changed
+        self.revision = 0
+        self._index_months()
+
+    def _index_months(self):
+        """Row range of every month, found with one binary search per month boundary."""
+        day = self.columns["day"]
+        self.month_index = {}
+        if not len(day):
+            return
+        first = np.datetime64(int(day[0]), "D").astype("datetime64[M]")
+        last = np.datetime64(int(day[-1]), "D").astype("datetime64[M]")
+        months = np.arange(first, last + 1)
+        bounds = np.searchsorted(day, months.astype("datetime64[D]").astype(day.dtype))
+        bounds = np.append(bounds, len(day))
+        for month, start, end in zip(months.astype(str), bounds[:-1], bounds[1:]):
+            if end > start:
+                self.month_index[str(month)] = (int(start), int(end))
+
+    def _reallocate(self, keep, extra):
+        """Fresh buffers holding the first `keep` rows, with room for `extra` more.
+
+        A first load gets no spare room; later merges keep some so that the next
+        days of prices append in place.
+        """
+        capacity = keep + extra
+        if keep:
+            capacity = max(int(capacity * (1 + self._GROWTH)), 1024)
+        buffers = {}
+        for name, dtype in PRICE_COLUMNS.items():
+            buffers[name] = np.empty(capacity, dtype)
+            buffers[name][:keep] = self.columns[name][:keep]
+        return buffers
+
+    def merge(self):
+        """Fold staged rows into the sorted columns, latest write winning per key.
+
+        Returns the merged staged rows (sorted and deduplicated), or None when
+        nothing was staged.
+
+        Only the staged rows are sorted. Rows that sort after every stored row
+        (new days) are written into spare capacity behind the columns. Otherwise
+        only the stored rows from the first staged day on are re-sorted with
+        them. Rows visible through earlier views are never overwritten: a splice
+        goes into new buffers.
+        """
+        if not self.pending:
+            return None
+        staged = _sort_and_dedup({
+            name: np.concatenate([chunk[name] for chunk in self.pending]).astype(dtype, copy=False)
+            for name, dtype in PRICE_COLUMNS.items()
+        })
+        self.pending = []
+        current = self.columns
+        n, m = len(current["day"]), len(staged["day"])
+
+        if n == 0 or _row_key(staged, 0) > _row_key(current, n - 1):
+            # Append: every staged row sorts after the stored ones
+            buffers = self._buffers
+            if buffers is None or len(buffers["day"]) < n + m:
+                buffers = self._reallocate(n, m)
+            for name in PRICE_COLUMNS:
+                buffers[name][n:n + m] = staged[name]
+            size = n + m
+        else:
+            # Splice: re-sort the stored tail from the first staged day together with the staged rows
+            start = int(np.searchsorted(current["day"], current["day"].dtype.type(staged["day"][0]), "left"))
+            tail = _sort_and_dedup({
+                name: np.concatenate([current[name][start:], staged[name]]) for name in PRICE_COLUMNS
+            })
+            size = start + len(tail["day"])
+            buffers = self._reallocate(start, len(tail["day"]))
+            for name in PRICE_COLUMNS:
+                buffers[name][start:size] = tail[name]
+
+        self._buffers = buffers
+        # The visible columns are read-only views; earlier views keep their rows
+        self.columns = {name: _read_only(buffers[name][:size]) for name in PRICE_COLUMNS}
+        self.revision += 1
+        self._index_months()
+        return staged
+
+
+class MandiPriceStore:
+    """Time series of mandi prices keyed by (crop, mandi, grade, date)."""
+
+    def __init__(self, source="local"):
+        """
+        Args:
+            source (str): Description of where the prices came from, reported by the tools
+        """
+        self.source = source
+        self.mandis = _MandiDictionary()
+        self.districts = _Dictionary()
+        self.states = _Dictionary()
+        self.grades = _Dictionary([DEFAULT_GRADE])
+        # mandi code -> district / state code
+        self._mandi_district = []
+        self._mandi_state = []
+        self.mandi_district = np.empty(0, np.int32)
+        self.mandi_state = np.empty(0, np.int32)
+        self._crops = {}
+        self._crop_names = _Dictionary()
+        self._merge_listeners = []
+        self._lock = threading.RLock()
+
+    # ----- dictionaries -----
+
+    def mandi_code(self, mandi, district=None, state=None):
+        """Code for a (mandi, district, state), registering it if new.
+
+        Markets with the same name in different districts or states get
+        different codes.
+        """
+        with self._lock:
+            district = district or "Unknown"
+            state = state or "Unknown"
+            code = self.mandis.code(mandi, district, state)
+            if code == len(self._mandi_state):
+                self._mandi_district.append(self.districts.code(district or "Unknown"))
+                self._mandi_state.append(self.states.code(state or "Unknown"))
+                self.mandi_district = np.array(self._mandi_district, dtype=np.int32)
+                self.mandi_state = np.array(self._mandi_state, dtype=np.int32)
+            return code
+
+    def crops(self):
+        """Crop names held in the store."""
+        return list(self._crop_names.names)
+
+    def resolve_location(self, location):
+        """Match a location to a mandi, district or state.
+
+        "Mandi, District, State" style strings are resolved by their most
+        specific known part.
+
+        Returns:
+            tuple: (level, code, name) with level "mandi", "district" or "state",
+                or (None, None, None) when nothing matches
+        """
+        normalized = normalize_name(location)
+        parts = [part.strip() for part in normalized.split(",")]
+        for candidate in [normalized] + parts:
+            # The other parts of the location choose between namesake mandis
+            code = self.mandis.get(candidate, *(part for part in parts if part != candidate))
+            if code is not None:
+                return "mandi", code, self.mandis.names[code]
+            for level, dictionary in (("district", self.districts), ("state", self.states)):
+                code = dictionary.codes.get(candidate)
+                if code is not None:
+                    return level, code, dictionary.names[code]
+        return None, None, None
+
+    def add_merge_listener(self, listener):
+        """Call listener(store, crop, rows) after staged rows of a crop are merged.
+
+        rows are the merged rows as columns (see PRICE_COLUMNS), sorted by
+        (day, mandi, grade). Listeners run under the store lock in merge order;
+        adding the same listener twice has no effect.
+        """
+        with self._lock:
+            if listener not in self._merge_listeners:
+                self._merge_listeners.append(listener)
+
+    # ----- writes -----
+
+    def append_columns(self, crop, mandi, day, modal_price, min_price=None, max_price=None,
+                       volume=None, grade=None):
+        """Stage many rows of one crop at once.
+
+        Args:
+            crop (str): Crop name
+            mandi (array): Mandi codes (see mandi_code)
+            day (array): Days since epoch (see to_day)
+            modal_price (array): Modal price per quintal
+            min_price, max_price (array, optional): Default to the modal price
+            volume (array, optional): Arrivals in tonnes (default NaN)
+            grade (array, optional): Grade codes (default DEFAULT_GRADE)
+        """
+        n = len(day)
+        modal_price = np.asarray(modal_price, dtype=np.float32)
+        chunk = {
+            "day": np.asarray(day, dtype=np.int32),
+            "mandi": np.asarray(mandi, dtype=np.int32),
+            "grade": (np.zeros(n, np.int16) if grade is None else np.asarray(grade, dtype=np.int16)),
+            "min_price": modal_price if min_price is None else np.asarray(min_price, dtype=np.float32),
+            "max_price": modal_price if max_price is None else np.asarray(max_price, dtype=np.float32),
+            "modal_price": modal_price,
+            "volume": (np.full(n, np.nan, np.float32) if volume is None else np.asarray(volume, dtype=np.float32)),
+        }
+        if any(len(column) != n for column in chunk.values()):
+            raise ValueError("All columns must have the same length")
+        with self._lock:
+            self._partition(crop, create=True).pending.append(chunk)
+
+    def append(self, crop, mandi, when, modal_price, min_price=None, max_price=None,
+               volume=None, grade=DEFAULT_GRADE, district=None, state=None):
+        """Stage a single price observation."""
+        with self._lock:
+            code = self.mandi_code(mandi, district, state)
+            self.append_columns(
+                crop, [code], [to_day(when)], [modal_price],
+                None if min_price is None else [min_price],
+                None if max_price is None else [max_price],
+                None if volume is None else [volume],
+                [self.grades.code(grade or DEFAULT_GRADE)],
+            )
+
+    def ingest_csv(self, path_or_file, chunk_rows=500_000):
+        """Bulk-load an Agmarknet-style CSV dump.
+
+        Recognized columns (case and spacing ignored): Commodity, State,
+        District, Market, Grade, Arrival_Date, Min_Price, Max_Price,
+        Modal_Price and Arrivals. Rows with an unparseable date or modal price
+        are skipped.
+
+        Args:
+            path_or_file: File path or an open text file
+            chunk_rows (int): Rows buffered per crop before they are staged as arrays
+
+        Returns:
+            dict: {"rows": ingested rows, "skipped": skipped rows}
+        """
+        if isinstance(path_or_file, (str, os.PathLike)):
+            with open(path_or_file, newline="", encoding="utf-8-sig") as f:
+                return self.ingest_csv(f, chunk_rows)
+
+        reader = csv.reader(path_or_file)
+        header = next(reader, None)
+        if header is None:
+            return {"rows": 0, "skipped": 0}
+        fields = _map_csv_header(header)
+        get = {field: (lambda row, i=i: row[i] if i < len(row) else "") for field, i in fields.items()}
+        missing = lambda row: ""
+
+        # Dates and mandis repeat heavily in dumps, so each distinct string is parsed once
+        day_cache, mandi_cache, grade_cache = {}, {}, {}
+        buffers = {}
+        rows = skipped = 0
+
+        def flush(crop):
+            buf = buffers.pop(crop)
+            self.append_columns(crop, buf["mandi"], buf["day"], buf["modal_price"],
+                                buf["min_price"], buf["max_price"], buf["volume"], buf["grade"])
+
+        def number(text):
+            try:
+                return float(text)
+            except ValueError:
+                return float("nan")
+
+        with self._lock:
+            for row in reader:
+                try:
+                    date_text = get["date"](row)
+                    day = day_cache.get(date_text)
+                    if day is None:
+                        day = day_cache[date_text] = _parse_date(date_text)
+                    modal = float(get["modal_price"](row))
+                except ValueError:
+                    skipped += 1
+                    continue
+
+                mandi_key = (get["mandi"](row), get.get("district", missing)(row), get.get("state", missing)(row))
+                mandi = mandi_cache.get(mandi_key)
+                if mandi is None:
+                    mandi = mandi_cache[mandi_key] = self.mandi_code(*mandi_key)
+                grade_text = get.get("grade", missing)(row) or DEFAULT_GRADE
+                grade = grade_cache.get(grade_text)
+                if grade is None:
+                    grade = grade_cache[grade_text] = self.grades.code(grade_text)
+
+                crop = get["crop"](row)
+                buf = buffers.get(crop)
+                if buf is None:
+                    buf = buffers[crop] = {name: [] for name in PRICE_COLUMNS}
+                buf["day"].append(day)
+                buf["mandi"].append(mandi)
+                buf["grade"].append(grade)
+                buf["modal_price"].append(modal)
+                buf["min_price"].append(number(get["min_price"](row)) if "min_price" in get else modal)
+                buf["max_price"].append(number(get["max_price"](row)) if "max_price" in get else modal)
+                buf["volume"].append(number(get["volume"](row)) if "volume" in get else float("nan"))
+                rows += 1
+                if len(buf["day"]) >= chunk_rows:
+                    flush(crop)
+            for crop in list(buffers):
+                flush(crop)
+        return {"rows": rows, "skipped": skipped}
+
+    # ----- reads -----
+
+    def _partition(self, crop, create=False):
+        """The partition of a crop, merged and ready to query (lock must be held to create)."""
+        code = self._crop_names.get(crop)
+        if code is None:
+            if not create:
+                return None
+            code = self._crop_names.code(crop)
+        partition = self._crops.get(code)
+        if partition is None and create:
+            partition = self._crops[code] = _CropPartition()
+        return partition
+
+    def _sealed(self, crop):
+        partition = self._partition(crop)
+        if partition is not None and partition.pending:
+            with self._lock:
+                rows = partition.merge()
+                if rows is not None:
+                    for listener in self._merge_listeners:
+                        listener(self, crop, rows)
+        return partition
+
+    def month_partitions(self, crop):
+        """{"YYYY-MM": (first row, end row)} for a crop."""
+        partition = self._sealed(crop)
+        return dict(partition.month_index) if partition is not None else {}
+
+    def latest_day(self, crop):
+        """Most recent day with a price for the crop, or None."""
+        partition = self._sealed(crop)
+        if partition is None or not len(partition.columns["day"]):
+            return None
+        return int(partition.columns["day"][-1])
+
+    def revision(self, crop):
+        """Counter that changes whenever new rows of the crop are merged, or None for an unknown crop."""
+        partition = self._sealed(crop)
+        return None if partition is None else partition.revision
+
+    def query(self, crop, start=None, end=None, mandi=None, district=None, state=None, grade=None):
+        """Prices of one crop between two dates (inclusive), oldest first.
+
+        Args:
+            crop (str): Crop name
+            start, end: Date bounds (date, datetime64, days since epoch or date string)
+            mandi, district, state (str or int, optional): Location filters, as names or
+                codes (a mandi code pins one of several namesake markets)
+            grade (str, optional): Grade filter
+
+        Returns:
+            PriceSeries: Views of the stored columns when no filter is given
+        """
+        crop_name = crop
+        partition = self._sealed(crop)
+        if partition is None:
+            return PriceSeries(crop_name, _CropPartition().columns, self)
+        columns = partition.columns
+        day = columns["day"]
+        # Search with the column's own dtype so NumPy never casts the whole column
+        lo = 0 if start is None else int(np.searchsorted(day, day.dtype.type(to_day(start)), "left"))
+        hi = len(day) if end is None else int(np.searchsorted(day, day.dtype.type(to_day(end)), "right"))
+        view = {name: column[lo:hi] for name, column in columns.items()}
+
+        mask = None
+        # (filter value, dictionary, column, mandi code -> code lookup)
+        for value, dictionary, column, lookup in (
+            (mandi, self.mandis, "mandi", None),
+            (district, self.districts, "mandi", self.mandi_district),
+            (state, self.states, "mandi", self.mandi_state),
+            (grade, self.grades, "grade", None),
+        ):
+            if value is None:
+                continue
+            code = value if isinstance(value, (int, np.integer)) else dictionary.get(value)
+            if code is None:
+                mask = np.zeros(hi - lo, dtype=bool)
+                break
+            codes = view[column] if lookup is None else lookup[view[column]]
+            selected = codes == code
+            mask = selected if mask is None else mask & selected
+        if mask is not None:
+            rows = np.flatnonzero(mask)
+            view = {name: column[rows] for name, column in view.items()}
+        return PriceSeries(crop_name, view, self)
+
+    def recent(self, crop, days=90, **filters):
+        """The last `days` days of prices up to the crop's latest date (see query)."""
+        latest = self.latest_day(crop)
+        if latest is None:
+            return self.query(crop, **filters)
+        return self.query(crop, start=latest - days + 1, end=latest, **filters)
+
+    def __len__(self):
+        with self._lock:
+            partitions = list(self._crops.values())
+        return sum(len(p.columns["day"]) + sum(len(c["day"]) for c in p.pending) for p in partitions)
+
+    # ----- persistence -----
+
+    def save(self, directory):
+        """Write every crop partition as .npy columns plus a JSON catalog."""
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            crops = []
+            for code, name in enumerate(self._crop_names.names):
+                partition = self._sealed(name)
+                for column, values in partition.columns.items():
+                    np.save(os.path.join(directory, f"crop{code}_{column}.npy"), values)
+                crops.append(name)
+            catalog = {
+                "source": self.source,
+                "crops": crops,
+                "mandis": self.mandis.names,
+                "districts": self.districts.names,
+                "states": self.states.names,
+                "grades": self.grades.names,
+                "mandi_district": self._mandi_district,
+                "mandi_state": self._mandi_state,
+            }
+        with open(os.path.join(directory, "catalog.json"), "w") as f:
+            json.dump(catalog, f)
+        return directory
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """Open a store written by save; columns are memory-mapped by default."""
+        with open(os.path.join(directory, "catalog.json")) as f:
+            catalog = json.load(f)
+        store = cls(source=catalog.get("source", directory))
+        store.districts = _Dictionary(catalog["districts"])
+        store.states = _Dictionary(catalog["states"])
+        store.mandis = _MandiDictionary()
+        for name, district, state in zip(catalog["mandis"], catalog["mandi_district"], catalog["mandi_state"]):
+            store.mandis.code(name, store.districts.names[district], store.states.names[state])
+        store.grades = _Dictionary(catalog["grades"])
+        store._mandi_district = list(catalog["mandi_district"])
+        store._mandi_state = list(catalog["mandi_state"])
+        store.mandi_district = np.array(store._mandi_district, dtype=np.int32)
+        store.mandi_state = np.array(store._mandi_state, dtype=np.int32)
+        for code, name in enumerate(catalog["crops"]):
+            columns = {
+                column: np.load(os.path.join(directory, f"crop{code}_{column}.npy"),
+                                mmap_mode="r" if mmap else None)
+                for column in PRICE_COLUMNS
+            }
+            store._crop_names.code(name)
+            store._crops[code] = _CropPartition(columns)
+        return store
+
+
+# ----- mock history -----
+
+# (state, district, mandi) served by the mock history
+_MOCK_MANDIS = (
+    ("Punjab", "Ludhiana", "Khanna"), ("Punjab", "Ludhiana", "Ludhiana"),
+    ("Punjab", "Amritsar", "Amritsar"), ("Punjab", "Bathinda", "Bathinda"),
+    ("Punjab", "Jalandhar", "Jalandhar"), ("Punjab", "Patiala", "Rajpura"),
+    ("Haryana", "Karnal", "Karnal"), ("Haryana", "Hisar", "Hisar"),
+    ("Delhi", "North Delhi", "Azadpur"), ("Delhi", "North West Delhi", "Narela"),
+    ("Uttar Pradesh", "Agra", "Agra"), ("Uttar Pradesh", "Lucknow", "Lucknow"),
+    ("Madhya Pradesh", "Indore", "Indore"), ("Madhya Pradesh", "Bhopal", "Bhopal"),
+    ("Rajasthan", "Jaipur", "Jaipur"), ("Rajasthan", "Kota", "Kota"),
+    ("Maharashtra", "Pune", "Pune"), ("Maharashtra", "Nashik", "Lasalgaon"),
+    ("Maharashtra", "Nagpur", "Nagpur"), ("Maharashtra", "Latur", "Latur"),
+    ("Karnataka", "Bengaluru Urban", "Bangalore"), ("Karnataka", "Dharwad", "Hubli"),
+    ("Karnataka", "Mysuru", "Mysore"), ("West Bengal", "Bardhaman", "Burdwan"),
+    ("West Bengal", "Kolkata", "Kolkata"), ("Gujarat", "Rajkot", "Rajkot"),
+)
+
+# Typical modal price in Rs per quintal
+_MOCK_BASE_PRICES = {
+    "Wheat": 2200, "Rice": 2800, "Cotton": 6500, "Maize": 1900,
+    "Soybean": 4500, "Onion": 1800, "Potato": 1200, "Tomato": 1500,
+}
+
+# Grade -> price multiplier
+_MOCK_GRADES = {"A": 1.0, "B": 0.93, "C": 0.85}
+
+
+def generate_mock_store(days=365, end=None, seed=42):
+    """Build a store with `days` of seeded mock history for every mock crop and mandi."""
+    rng = np.random.default_rng(seed)
+    store = MandiPriceStore(source="Mock mandi price history")
+    mandi_codes = np.array(
+        [store.mandi_code(mandi, district, state) for state, district, mandi in _MOCK_MANDIS],
+        dtype=np.int32,
+    )
+    grade_codes = np.array([store.grades.code(g) for g in _MOCK_GRADES], dtype=np.int16)
+    grade_factors = np.array(list(_MOCK_GRADES.values()), dtype=np.float32)
+
+    last_day = to_day(end or date.today())
+    day_axis = np.arange(last_day - days + 1, last_day + 1, dtype=np.int32)
+    n_mandis, n_grades = len(mandi_codes), len(grade_codes)
+    shape = (days, n_mandis, n_grades)
+
+    for crop, base in _MOCK_BASE_PRICES.items():
+        season = 1 + 0.08 * np.sin(2 * np.pi * (day_axis + rng.uniform(0, 365)) / 365)
+        drift = np.cumsum(rng.normal(0, 0.006, (days, n_mandis)), axis=0)
+        mandi_offset = rng.normal(0, 0.05, n_mandis)
+        modal = (base * season[:, None, None] * np.exp(drift + mandi_offset)[:, :, None]
+                 * grade_factors[None, None, :])
+        modal = np.round(modal, 0).astype(np.float32)
+        spread = rng.uniform(0.03, 0.08, shape).astype(np.float32)
+        volume = np.round(rng.gamma(2.0, 40.0, shape), 1).astype(np.float32)
+
+        store.append_columns(
+            crop,
+            mandi=np.broadcast_to(mandi_codes[None, :, None], shape).ravel(),
+            day=np.broadcast_to(day_axis[:, None, None], shape).ravel(),
+            modal_price=modal.ravel(),
+            min_price=np.round(modal * (1 - spread)).ravel(),
+            max_price=np.round(modal * (1 + spread)).ravel(),
+            volume=volume.ravel(),
+            grade=np.broadcast_to(grade_codes[None, None, :], shape).ravel(),
+        )
+    return store
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_price_store():
+    """The process-wide price store, loaded on first use.
+
+    MANDI_PRICE_STORE_DIR (a directory written by MandiPriceStore.save) is
+    opened memory-mapped; otherwise MANDI_PRICE_CSV is ingested; otherwise a
+    year of mock history is generated.
+    """
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                store_dir = os.getenv("MANDI_PRICE_STORE_DIR")
+                csv_path = os.getenv("MANDI_PRICE_CSV")
+                if store_dir and os.path.exists(os.path.join(store_dir, "catalog.json")):
+                    _default_store = MandiPriceStore.load(store_dir)
+                elif csv_path:
+                    store = MandiPriceStore(source=f"Agmarknet dump ({os.path.basename(csv_path)})")
+                    store.ingest_csv(csv_path)
+                    _default_store = store
+                else:
+                    _default_store = generate_mock_store()
+    return _default_store
+
+
+def set_price_store(store):
+    """Replace the process-wide price store (e.g. after a fresh ingest)."""
+    global _default_store
+    with _default_store_lock:
+        _default_store = store
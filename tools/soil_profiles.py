@@ -0,0 +1,231 @@
+"""
+Precomputed soil profile table.
+
+Soil profiles and everything derived from them (analysis, recommendations,
+suitable crops) are computed once at import into an immutable,
+column-oriented region table. A lookup normalizes the location, resolves it
+with a district -> state -> default fallback chain through a single dictionary
+probe, and returns a shallow copy of the precomputed response.
+"""
+
+from types import MappingProxyType
+
+# Mock comprehensive soil data based on different regions
+_STATE_SOIL_PROFILES = {
+    "Punjab": {
+        "location": "Punjab",
+        "moisture": 45.2,
+        "ph": 7.2,
+        "nitrogen": "Medium",
+        "phosphorus": "High",
+        "potassium": "Medium",
+        "organic_matter": 2.8,
+        "soil_type": "Alluvial",
+        "texture": "Loamy",
+        "drainage": "Good",
+        "salinity": "Low",
+        "temperature": 18.5,
+        "conductivity": 0.8,
+        "carbon_content": 1.4
+    },
+    "Karnataka": {
+        "location": "Karnataka",
+        "moisture": 38.7,
+        "ph": 6.8,
+        "nitrogen": "Medium",
+        "phosphorus": "High",
+        "potassium": "Low",
+        "organic_matter": 3.2,
+        "soil_type": "Red Laterite",
+        "texture": "Clay Loam",
+        "drainage": "Moderate",
+        "salinity": "Very Low",
+        "temperature": 22.3,
+        "conductivity": 0.6,
+        "carbon_content": 1.8
+    },
+    "Maharashtra": {
+        "location": "Maharashtra",
+        "moisture": 42.1,
+        "ph": 7.5,
+        "nitrogen": "Low",
+        "phosphorus": "Medium",
+        "potassium": "High",
+        "organic_matter": 2.5,
+        "soil_type": "Black Cotton",
+        "texture": "Clay",
+        "drainage": "Poor",
+        "salinity": "Medium",
+        "temperature": 25.1,
+        "conductivity": 1.2,
+        "carbon_content": 1.2
+    },
+    "West Bengal": {
+        "location": "West Bengal",
+        "moisture": 52.3,
+        "ph": 6.2,
+        "nitrogen": "High",
+        "phosphorus": "Medium",
+        "potassium": "Medium",
+        "organic_matter": 4.1,
+        "soil_type": "Alluvial",
+        "texture": "Silty Clay",
+        "drainage": "Good",
+        "salinity": "Low",
+        "temperature": 26.8,
+        "conductivity": 0.7,
+        "carbon_content": 2.3
+    }
+}
+
+# Default soil data for unknown locations
+_DEFAULT_SOIL_PROFILE = {
+    "location": "Default",
+    "moisture": 40.0,
+    "ph": 6.8,
+    "nitrogen": "Medium",
+    "phosphorus": "Medium",
+    "potassium": "Medium",
+    "organic_matter": 3.0,
+    "soil_type": "Mixed",
+    "texture": "Loamy",
+    "drainage": "Moderate",
+    "salinity": "Low",
+    "temperature": 20.0,
+    "conductivity": 0.8,
+    "carbon_content": 1.5
+}
+
+
+# Districts we serve, mapped to the state whose soil profile applies
+_DISTRICT_STATES = {
+    "Punjab": [
+        "Amritsar", "Bathinda", "Firozpur", "Jalandhar", "Ludhiana",
+        "Moga", "Patiala", "Sangrur",
+    ],
+    "Karnataka": [
+        "Belagavi", "Bengaluru Rural", "Dharwad", "Kalaburagi", "Mandya",
+        "Mysuru", "Raichur", "Tumakuru",
+    ],
+    "Maharashtra": [
+        "Amravati", "Aurangabad", "Jalgaon", "Kolhapur", "Latur",
+        "Nagpur", "Nashik", "Pune", "Solapur",
+    ],
+    "West Bengal": [
+        "Bardhaman", "Birbhum", "Hooghly", "Jalpaiguri", "Murshidabad",
+        "Nadia",
+    ],
+}
+
+# Raw profile columns, in output order
+SOIL_COLUMNS = (
+    "moisture", "ph", "nitrogen", "phosphorus", "potassium", "organic_matter",
+    "soil_type", "texture", "drainage", "salinity", "temperature",
+    "conductivity", "carbon_content",
+)
+
+
+def normalize_location(location):
+    """Casefold and collapse whitespace so lookups ignore spelling noise."""
+    return " ".join((location or "").split()).casefold()
+
+
+def _derive(profile):
+    """Analysis, recommendations and suitable crops for one soil profile."""
+    return {
+        "analysis": {
+            "fertility_status": "Good" if profile["organic_matter"] > 3.0 else "Moderate",
+            "water_retention": "High" if profile["moisture"] > 45 else "Medium",
+            "ph_status": "Optimal" if 6.5 <= profile["ph"] <= 7.5 else "Needs adjustment",
+            "nutrient_balance": "Balanced" if all(n != "Low" for n in [profile["nitrogen"], profile["phosphorus"], profile["potassium"]]) else "Requires supplementation"
+        },
+        "recommendations": [
+            f"Maintain moisture level around {profile['moisture']}%",
+            "Add organic compost to improve soil structure" if profile["organic_matter"] < 3.0 else "Organic matter levels are good",
+            "Apply lime to increase pH" if profile["ph"] < 6.5 else "Apply sulfur to decrease pH" if profile["ph"] > 7.5 else "pH levels are optimal",
+            f"Supplement {profile['nitrogen']} nitrogen" if profile["nitrogen"] == "Low" else f"Nitrogen levels are {profile['nitrogen'].lower()}",
+            f"Add phosphorus fertilizer" if profile["phosphorus"] == "Low" else f"Phosphorus levels are {profile['phosphorus'].lower()}",
+            f"Apply potash fertilizer" if profile["potassium"] == "Low" else f"Potassium levels are {profile['potassium'].lower()}"
+        ],
+        "suitable_crops": [
+            "Wheat", "Rice", "Cotton", "Sugarcane" if profile["moisture"] > 45 else "Millet",
+            "Vegetables" if profile["ph"] > 6.0 else "Acidic crops",
+            "Pulses" if profile["nitrogen"] != "High" else "Leafy vegetables"
+        ]
+    }
+
+
+class SoilRegionTable:
+    """Immutable column-oriented table of soil profiles with derived analyses."""
+
+    def __init__(self, state_profiles, default_profile, district_states):
+        """
+        Args:
+            state_profiles (dict): {state: raw soil profile}
+            default_profile (dict): Raw profile used when nothing matches
+            district_states (dict): {state: [district, ...]}
+        """
+        profiles = list(state_profiles.values()) + [default_profile]
+        self.regions = tuple(p["location"] for p in profiles)
+        self.default_row = len(profiles) - 1
+        self.columns = MappingProxyType({
+            name: tuple(p[name] for p in profiles) for name in SOIL_COLUMNS
+        })
+
+        # Full tool responses, built once per region
+        self._responses = tuple(
+            MappingProxyType({
+                "location": region,
+                **{name: self.columns[name][row] for name in SOIL_COLUMNS},
+                **_derive(profiles[row]),
+            })
+            for row, region in enumerate(self.regions)
+        )
+
+        # normalized name -> (row, resolution level)
+        index = {}
+        for row, region in enumerate(self.regions[:self.default_row]):
+            index[normalize_location(region)] = (row, "state")
+        for state, districts in district_states.items():
+            row = self.regions.index(state)
+            for district in districts:
+                index.setdefault(normalize_location(district), (row, "district"))
+        self._index = MappingProxyType(index)
+
+    def resolve(self, location):
+        """Return (row, resolution) for a location: district, state or default.
+
+        Besides exact names, "District, State, Country" style strings are
+        resolved by their most specific known part.
+        """
+        normalized = normalize_location(location)
+        hit = self._index.get(normalized)
+        if hit is not None:
+            return hit
+        for part in normalized.split(","):
+            hit = self._index.get(part.strip())
+            if hit is not None:
+                return hit
+        return self.default_row, "default"
+
+    def lookup(self, location):
+        """Return the soil response for a location as a shallow copy.
+
+        Nested analysis/recommendation containers are shared and must not be
+        mutated by callers.
+        """
+        row, resolution = self.resolve(location)
+        response = dict(self._responses[row])
+        if resolution != "state":
+            response["location"] = location
+            response["soil_region"] = self.regions[row]
+        return response
+
+    def __len__(self):
+        return len(self.regions)
+
+
+# Built once per process
+soil_region_table = SoilRegionTable(
+    _STATE_SOIL_PROFILES, _DEFAULT_SOIL_PROFILE, _DISTRICT_STATES
+)
@@ -0,0 +1,188 @@
+"""
+Shared result cache for deterministic tool functions.
+
+Many farmers in one district ask the same questions, so tools such as
+get_soil_data(location) or fetch_mandi_prices(crop, location) are called with
+the same arguments over and over. ``cached_tool`` wraps a tool function with a
+per-tool LRU cache with a time-to-live. Cache keys are built from the bound call
+arguments after normalizing case and whitespace of the configured argument
+names (crop, location, ...), so "Punjab", " punjab " and "PUNJAB" share one
+entry. Tools often echo such arguments in their result ("location":
+location); those fields are given back in each caller's own spelling rather
+than the one of the call that filled the cache. Every cache keeps
+hit/miss/eviction counters.
+
+The wrapper keeps the wrapped function's name, docstring and signature, so the
+agent framework builds the same tool declaration as for the bare function.
+"""
+
+import copy
+import functools
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict
+
+# Argument names normalized by default when building cache keys
+DEFAULT_NORMALIZED_ARGS = ("crop", "location", "crop_preferences", "season", "quality_grade")
+
+# tool name -> ToolCache, for stats and invalidation
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def _echo_arguments(result, cached_args, call_args):
+    """Put the caller's spelling back into top-level result fields that echo a normalized argument.
+
+    Args:
+        result (dict): Copy of the cached result, changed in place
+        cached_args (dict): Normalized arguments of the call that filled the cache, as given
+        call_args (dict): The same arguments of the current call
+    """
+    for name, cached in cached_args.items():
+        current = call_args[name]
+        if current != cached and name in result and result[name] == cached:
+            result[name] = current
+
+
+def normalize_value(value):
+    """Casefold and collapse whitespace in strings, recursing into lists and dicts."""
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, (list, tuple)):
+        return [normalize_value(v) for v in value]
+    if isinstance(value, dict):
+        return {k: normalize_value(v) for k, v in value.items()}
+    return value
+
+
+class ToolCache:
+    """Thread-safe LRU cache with a time-to-live for one tool's results."""
+
+    def __init__(self, name, ttl, maxsize=1024):
+        """
+        Args:
+            name (str): Tool name used in stats
+            ttl (float): Seconds an entry stays valid
+            maxsize (int): Maximum number of entries before LRU eviction
+        """
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return (True, value) for a live entry, otherwise (False, None)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entry if full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return hit/miss counters and the current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def cached_tool(ttl, maxsize=1024, normalize=DEFAULT_NORMALIZED_ARGS):
+    """Decorator that caches a deterministic tool's results.
+
+    Args:
+        ttl (float): Seconds a cached result stays valid
+        maxsize (int): Maximum cached argument combinations for this tool
+        normalize (tuple): Argument names whose values are case/whitespace
+            normalized when building the cache key
+
+    Returns:
+        callable: Decorator producing the cached tool function
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        cache = ToolCache(func.__name__, ttl, maxsize)
+        with _registry_lock:
+            _registry[func.__name__] = cache
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key_args = {
+                name: normalize_value(value) if name in normalize else value
+                for name, value in bound.arguments.items()
+            }
+            try:
+                key = json.dumps(key_args, sort_keys=True, default=str)
+            except (TypeError, ValueError):
+                # Unhashable/unserializable arguments: skip the cache
+                return func(*args, **kwargs)
+
+            echoed = {
+                name: value for name, value in bound.arguments.items()
+                if name in normalize and isinstance(value, str)
+            }
+            found, entry = cache.get(key)
+            if not found:
+                entry = (echoed, func(*args, **kwargs))
+                cache.put(key, entry)
+            cached_args, value = entry
+            # Callers get their own copy so cached results are never mutated
+            result = copy.deepcopy(value)
+            if isinstance(result, dict):
+                _echo_arguments(result, cached_args, echoed)
+            return result
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
+
+
+def tool_cache_stats():
+    """Return {tool name: stats} for every cached tool."""
+    with _registry_lock:
+        caches = list(_registry.values())
+    return {cache.name: cache.stats() for cache in caches}
+
+
+def clear_tool_caches():
+    """Drop all cached tool results (e.g. after reloading reference data)."""
+    with _registry_lock:
+        caches = list(_registry.values())
+    for cache in caches:
+        cache.clear()
@@ -0,0 +1,316 @@
+"""
+Request-level latency tracing.
+
+Each API request gets a Trace identified by its request ID. Code on the request
+path opens spans with ``span(name, category)``; the active trace and parent span
+travel in context variables, so spans nest correctly across awaits and no
+tracer object has to be passed around. Timings come from the monotonic
+``time.perf_counter_ns`` clock.
+
+Sub-agent and tool spans cannot be opened around the work itself because the
+ADK runs them inside ``Runner.run_async``; EventSpanRecorder derives them from
+the runner's event stream instead (author changes and function call/response
+pairs).
+
+Finished traces are kept in a bounded in-memory buffer and can be exported as
+JSON or in the Chrome trace-event format (chrome://tracing, Perfetto).
+"""
+
+import contextvars
+import itertools
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_current_span_id = contextvars.ContextVar("current_span_id", default=None)
+
+_NO_SPAN = nullcontext()
+
+
+def clock():
+    """Monotonic timestamp in nanoseconds used for every span."""
+    return time.perf_counter_ns()
+
+
+class Span:
+    """One timed operation within a trace."""
+
+    __slots__ = ("span_id", "parent_id", "name", "category", "start_ns", "end_ns", "attrs")
+
+    def __init__(self, span_id, parent_id, name, category, start_ns, end_ns=None, attrs=None):
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.category = category
+        self.start_ns = start_ns
+        self.end_ns = end_ns
+        self.attrs = attrs or {}
+
+    @property
+    def duration_ns(self):
+        return (self.end_ns or clock()) - self.start_ns
+
+
+class Trace:
+    """All spans recorded for one request."""
+
+    def __init__(self, request_id, listeners=()):
+        self.request_id = request_id
+        self.started_at = time.time()
+        self.start_ns = clock()
+        self.spans = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._listeners = listeners
+
+    def start_span(self, name, category, parent_id=None, start_ns=None, attrs=None):
+        """Open a span and return it; finish it with end_span."""
+        with self._lock:
+            span = Span(next(self._ids), parent_id, name, category,
+                        start_ns if start_ns is not None else clock(), attrs=attrs)
+            self.spans.append(span)
+        return span
+
+    def end_span(self, span, end_ns=None):
+        """Close a span and notify listeners (e.g. metrics)."""
+        span.end_ns = end_ns if end_ns is not None else clock()
+        for listener in self._listeners:
+            listener(span)
+
+    def to_dict(self):
+        """JSON-serializable view with times in milliseconds relative to the trace start."""
+        with self._lock:
+            spans = list(self.spans)
+        end_ns = max((s.end_ns or clock() for s in spans), default=self.start_ns)
+        return {
+            "request_id": self.request_id,
+            "started_at": self.started_at,
+            "duration_ms": round((end_ns - self.start_ns) / 1e6, 3),
+            "spans": [
+                {
+                    "id": s.span_id,
+                    "parent_id": s.parent_id,
+                    "name": s.name,
+                    "category": s.category,
+                    "start_ms": round((s.start_ns - self.start_ns) / 1e6, 3),
+                    "duration_ms": round(s.duration_ns / 1e6, 3),
+                    "attrs": s.attrs,
+                }
+                for s in spans
+            ],
+        }
+
+    def to_chrome(self):
+        """Chrome trace-event format ("X" complete events, microsecond timestamps)."""
+        with self._lock:
+            spans = list(self.spans)
+        # One row per category keeps overlapping sub-agent/tool spans readable
+        rows = {}
+        events = []
+        for s in spans:
+            events.append({
+                "name": s.name,
+                "cat": s.category,
+                "ph": "X",
+                "ts": (s.start_ns - self.start_ns) / 1e3,
+                "dur": s.duration_ns / 1e3,
+                "pid": 1,
+                "tid": rows.setdefault(s.category, len(rows) + 1),
+                "args": {"span_id": s.span_id, "parent_id": s.parent_id, **s.attrs},
+            })
+        for category, tid in rows.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid,
+                           "args": {"name": category}})
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"request_id": self.request_id, "started_at": self.started_at},
+        }
+
+
+class Tracer:
+    """Creates traces and keeps the most recent ones for inspection."""
+
+    def __init__(self, max_traces=500, enabled=True):
+        """
+        Args:
+            max_traces (int): Finished and in-flight traces kept before the oldest is dropped
+            enabled (bool): When False, traces are not kept; spans are still recorded
+                if listeners are registered, and are no-ops otherwise
+        """
+        self.max_traces = max_traces
+        self.enabled = enabled
+        self.listeners = []
+        self._traces = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener):
+        """Call listener(span) whenever any span ends."""
+        self.listeners.append(listener)
+
+    def start_trace(self, request_id=None):
+        """Create a trace and make it current for this context.
+
+        Returns:
+            tuple: (trace, token) -- pass the token to end_trace
+        """
+        if not self.enabled and not self.listeners:
+            return None, None
+        trace = Trace(request_id or str(uuid.uuid4()), listeners=self.listeners)
+        if self.enabled:
+            with self._lock:
+                self._traces[trace.request_id] = trace
+                while len(self._traces) > self.max_traces:
+                    self._traces.popitem(last=False)
+        return trace, _current_trace.set(trace)
+
+    def end_trace(self, token):
+        """Stop recording into the trace made current by start_trace."""
+        if token is not None:
+            _current_trace.reset(token)
+
+    def get(self, request_id):
+        """Return the trace for a request ID, or None if unknown or dropped."""
+        with self._lock:
+            return self._traces.get(request_id)
+
+
+def current_trace():
+    """The trace of the request being handled, or None."""
+    return _current_trace.get()
+
+
+def current_span_id():
+    """ID of the innermost open span, or None."""
+    return _current_span_id.get()
+
+
+@contextmanager
+def _span(trace, name, category, attrs):
+    parent_id = _current_span_id.get()
+    record = trace.start_span(name, category, parent_id=parent_id, attrs=attrs)
+    token = _current_span_id.set(record.span_id)
+    try:
+        yield record
+    except BaseException as e:
+        record.attrs["error"] = type(e).__name__
+        raise
+    finally:
+        _current_span_id.reset(token)
+        trace.end_span(record)
+
+
+def span(name, category, **attrs):
+    """Context manager timing a block as a child of the current span.
+
+    A no-op when no trace is active, so it is safe on every code path.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return _NO_SPAN
+    return _span(trace, name, category, attrs)
+
+
+class EventSpanRecorder:
+    """Derives runner event, sub-agent and tool spans from an ADK event stream."""
+
+    def __init__(self):
+        self.trace = _current_trace.get()
+        self.parent_id = _current_span_id.get()
+        self._last_ns = clock()
+        self._agent_span = None
+        # Time of the current author's latest event, where its span ends
+        self._agent_last_ns = None
+        self._tool_spans = {}
+
+    def on_event(self, event):
+        """Record the spans an event closes or opens."""
+        trace = self.trace
+        if trace is None:
+            return
+        now = clock()
+        author = getattr(event, "author", None) or "unknown"
+
+        # A new author took over: its work started when the previous event was emitted
+        if self._agent_span is None or self._agent_span.attrs["agent"] != author:
+            if self._agent_span is not None:
+                trace.end_span(self._agent_span, self._agent_last_ns)
+            self._agent_span = trace.start_span(
+                f"agent:{author}", "sub_agent", parent_id=self.parent_id,
+                start_ns=self._last_ns, attrs={"agent": author},
+            )
+        self._agent_last_ns = now
+        error_code = getattr(event, "error_code", None)
+        if error_code:
+            # The model call failed; ADK reports it as an event instead of raising
+            self._agent_span.attrs["error"] = str(error_code)
+
+        is_final = event.is_final_response() if hasattr(event, "is_final_response") else False
+        record = trace.start_span(
+            f"event:{author}", "runner_event", parent_id=self._agent_span.span_id,
+            start_ns=self._last_ns,
+            attrs={
+                "event_id": getattr(event, "id", None),
+                "author": author,
+                "partial": bool(getattr(event, "partial", False)),
+                "is_final": is_final,
+            },
+        )
+        trace.end_span(record, now)
+
+        get_calls = getattr(event, "get_function_calls", None)
+        for call in (get_calls() if get_calls else None) or []:
+            self._tool_spans[call.id or call.name] = trace.start_span(
+                f"tool:{call.name}", "tool", parent_id=self._agent_span.span_id,
+                start_ns=now, attrs={"tool": call.name, "agent": author},
+            )
+        get_responses = getattr(event, "get_function_responses", None)
+        for response in (get_responses() if get_responses else None) or []:
+            tool_span = self._tool_spans.pop(response.id or response.name, None)
+            if tool_span is not None:
+                trace.end_span(tool_span, now)
+
+        self._last_ns = now
+
+    def fail(self, error, agent=None):
+        """Mark the sub-agent running when `error` was raised as failed.
+
+        Args:
+            error (BaseException): The exception that ended the run
+            agent (str, optional): Agent to charge when no event arrived before the error
+        """
+        trace = self.trace
+        if trace is None:
+            return
+        if self._agent_span is None:
+            if agent is None:
+                return
+            self._agent_span = trace.start_span(
+                f"agent:{agent}", "sub_agent", parent_id=self.parent_id,
+                start_ns=self._last_ns, attrs={"agent": agent},
+            )
+            self._agent_last_ns = clock()
+        self._agent_span.attrs["error"] = type(error).__name__
+
+    def finish(self):
+        """Close any spans still open when the event stream ends."""
+        if self.trace is None:
+            return
+        if self._agent_span is not None:
+            self.trace.end_span(self._agent_span, self._agent_last_ns)
+            self._agent_span = None
+        for tool_span in self._tool_spans.values():
+            tool_span.attrs["unfinished"] = True
+            self.trace.end_span(tool_span, self._last_ns)
+        self._tool_spans.clear()
+
+
+def write_chrome_trace(trace, path):
+    """Write a trace to a Chrome trace-format JSON file for offline analysis."""
+    with open(path, "w") as f:
+        json.dump(trace.to_chrome(), f)
+    return path
@@ -1,40 +1,19 @@
-from datetime import datetime
+import logging
+import time
 
 from google.genai import types
 
+from logging_config import truncate
+from tracing import EventSpanRecorder, span
 
-# ANSI color codes for terminal output
-class Colors:
-    RESET = "\033[0m"
-    BOLD = "\033[1m"
-    UNDERLINE = "\033[4m"
-
-    # Foreground colors
-    BLACK = "\033[30m"
-    RED = "\033[31m"
-    GREEN = "\033[32m"
-    YELLOW = "\033[33m"
-    BLUE = "\033[34m"
-    MAGENTA = "\033[35m"
-    CYAN = "\033[36m"
-    WHITE = "\033[37m"
-
-    # Background colors
-    BG_BLACK = "\033[40m"
-    BG_RED = "\033[41m"
-    BG_GREEN = "\033[42m"
-    BG_YELLOW = "\033[43m"
-    BG_BLUE = "\033[44m"
-    BG_MAGENTA = "\033[45m"
-    BG_CYAN = "\033[46m"
-    BG_WHITE = "\033[47m"
-
-
-def update_interaction_history(session_service, app_name, user_id, session_id, entry):
-    """Add an entry to the interaction history in state.
+logger = logging.getLogger(__name__)
+
+
+async def update_interaction_history(session_service, app_name, user_id, session_id, entry):
+    """Append an entry to the session's interaction history.
 
     Args:
-        session_service: The session service instance
+        session_service: The AsyncSessionService instance
         app_name: The application name
         user_id: The user ID
         session_id: The session ID
@@ -43,39 +22,17 @@ def update_interaction_history(session_service, app_name, user_id, session_id, e
             - other keys are flexible depending on the action type
     """
     try:
-        # Get current session
-        session = session_service.get_session(
-            app_name=app_name, user_id=user_id, session_id=session_id
-        )
-
-        # Get current interaction history
-        interaction_history = session.state.get("interaction_history", [])
-
-        # Add timestamp if not already present
-        if "timestamp" not in entry:
-            entry["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        # Add the entry to interaction history
-        interaction_history.append(entry)
-
-        # Create updated state
-        updated_state = session.state.copy()
-        updated_state["interaction_history"] = interaction_history
-
-        # Create a new session with updated state
-        session_service.create_session(
-            app_name=app_name,
-            user_id=user_id,
-            session_id=session_id,
-            state=updated_state,
+        await session_service.append_history(app_name, user_id, session_id, entry)
+    except Exception:
+        logger.exception(
+            "Error updating interaction history",
+            extra={"fields": {"user_id": user_id, "session_id": session_id, "action": entry.get("action")}},
         )
-    except Exception as e:
-        print(f"Error updating interaction history: {e}")
 
 
-def add_user_query_to_history(session_service, app_name, user_id, session_id, query):
+async def add_user_query_to_history(session_service, app_name, user_id, session_id, query):
     """Add a user query to the interaction history."""
-    update_interaction_history(
+    await update_interaction_history(
         session_service,
         app_name,
         user_id,
@@ -87,11 +44,11 @@ def add_user_query_to_history(session_service, app_name, user_id, session_id, qu
     )
 
 
-def add_agent_response_to_history(
+async def add_agent_response_to_history(
     session_service, app_name, user_id, session_id, agent_name, response
 ):
     """Add an agent response to the interaction history."""
-    update_interaction_history(
+    await update_interaction_history(
         session_service,
         app_name,
         user_id,
@@ -104,11 +61,38 @@ def add_agent_response_to_history(
     )
 
 
-def get_most_recent_session_id(session_service, app_name, user_id):
+async def _answer_cache_state(answer_cache, session_service, app_name, user_id, session_id):
+    """Session state the answer cache keys shared answers on, or None if it keys on none."""
+    if session_service is None or not answer_cache.shared_state_keys:
+        return None
+    return await session_service.get_session_state(
+        app_name=app_name, user_id=user_id, session_id=session_id
+    )
+
+
+async def _record_cached_turn(session_service, app_name, user_id, session_id, query, agent_name, response):
+    """Add a turn answered from the cache to the session's events, as the runner would."""
+    try:
+        await session_service.record_turn(
+            app_name=app_name,
+            user_id=user_id,
+            session_id=session_id,
+            query=query,
+            author=agent_name,
+            response=response,
+        )
+    except Exception:
+        logger.exception(
+            "Error recording cached answer in session",
+            extra={"fields": {"user_id": user_id, "session_id": session_id}},
+        )
+
+
+async def get_most_recent_session_id(session_service, app_name, user_id):
     """Get the most recent session ID for a user.
     
     Args:
-        session_service: The session service instance
+        session_service: The AsyncSessionService instance
         app_name: The application name
         user_id: The user ID
         
@@ -117,23 +101,21 @@ def get_most_recent_session_id(session_service, app_name, user_id):
     """
     try:
         # Try to use list_sessions if available (for DatabaseSessionService)
-        if hasattr(session_service, 'list_sessions'):
-            existing_sessions = session_service.list_sessions(
+        if hasattr(session_service.sync, 'list_sessions'):
+            return await session_service.latest_session_id(
                 app_name=app_name,
                 user_id=user_id,
             )
-            if existing_sessions and len(existing_sessions.sessions) > 0:
-                return existing_sessions.sessions[0].id
         else:
             # For InMemorySessionService, we'll need to track sessions differently
             # This is a limitation of InMemorySessionService - it doesn't have list_sessions
-            print(f"Warning: {type(session_service).__name__} doesn't support listing sessions")
+            logger.warning(
+                "%s doesn't support listing sessions", type(session_service.sync).__name__
+            )
             return None
-    except Exception as e:
-        print(f"Error getting most recent session: {e}")
+    except Exception:
+        logger.exception("Error getting most recent session", extra={"fields": {"user_id": user_id}})
         return None
-    
-    return None
 
 
 # def display_state(
@@ -217,98 +199,259 @@ def get_most_recent_session_id(session_service, app_name, user_id):
 #         print(f"Error displaying state: {e}")
 
 
-async def process_agent_response(event):
-    """Process and display agent response events."""
-    print(f"Event ID: {event.id}, Author: {event.author}")
+def process_agent_response(event):
+    """Log a runner event (sampled, debug only) and return its final response text, if any."""
+    if logger.isEnabledFor(logging.DEBUG):
+        text = None
+        if event.content and event.content.parts:
+            text = " ".join(
+                part.text.strip()
+                for part in event.content.parts
+                if getattr(part, "text", None) and not part.text.isspace()
+            )
+        logger.debug(
+            "Runner event",
+            extra={
+                "sample": True,
+                "fields": {
+                    "event_id": event.id,
+                    "author": event.author,
+                    "is_final": event.is_final_response(),
+                    "text": truncate(text),
+                },
+            },
+        )
 
-    # Check for specific parts first
-    has_specific_part = False
-    if event.content and event.content.parts:
-        for part in event.content.parts:
-            if hasattr(part, "text") and part.text and not part.text.isspace():
-                print(f"  Text: '{part.text.strip()}'")
-
-    # Check for final response after specific parts
-    final_response = None
-    if not has_specific_part and event.is_final_response():
-        if (
-            event.content
-            and event.content.parts
-            and hasattr(event.content.parts[0], "text")
-            and event.content.parts[0].text
-        ):
-            final_response = event.content.parts[0].text.strip()
-            # Use colors and formatting to make the final response stand out
-            print(
-                f"\n{Colors.BG_BLUE}{Colors.WHITE}{Colors.BOLD}╔══ AGENT RESPONSE ═════════════════════════════════════════{Colors.RESET}"
+    if (
+        event.is_final_response()
+        and event.content
+        and event.content.parts
+        and hasattr(event.content.parts[0], "text")
+        and event.content.parts[0].text
+    ):
+        return event.content.parts[0].text.strip()
+    return None
+
+
+async def call_agent_async(
+    runner, user_id, session_id, query, session_service, answer_cache=None, on_event=None
+):
+    """Call the agent asynchronously with the user's query.
+
+    If an answer_cache (SemanticAnswerCache) is given, a cached answer for the
+    same or a near-identical question is returned without running the agent;
+    the turn is still added to the session's events and interaction history.
+    on_event, if given, is called with every runner event (the CLI uses it to
+    render events on the console).
+    """
+    content = types.Content(role="user", parts=[types.Part(text=query)])
+    final_response_text = None
+    agent_name = None
+    start = time.perf_counter()
+
+    cache_state = None
+    if answer_cache is not None:
+        with span("answer_cache.get", "cache"):
+            cache_state = await _answer_cache_state(
+                answer_cache, session_service, runner.app_name, user_id, session_id
             )
-            print(f"{Colors.CYAN}{Colors.BOLD}{final_response}{Colors.RESET}")
-            print(
-                f"{Colors.BG_BLUE}{Colors.WHITE}{Colors.BOLD}╚═════════════════════════════════════════════════════════════{Colors.RESET}\n"
+            cached = answer_cache.get(runner.app_name, user_id, session_id, query, state=cache_state)
+        if cached is not None:
+            agent_name, final_response_text = cached
+            await _record_cached_turn(
+                session_service, runner.app_name, user_id, session_id, query, agent_name, final_response_text
             )
-        else:
-            print(
-                f"\n{Colors.BG_RED}{Colors.WHITE}{Colors.BOLD}==> Final Agent Response: [No text content in final event]{Colors.RESET}\n"
+            await add_agent_response_to_history(
+                session_service,
+                runner.app_name,
+                user_id,
+                session_id,
+                agent_name,
+                final_response_text,
             )
+            logger.info(
+                "Agent query answered from cache",
+                extra={"fields": {"user_id": user_id, "session_id": session_id, "agent": agent_name}},
+            )
+            return final_response_text
 
-    return final_response
+    try:
+        with span("runner.run_async", "runner", agent=runner.agent.name):
+            recorder = EventSpanRecorder()
+            try:
+                async for event in runner.run_async(
+                    user_id=user_id, session_id=session_id, new_message=content
+                ):
+                    recorder.on_event(event)
+                    # Capture the agent name from the event if available
+                    if event.author:
+                        agent_name = event.author
+                    if on_event is not None:
+                        on_event(event)
+
+                    response = process_agent_response(event)
+                    if response:
+                        final_response_text = response
+            except Exception as e:
+                recorder.fail(e, agent=runner.agent.name)
+                raise
+            finally:
+                recorder.finish()
+    except Exception:
+        logger.exception(
+            "Error during agent run",
+            extra={"fields": {"user_id": user_id, "session_id": session_id, "query": truncate(query)}},
+        )
+        # Re-raise the exception so the API can handle it
+        raise
 
+    # Add the agent response to interaction history if we got a final response
+    if final_response_text and agent_name:
+        if answer_cache is not None:
+            answer_cache.put(
+                runner.app_name, user_id, session_id, query, agent_name, final_response_text,
+                state=cache_state,
+            )
+        await add_agent_response_to_history(
+            session_service,
+            runner.app_name,
+            user_id,
+            session_id,
+            agent_name,
+            final_response_text,
+        )
 
-async def call_agent_async(runner, user_id, session_id, query):
-    """Call the agent asynchronously with the user's query."""
-    content = types.Content(role="user", parts=[types.Part(text=query)])
-    print(
-        f"\n{Colors.BG_GREEN}{Colors.BLACK}{Colors.BOLD}--- Running Query: {query} ---{Colors.RESET}"
+    logger.info(
+        "Agent query completed",
+        extra={
+            "fields": {
+                "user_id": user_id,
+                "session_id": session_id,
+                "agent": agent_name,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+                "response_chars": len(final_response_text or ""),
+            }
+        },
     )
+    return final_response_text
+
+
+async def run_agent_query(runner, user_id, session_id, query, answer_cache=None, session_service=None):
+    """Run the agent to completion without console output or history writes.
+
+    Used where the caller records history itself (e.g. grouped batch writes).
+    An answer_cache is consulted and filled the same way as in call_agent_async;
+    without a session_service (AsyncSessionService) it only uses per-session
+    answers and cached turns are not added to the session's events.
+
+    Returns:
+        tuple: (agent_name, final_response_text); either may be None
+    """
+    cache_state = None
+    if answer_cache is not None:
+        with span("answer_cache.get", "cache"):
+            cache_state = await _answer_cache_state(
+                answer_cache, session_service, runner.app_name, user_id, session_id
+            )
+            cached = answer_cache.get(runner.app_name, user_id, session_id, query, state=cache_state)
+        if cached is not None:
+            if session_service is not None:
+                await _record_cached_turn(session_service, runner.app_name, user_id, session_id, query, *cached)
+            return cached
+
+    content = types.Content(role="user", parts=[types.Part(text=query)])
     final_response_text = None
     agent_name = None
 
-    # Display state before processing the message
-    # display_state(
-    #     runner.session_service,
-    #     runner.app_name,
-    #     user_id,
-    #     session_id,
-    #     "State BEFORE processing",
-    # )
+    with span("runner.run_async", "runner", agent=runner.agent.name):
+        recorder = EventSpanRecorder()
+        try:
+            async for event in runner.run_async(
+                user_id=user_id, session_id=session_id, new_message=content
+            ):
+                recorder.on_event(event)
+                if event.author:
+                    agent_name = event.author
+                if (
+                    event.is_final_response()
+                    and event.content
+                    and event.content.parts
+                    and hasattr(event.content.parts[0], "text")
+                    and event.content.parts[0].text
+                ):
+                    final_response_text = event.content.parts[0].text.strip()
+        except Exception as e:
+            recorder.fail(e, agent=runner.agent.name)
+            raise
+        finally:
+            recorder.finish()
+
+    if answer_cache is not None and final_response_text and agent_name:
+        answer_cache.put(
+            runner.app_name, user_id, session_id, query, agent_name, final_response_text,
+            state=cache_state,
+        )
+    return agent_name, final_response_text
+
+
+def event_to_dict(event):
+    """Summarize a runner event as a JSON-serializable dict for streaming clients."""
+    text = ""
+    if event.content and event.content.parts:
+        text = "".join(
+            part.text
+            for part in event.content.parts
+            if hasattr(part, "text") and part.text
+        )
+    return {
+        "event_id": event.id,
+        "author": event.author,
+        "text": text,
+        "partial": bool(getattr(event, "partial", False)),
+        "is_final": event.is_final_response(),
+    }
+
+
+async def stream_agent_events(runner, user_id, session_id, query, session_service):
+    """Run the agent and yield each event as soon as the runner produces it.
+
+    Yields:
+        dict: Event summaries from event_to_dict, in runner order
 
+    The final response is added to the interaction history once the stream ends,
+    exactly like call_agent_async.
+    """
+    content = types.Content(role="user", parts=[types.Part(text=query)])
+    final_response_text = None
+    agent_name = None
+
+    # No span() block here: it would stay open across yields to the client
+    recorder = EventSpanRecorder()
     try:
         async for event in runner.run_async(
             user_id=user_id, session_id=session_id, new_message=content
         ):
-            # Capture the agent name from the event if available
+            recorder.on_event(event)
             if event.author:
                 agent_name = event.author
 
-            response = await process_agent_response(event)
-            if response:
-                final_response_text = response
+            payload = event_to_dict(event)
+            if payload["is_final"] and payload["text"].strip():
+                final_response_text = payload["text"].strip()
+            yield payload
     except Exception as e:
-        print(f"{Colors.BG_RED}{Colors.WHITE}ERROR during agent run: {e}{Colors.RESET}")
-        print(f"Error type: {type(e).__name__}")
-        print(f"Error details: {str(e)}")
-        # Re-raise the exception so the API can handle it
-        raise e
+        # Not BaseException: a client disconnecting closes the generator, which is no agent error
+        recorder.fail(e, agent=runner.agent.name)
+        raise
+    finally:
+        recorder.finish()
 
-    # Add the agent response to interaction history if we got a final response
     if final_response_text and agent_name:
-        add_agent_response_to_history(
-            runner.session_service,
+        await add_agent_response_to_history(
+            session_service,
             runner.app_name,
             user_id,
             session_id,
             agent_name,
             final_response_text,
         )
-
-    # Display state after processing the message
-    # display_state(
-    #     runner.session_service,
-    #     runner.app_name,
-    #     user_id,
-    #     session_id,
-    #     "State AFTER processing",
-    # )
-
-    print(f"{Colors.YELLOW}{'-' * 30}{Colors.RESET}")
-    return final_response_text